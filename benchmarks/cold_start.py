@@ -0,0 +1,71 @@
+"""
+Tempo de partida a frio do monitor: processo novo -> `import monitor` -> primeira cotação
+(contra o stub local do /prices), medido em subprocessos para não aproveitar módulos já carregados:
+
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.stubs import ParaswapStubServer
+
+# Roda no subprocesso: o relógio começa antes de qualquer import do projeto
+_PROBE = """
+import time
+start = time.perf_counter()
+import asyncio, json
+import monitor
+imported = time.perf_counter()
+
+async def first_quote():
+    pair = monitor.PAIRS[0]
+    try:
+        return await monitor.get_prices(pair["srcToken"], pair["destToken"])
+    finally:
+        await monitor.paraswap_client.close()
+
+data = asyncio.run(first_quote())
+quoted = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_quote_s": quoted - start,
+                  "quoted": data is not None}))
+"""
+
+
+def measure(url: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("PRIVATE_KEY", "0x" + "42" * 32)
+    env.setdefault("CONTRACT_ADDRESS", "0x" + "00" * 19 + "01")
+    env.update(PARASWAP_API_URL=url, LOG_LEVEL="ERROR", PRICE_SOURCE="paraswap")
+    env.pop("RECORD_PATH", None)
+    output = subprocess.check_output([sys.executable, "-c", _PROBE], env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def run(runs: int) -> dict:
+    paraswap = ParaswapStubServer().start()
+    try:
+        samples = [measure(paraswap.url) for _ in range(runs)]
+    finally:
+        paraswap.stop()
+    return {
+        "benchmark": "cold_start",
+        "runs": runs,
+        "import_p50_s": round(statistics.median(s["import_s"] for s in samples), 4),
+        "first_quote_p50_s": round(statistics.median(s["first_quote_s"] for s in samples), 4),
+        "quoted": all(s["quoted"] for s in samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partida a frio do monitor até a primeira cotação")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Custo por resposta do /prices: o caminho antigo (json completo em dicts + detect_arbitrage
+copiando campos + bestRoute percorrido à mão) contra decode_quote, com e sem otherExchangePrices:
+
+    python -m benchmarks.quote_decode --iterations 20000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from utils.quotes import Opportunity, decode_quote
+
+EXCHANGES = ("QuickSwap", "SushiSwap", "UniswapV3", "Balancer", "Curve", "DODOV2", "KyberDmm", "ApeSwap")
+
+
+def price_response(other_exchange_prices: bool, hops: int = 3) -> bytes:
+    """Resposta no formato da Paraswap, com o tamanho típico de uma rota de `hops` pernas"""
+    swap = {"srcToken": "0x" + "11" * 20, "srcDecimals": 6, "destToken": "0x" + "22" * 20, "destDecimals": 18,
+            "swapExchanges": [{"exchange": name, "srcAmount": "1000000000", "destAmount": "500000000000000000",
+                               "percent": 100, "poolAddresses": ["0x" + "33" * 20],
+                               "data": {"router": "0x" + "44" * 20, "path": ["0x" + "11" * 20, "0x" + "22" * 20],
+                                        "factory": "0x" + "55" * 20, "initCode": "0x" + "66" * 32,
+                                        "feeFactor": 10000, "pools": [{"address": "0x" + "33" * 20, "fee": 30,
+                                                                       "direction": True}],
+                                        "gasUSD": "0.012"}}
+                              for name in EXCHANGES[:2]]}
+    route = {
+        "blockNumber": 50000000, "network": 137,
+        "srcToken": "0x" + "11" * 20, "srcDecimals": 6, "srcAmount": "1000000000",
+        "destToken": "0x" + "22" * 20, "destDecimals": 18, "destAmount": "500000000000000000",
+        "bestRoute": [{"percent": 100, "swaps": [swap] * hops}],
+        "gasCostUSD": "0.031", "gasCost": "250000", "side": "SELL", "tokenTransferProxy": "0x" + "77" * 20,
+        "contractAddress": "0x" + "88" * 20, "contractMethod": "multiSwap",
+        "partnerFee": 0, "srcUSD": "1000.00", "destUSD": "1002.50", "partner": "anon",
+        "maxImpactReached": False, "hmac": "ab" * 20,
+    }
+    if other_exchange_prices:
+        route["others"] = [{"exchange": name, "srcAmount": "1000000000", "destAmount": "499000000000000000",
+                            "unit": "499000000000000000", "data": swap["swapExchanges"][0]["data"],
+                            "gasCost": "120000", "gasUSD": "0.015"}
+                           for name in EXCHANGES * 4]
+    return json.dumps({"priceRoute": route}).encode()
+
+
+def legacy_path(body: bytes):
+    """O que o monitor fazia por resposta antes do decode_quote"""
+    price_route = json.loads(body)["priceRoute"]
+    src_usd = float(price_route["srcUSD"])
+    dest_usd = float(price_route["destUSD"])
+    opportunity = {
+        "tokenIn": price_route["srcToken"], "tokenOut": price_route["destToken"],
+        "gasUSD": float(price_route["gasCostUSD"]), "srcAmount": price_route["srcAmount"],
+        "destAmount": price_route["destAmount"], "bestRoute": price_route["bestRoute"],
+        "priceDifferencePercent": (dest_usd - src_usd) / src_usd * 100,
+    }
+    best_route = opportunity["bestRoute"][0]
+    return (opportunity, best_route["swaps"][0]["swapExchanges"][0]["exchange"],
+            best_route["swaps"][-1]["swapExchanges"][0]["exchange"])
+
+
+def lean_path(body: bytes):
+    quote = decode_quote(body)
+    return Opportunity(quote.src_token, quote.dest_token, quote.gas_cost_usd, quote.src_amount, quote.dest_amount,
+                       (quote.dest_usd - quote.src_usd) / quote.src_usd * 100, 0.0,
+                       quote.buy_exchange, quote.sell_exchange)
+
+
+def measure(path, body: bytes, iterations: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        path(body)
+    elapsed = time.perf_counter() - start
+
+    # Memória retida por resposta: o que fica vivo enquanto a oportunidade existe
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(100):
+        kept.append(path(body))
+    retained = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    return {"us_per_response": elapsed / iterations * 1e6, "retained_bytes": retained // 100}
+
+
+def run(iterations: int = 20000) -> dict:
+    results = []
+    for other_exchange_prices in (False, True):
+        body = price_response(other_exchange_prices)
+        results.append({
+            "other_exchange_prices": other_exchange_prices,
+            "body_bytes": len(body),
+            "legacy": measure(legacy_path, body, iterations),
+            "lean": measure(lean_path, body, iterations),
+        })
+    return {"iterations": iterations, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Custo de decodificação de uma resposta do /prices")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
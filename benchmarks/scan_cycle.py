@@ -0,0 +1,201 @@
+"""
+Benchmark offline do caminho varredura -> detecção -> dimensionamento -> envio do monitor.
+
+Roda `monitor.scan_block` contra um stub local do /prices da Paraswap e um nó JSON-RPC
+local, aumentando o número de pares, e grava p50/p99 por etapa e ciclos por segundo em JSON:
+
+    python -m benchmarks.scan_cycle --pairs 6,50,200,1000 --output bench.json
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+from web3 import Web3
+
+from benchmarks.stubs import ChainStubServer, ParaswapStubServer
+
+DEFAULT_PAIR_COUNTS = (6, 50, 200, 1000)
+STAGES = ("get_prices", "detect_arbitrage", "size", "trigger_arbitrage")
+
+
+def _prepare_env():
+    # O monitor lê a configuração na importação: chave descartável e logs só de erro
+    os.environ.setdefault("PRIVATE_KEY", "0x" + "42" * 32)
+    os.environ.setdefault("CONTRACT_ADDRESS", "0x" + "00" * 19 + "01")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["PRICE_SOURCE"] = "paraswap"
+    os.environ.pop("RECORD_PATH", None)
+    # Uma linha de log por oportunidade distorceria a medição e sujaria o JSON no stdout
+    logging.disable(logging.ERROR)
+
+
+class StageTimer:
+    """Coleta a duração de cada chamada das funções embrulhadas"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, name: str, fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.samples[name].append(time.perf_counter() - start)
+        else:
+            @functools.wraps(fn)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.samples[name].append(time.perf_counter() - start)
+        return timed
+
+    def summary(self) -> Dict[str, dict]:
+        result = {}
+        for name, values in self.samples.items():
+            values = np.asarray(values) * 1000
+            result[name] = {
+                "count": int(values.size),
+                "p50_ms": round(float(np.percentile(values, 50)), 4),
+                "p99_ms": round(float(np.percentile(values, 99)), 4),
+                "mean_ms": round(float(values.mean()), 4),
+            }
+        return result
+
+
+def synthetic_pairs(count: int) -> List[dict]:
+    """Pares com endereços determinísticos, estáveis entre execuções"""
+    def token(i):
+        return Web3.to_checksum_address(bytes(Web3.keccak(text=f"bench-token-{i}"))[:20])
+    return [{"srcToken": token(2 * i), "destToken": token(2 * i + 1)} for i in range(count)]
+
+
+async def run_case(monitor, chain: ChainStubServer, pairs: int, cycles: int, warmup: int = 1) -> dict:
+    """Mede `cycles` ciclos de scan_block com `pairs` pares"""
+    from utils.tx_manager import InFlightRegistry
+    timer = StageTimer()
+    saved = {name: getattr(monitor, name) for name in ("PAIRS", "inflight") + STAGES if name != "size"}
+    monitor.PAIRS = synthetic_pairs(pairs)
+    # O stub não minera: cada rota é liberada no bloco seguinte, sem teto de exposição, para medir o envio
+    monitor.inflight = InFlightRegistry(ttl_blocks=1, max_per_token=pairs, max_per_dex=2 * pairs)
+    for name in STAGES:
+        if name != "size":
+            setattr(monitor, name, timer.wrap(name, saved[name]))
+    monitor.trade_sizer.size = timer.wrap("size", type(monitor.trade_sizer).size.__get__(monitor.trade_sizer))
+    sent_before = chain.sent
+    try:
+        for i in range(warmup + cycles):
+            if i == warmup:
+                sent_before = chain.sent
+            chain.block_number += 1
+            start = time.perf_counter()
+            await monitor.scan_block(chain.block_number)
+            elapsed = time.perf_counter() - start
+            if i < warmup:
+                # Aquecimento: conexões, sessão HTTP e preços aprendidos pelo TradeSizer
+                timer.samples.clear()
+            else:
+                timer.samples["cycle"].append(elapsed)
+        # Taxas e recibos disparados em background por scan_block
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        for name, value in saved.items():
+            setattr(monitor, name, value)
+        del monitor.trade_sizer.size
+
+    cycle_total = sum(timer.samples["cycle"])
+    return {
+        "pairs": pairs,
+        "cycles": cycles,
+        "cycles_per_second": round(cycles / cycle_total, 4) if cycle_total else None,
+        "transactions_sent": chain.sent - sent_before,
+        "stages": timer.summary(),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+async def run(pair_counts, cycles: int, warmup: int, profitable: float) -> dict:
+    _prepare_env()
+    paraswap = ParaswapStubServer(profitable=profitable).start()
+    chain = ChainStubServer().start()
+    try:
+        import monitor
+        from utils.rate_limiter import RateLimiter
+        from utils.rpc_pool import RpcPool
+
+        client = monitor.paraswap_client
+        saved = (monitor.w3.provider, client.base_url, client.limiter)
+        # Tudo local: sem rate limit de API e com o nó stub atrás do mesmo pool RPC do monitor
+        monitor.w3.provider = RpcPool([chain.url], hedge_after=None)
+        client.base_url = paraswap.url
+        client.limiter = RateLimiter(rate=1e9, burst=10 ** 9)
+        try:
+            results = []
+            for pairs in pair_counts:
+                result = await run_case(monitor, chain, pairs, cycles, warmup)
+                print(f"{pairs:>5} pares: {result['cycles_per_second']} ciclos/s, "
+                      f"ciclo p50 {result['stages']['cycle']['p50_ms']} ms", file=sys.stderr)
+                results.append(result)
+        finally:
+            await client.close()
+            monitor.w3.provider, client.base_url, client.limiter = saved
+    finally:
+        paraswap.stop()
+        chain.stop()
+        logging.disable(logging.NOTSET)
+
+    return {
+        "benchmark": "scan_cycle",
+        "commit": _commit(),
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"cycles": cycles, "warmup": warmup, "profitable": profitable,
+                   "quote_concurrency": int(os.getenv("QUOTE_CONCURRENCY", "10"))},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do ciclo de varredura do monitor")
+    parser.add_argument("--pairs", default=",".join(map(str, DEFAULT_PAIR_COUNTS)),
+                        help="Quantidades de pares, separadas por vírgula")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--profitable", type=float, default=0.05, help="Fração de pares com spread")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run([int(p) for p in args.pairs.split(",")], args.cycles, args.warmup,
+                             args.profitable))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
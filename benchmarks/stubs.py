@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import zlib
+from typing import Optional
+
+from aiohttp import web
+from eth_abi import decode, encode
+from web3 import Web3
+
+from utils.simulator import EXECUTE_ARBITRAGE
+from utils.trade_sizer import DECIMALS
+
+TOKEN_USD = 2000.0  # Preço de todo token sintético (18 decimais)
+POOL_RESERVE = 10 ** 24  # Reserva dos pools sintéticos por trás das cotações
+GAS_COST_USD = 0.01
+
+
+class BackgroundServer:
+    """Servidor aiohttp em uma thread própria: chamadas síncronas ao nó não travam o loop do monitor"""
+
+    def __init__(self):
+        self.url: Optional[str] = None
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def app(self) -> web.Application:
+        raise NotImplementedError
+
+    async def _start(self, path: str):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}{path}"
+
+    def start(self, path: str = "/"):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(path), self._loop).result()
+        return self
+
+    def stop(self):
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class ParaswapStubServer(BackgroundServer):
+    """
+    /prices determinístico: cada par é um pool constant-product; `profitable` dos pares
+    (por hash do token) rendem `edge` acima do preço de entrada, os demais perdem 0,3%.
+    """
+
+    def __init__(self, profitable: float = 0.05, edge: float = 0.02):
+        super().__init__()
+        self.profitable = profitable
+        self.edge = edge
+        self.requests = 0
+
+    def _is_profitable(self, src: str, dest: str) -> bool:
+        return zlib.crc32(f"{src.lower()}{dest.lower()}".encode()) % 10000 < self.profitable * 10000
+
+    async def _prices(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        query = request.query
+        src, dest = query["srcToken"], query["destToken"]
+        amount = int(query["amount"])
+        out = amount * 997 * POOL_RESERVE // (POOL_RESERVE * 1000 + amount * 997)
+        markup = 1 + self.edge if self._is_profitable(src, dest) else 1.0
+        src_usd = amount / 10 ** 18 * TOKEN_USD
+        dest_usd = out / 10 ** 18 * TOKEN_USD * markup
+        return web.json_response({"priceRoute": {
+            "srcToken": src, "destToken": dest,
+            "srcAmount": str(amount), "destAmount": str(out),
+            "srcUSD": f"{src_usd:.6f}", "destUSD": f"{dest_usd:.6f}",
+            "gasCostUSD": str(GAS_COST_USD),
+            "bestRoute": [{"percent": 100, "swaps": [
+                {"swapExchanges": [{"exchange": "QuickSwap", "percent": 100}]},
+                {"swapExchanges": [{"exchange": "SushiSwap", "percent": 100}]},
+            ]}],
+        }})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/prices", self._prices)
+        return app
+
+    def start(self, path: str = "/prices"):
+        return super().start(path)
+
+
+class ChainStubServer(BackgroundServer):
+    """
+    Nó JSON-RPC mínimo (com lotes) para o caminho do monitor: blocos, taxas, nonce, eth_call
+    de decimals()/executeArbitrage e eth_sendRawTransaction. Nada é executado de fato.
+    """
+
+    def __init__(self, block_number: int = 1_000_000, chain_id: int = 137):
+        super().__init__()
+        self.block_number = block_number
+        self.chain_id = chain_id
+        self.sent = 0
+
+    def _block(self) -> dict:
+        number = hex(self.block_number)
+        zero_hash = "0x" + "00" * 32
+        return {
+            "number": number, "hash": "0x" + self.block_number.to_bytes(32, "big").hex(),
+            "parentHash": zero_hash, "nonce": "0x0000000000000000", "sha3Uncles": zero_hash,
+            "logsBloom": "0x" + "00" * 256, "transactionsRoot": zero_hash, "stateRoot": zero_hash,
+            "receiptsRoot": zero_hash, "miner": "0x" + "00" * 20, "difficulty": "0x0",
+            "totalDifficulty": "0x0", "extraData": "0x", "size": "0x0", "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0", "timestamp": hex(1_700_000_000 + self.block_number * 2),
+            "transactions": [], "uncles": [], "baseFeePerGas": hex(30 * 10 ** 9),
+        }
+
+    def _call(self, tx: dict) -> str:
+        data = bytes.fromhex(tx.get("data", tx.get("input", "0x"))[2:])
+        if data[:4] == bytes.fromhex(DECIMALS[2:]):
+            return "0x" + encode(["uint256"], [18]).hex()
+        if data[:4] == EXECUTE_ARBITRAGE:
+            amount = decode(["(address,address,uint256,uint8,uint8)"], data[4:])[0][2]
+            return "0x" + encode(["uint256"], [amount * 101 // 100]).hex()
+        return "0x"
+
+    def handle(self, method: str, params: list):
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_blockNumber":
+            return hex(self.block_number)
+        if method == "eth_getBlockByNumber":
+            return self._block()
+        if method in ("eth_maxPriorityFeePerGas", "eth_gasPrice"):
+            return hex(30 * 10 ** 9)
+        if method == "eth_getTransactionCount":
+            return "0x0"
+        if method == "eth_call":
+            return self._call(params[0])
+        if method == "eth_sendRawTransaction":
+            self.sent += 1
+            return "0x" + bytes(Web3.keccak(hexstr=params[0])).hex()
+        if method == "eth_getTransactionReceipt":
+            return None
+        if method == "eth_getLogs":
+            return []
+        if method == "web3_clientVersion":
+            return "arbloan-bench"
+        raise KeyError(method)
+
+    def _respond(self, request: dict) -> dict:
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            response["result"] = self.handle(request["method"], request.get("params", []))
+        except KeyError:
+            response["error"] = {"code": -32601, "message": f"method not found: {request['method']}"}
+        return response
+
+    async def _rpc(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self._respond(item) for item in body])
+        return web.json_response(self._respond(body))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self._rpc)
+        return app
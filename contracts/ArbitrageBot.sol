@@ -66,7 +66,7 @@ contract ArbitrageBot is Ownable, ReentrancyGuard {
         emit DexUpdated(_index, _router, _name, _enabled);
     }
 
-    function executeArbitrage(ArbitrageParams memory params) external onlyOwner nonReentrant {
+    function executeArbitrage(ArbitrageParams memory params) external onlyOwner nonReentrant returns (uint256 amountOut) {
         require(params.buyDexIndex < dexCount && params.sellDexIndex < dexCount, "Invalid DEX index");
         require(dexes[params.buyDexIndex].enabled && dexes[params.sellDexIndex].enabled, "DEX not enabled");
         
@@ -113,6 +113,9 @@ contract ArbitrageBot is Ownable, ReentrancyGuard {
             buyDex.name,
             sellDex.name
         );
+
+        // Permite simular o trade via eth_call e ler o resultado antes de enviar
+        return finalAmounts[1];
     }
 
     function withdrawToken(address _token, uint256 _amount) external onlyOwner {
@@ -1,197 +1,462 @@
 import os
-import requests
+import asyncio
+import signal
 import time
-import random
-from web3 import Web3
-from eth_account import Account
-import json
-from dotenv import load_dotenv
+from utils.block_scheduler import BlockScheduler
+from utils.config import Lazy, get_config
 from utils.logger import arb_logger
+from utils.pair_scheduler import PairScheduler
+from utils.paraswap import ParaswapClient
+from utils.quote_cache import QuoteCache
+from utils.quotes import Opportunity, as_quote, as_response, decode_quote
+from utils.trade_sizer import TokenDecimals, TradeSizer
+from utils.tx_manager import FeeOracle, GasLimits, InFlightRegistry, NonceManager, raw_transaction
 
-# Carregar variáveis de ambiente
-load_dotenv()
-
-# Configurações
-PARASWAP_API_URL = "https://api.paraswap.io/prices"
-CHAIN_ID = 137  # Polygon
-WEB3_PROVIDER = os.getenv("WEB3_PROVIDER", "https://polygon-rpc.com")
-CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
+# Configurações (contracts.json + .env), lidas uma única vez e compartilhadas com ContractManager e deploy.py
+CONFIG = get_config()
+PARASWAP_API_URL = CONFIG.paraswap_api_url
+CHAIN_ID = CONFIG.chain_id
+CONTRACT_ADDRESS = CONFIG.contract_address
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-MIN_PROFIT_THRESHOLD = float(os.getenv("MIN_PROFIT_THRESHOLD", "0.1"))
-GAS_PRICE_MULTIPLIER = float(os.getenv("GAS_PRICE_MULTIPLIER", "1.1"))
-
-# Lista com pares de tokens para monitorar (endereços de tokens na Polygon)
-PAIRS = [
-    {"srcToken": "0xD6DF932A45C0f255f85145f286eA0b292B21C90B", "destToken": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"},  # AAVE/USDC
-    {"srcToken": "0x1BFD67037B42Cf73acF2047067bd4F2C47D9BfD6", "destToken": "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"},  # WBTC/WETH
-    {"srcToken": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174", "destToken": "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"},  # USDC/USDT
-    {"srcToken": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174", "destToken": "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"},  # USDC/WETH
-    {"srcToken": "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619", "destToken": "0x0d500B1d8E8eF31E21C99d1Db9A6444d3ADf1270"},  # WETH/MATIC
-    {"srcToken": "0x8f3Cf7ad23Cd3CaDbD9735AFf958023239c6A063", "destToken": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"},  # DAI/USDC
-]
+MIN_PROFIT_THRESHOLD = CONFIG.min_profit_threshold
+GAS_PRICE_MULTIPLIER = CONFIG.gas_price_multiplier
+QUOTE_CONCURRENCY = CONFIG.quote_concurrency
+BLOCK_POLL_INTERVAL = CONFIG.block_poll_interval
+QUOTE_CACHE_TTL = CONFIG.quote_cache_ttl
+QUOTE_CACHE_SIZE = CONFIG.quote_cache_size
+PRICE_SOURCE = CONFIG.price_source  # paraswap | onchain
+FLASH_LOAN_FEE = CONFIG.flash_loan_fee  # Taxa do flash loan Aave (fração)
+MAX_CYCLE_HOPS = CONFIG.max_cycle_hops
+SIZE_LADDER_STEPS = CONFIG.size_ladder_steps  # Tamanhos cotados por oportunidade
+SIZE_REFERENCE_USD = CONFIG.size_reference_usd  # Centro da escada de tamanhos (USD)
+RECORD_PATH = CONFIG.record_path  # Grava cotações e reservas para replay/backtest
+RPC_HEDGE_AFTER = CONFIG.rpc_hedge_after  # Segundos até duplicar a chamada em outro nó
+RPC_BATCH_WINDOW = CONFIG.rpc_batch_window  # Janela para agrupar chamadas em lote
+SCAN_WORKERS = CONFIG.scan_workers  # Processos de varredura on-chain (0 = neste processo)
+SCAN_BUDGET = CONFIG.scan_budget  # Pares cotados por bloco na Paraswap (0 = todos, sempre)
+
+# Pares de tokens monitorados (config/contracts.json, `pairs`)
+PAIRS = [pair.as_dict() for pair in CONFIG.pairs]
 
 # Token names para logging
-TOKEN_NAMES = {
-    "0xc2132d05d31c914a87c6611c10748aeb04b58e8f": "USDT",
-    "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270": "WMATIC",
-    "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619": "WETH",
-    "0x2791bca1f2de4661ed88a30c99a7a9449aa84174": "USDC",
-    "0x1bfd67037b42cf73acf2047067bd4f2c47d9bfd6": "WBTC",
-    "0xd6df932a45c0f255f85145f286ea0b292b21c90b": "AAVE",
-    "0x831753dd7087cac61ab5644b308642cc1c33dc13": "QUICK",
-    "0xbbba073c31bf03b8d0d9b09a2e8a65f810b4348e": "SUSHI"
-}
-
-# Inicializar Web3
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER))
-
-# Carregar ABI do contrato
-with open('config/contracts.json') as f:
-    contract_config = json.load(f)
-    CONTRACT_ABI = contract_config['abi']
-
-# Configurar contrato
-contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-
-# Configurar conta
-account = Account.from_key(PRIVATE_KEY)
-
-def get_prices(src_token, dest_token, side="SELL", route=None, other_exchange_prices=False, retry_count=0):
-    start_time = time.time()
-    
-    # Exponential backoff em caso de erro
-    if retry_count > 0:
-        wait_time = min(60, 2 ** retry_count) + random.uniform(0, 1)  # Max 60 segundos + jitter
-        arb_logger.logger.info(f"Aguardando {wait_time:.2f} segundos antes de tentar novamente...")
-        time.sleep(wait_time)
-
-    params = {
-        "srcToken": src_token,
-        "destToken": dest_token,
-        "amount": "100000000",
-        "network": CHAIN_ID,
-        "side": side,
-        "otherExchangePrices": str(other_exchange_prices).lower()
-    }
-
-    if route:
-        params["route"] = "-".join(route)
-
-    url = PARASWAP_API_URL + "?" + "&".join([f"{k}={v}" for k, v in params.items()])
-    response = None
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        end_time = time.time()
-        arb_logger.log_api_latency("paraswap_prices", end_time - start_time)
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        arb_logger.logger.error("Erro na requisição", error=str(e))
-        if response is not None:
-            if response.status_code == 429:
-                retry_after = response.headers.get("Retry-After")
-                x_ratelimit_reset = response.headers.get("X-RateLimit-Reset")
-                if retry_count < 5:  # Máximo de 5 tentativas
-                    return get_prices(src_token, dest_token, side, route, other_exchange_prices, retry_count + 1)
-            elif response.status_code == 404:
-                arb_logger.logger.error("Recurso não encontrado (404)")
-            elif response.status_code == 400:
-                arb_logger.logger.error("Requisição inválida (400)")
-            else:
-                arb_logger.logger.error(f"Status code: {response.status_code}")
-    except Exception as e:
-        arb_logger.logger.error("Erro inesperado", error=str(e))
-    return None
+TOKEN_NAMES = dict(CONFIG.token_names)
+
+WMATIC = "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270"
+
+# Fonte on-chain: reservas dos pools QuickSwap/SushiSwap, na ordem de DEXs do contrato
+DEXES = list(CONFIG.dexes)
+# Índice de cada DEX no contrato, pelo nome que a Paraswap usa na rota (QuickSwap -> quickswap)
+DEX_INDEXES = CONFIG.dex_indexes
+
+# Conexões e conta só são criadas no primeiro uso: importar o monitor (testes,
+# replay, benchmarks) não conecta nem carrega web3/eth-account, e a primeira cotação não espera por eles
+def _connect():
+    # Web3 sobre o pool de endpoints RPC (failover, hedge e lotes automáticos)
+    from utils.rpc_pool import make_web3
+    return make_web3(CONFIG.rpc_endpoints, hedge_after=RPC_HEDGE_AFTER, batch_window=RPC_BATCH_WINDOW)
+
+def _load_account():
+    from eth_account import Account
+    return Account.from_key(PRIVATE_KEY)
+
+def _reserve_state():
+    from utils.reserve_state import ReserveState
+    from utils.reserves import MULTICALL3_ADDRESS, ReserveReader
+    return ReserveState(ReserveReader(w3, PAIRS, DEXES, CONFIG.contracts.get('multicall3', MULTICALL3_ADDRESS)))
+
+def _spread_engine():
+    from utils.spread_engine import SpreadEngine
+    return SpreadEngine([name for name, _ in DEXES], flash_fee=FLASH_LOAN_FEE)
+
+def _token_graph():
+    # Grafo de tokens para ciclos multi-hop (triangulares etc.)
+    from utils.token_graph import TokenGraph
+    return TokenGraph(list(TOKEN_NAMES) + list(CONFIG.tokens.values()), max_hops=MAX_CYCLE_HOPS,
+                      min_profit=FLASH_LOAN_FEE)
+
+def _trade_simulator():
+    # Simula os candidatos de cada bloco via eth_call em lote antes de enviar
+    from utils.simulator import TradeSimulator
+    return TradeSimulator(w3, CONTRACT_ADDRESS, account.address)
+
+def _receipt_watcher():
+    # Confirmações em background: um lote de eth_getTransactionReceipt por bloco
+    from utils.receipt_watcher import ReceiptWatcher
+    return ReceiptWatcher(w3, handle_receipt, on_timeout=handle_receipt_timeout,
+                          timeout_blocks=CONFIG.receipt_timeout_blocks)
+
+w3 = Lazy(_connect)
+account = Lazy(_load_account)
+
+# Estado local de envio: nonce, taxas por bloco e limite de gas por rota
+nonce_manager = Lazy(lambda: NonceManager(w3, account.address))
+fee_oracle = FeeOracle(w3, multiplier=GAS_PRICE_MULTIPLIER)
+gas_limits = GasLimits()
+# Uma rota por vez até o recibo (ou o timeout do receipt_watcher), com teto de trades simultâneos
+# por token e por DEX; a expiração por blocos é só uma rede de segurança, depois desse timeout
+inflight = InFlightRegistry(ttl_blocks=CONFIG.inflight_ttl_blocks, max_per_token=CONFIG.max_inflight_per_token,
+                            max_per_dex=CONFIG.max_inflight_per_dex)
+
+trade_simulator = Lazy(_trade_simulator)
+reserve_state = Lazy(_reserve_state)
+spread_engine = Lazy(_spread_engine)
+token_graph = Lazy(_token_graph)
+receipt_watcher = Lazy(_receipt_watcher)
+
+# Varredura on-chain em SCAN_WORKERS processos (iniciada em main); None = tudo neste processo
+shard_pool = None
+
+# Cliente Paraswap compartilhado (sessão HTTP com keep-alive e cache por bloco)
+quote_cache = QuoteCache(maxsize=QUOTE_CACHE_SIZE, ttl=QUOTE_CACHE_TTL)
+# decode_quote: de cada resposta só sobram os campos usados, num Quote com __slots__
+paraswap_client = ParaswapClient(PARASWAP_API_URL, CHAIN_ID, concurrency=QUOTE_CONCURRENCY,
+                                 cache=quote_cache, decode=decode_quote)
+
+# Com SCAN_BUDGET, a cota da API vai para os pares com mais chance de spread; os frios caem para o piso
+pair_scheduler = None
+if SCAN_BUDGET > 0:
+    pair_scheduler = PairScheduler(len(PAIRS), SCAN_BUDGET, MIN_PROFIT_THRESHOLD, history=CONFIG.scan_history,
+                                   floor_rate=CONFIG.scan_floor_rate)
+
+# Gravação opcional de tudo que o pipeline consome, para reproduzir com utils.replay
+recorder = None
+if RECORD_PATH:
+    from utils.recorder import Recorder
+    recorder = Recorder(RECORD_PATH)
+
+# Tamanho do trade por oportunidade, em unidades do token (decimals) em vez de um valor fixo
+# (decimals lidos em lote no início de main; tokens novos vão ao nó num executor, fora do loop)
+token_decimals = TokenDecimals(w3, multicall_address=CONFIG.contracts.get('multicall3'))
+trade_sizer = TradeSizer(paraswap_client, token_decimals, flash_fee=FLASH_LOAN_FEE,
+                         steps=SIZE_LADDER_STEPS, reference_usd=SIZE_REFERENCE_USD, recorder=recorder)
+
+async def get_prices(src_token, dest_token, side="SELL", route=None, other_exchange_prices=False, amount=None):
+    if amount is None:
+        # BUY cota a quantidade de saída: a referência é no token de destino
+        amount = await trade_sizer.reference_amount(dest_token if side == "BUY" else src_token)
+    data = await paraswap_client.get_prices(src_token, dest_token, side=side, route=route,
+                                            other_exchange_prices=other_exchange_prices, amount=str(amount))
+    quote = as_quote(data)
+    if quote is not None:
+        if recorder is not None:
+            recorder.record_quote({"srcToken": src_token, "destToken": dest_token, "side": side,
+                                   "amount": str(amount), "route": route,
+                                   "other_exchange_prices": other_exchange_prices}, as_response(data))
+        trade_sizer.observe(quote)
+    return data
+
+async def fetch_pair_quotes(pair):
+    """Busca as cotações SELL e BUY de um par em paralelo"""
+    # otherExchangePrices não é usado pelo pipeline: não vale o tamanho da resposta
+    sell = get_prices(pair['srcToken'], pair['destToken'],
+                      side="SELL")
+
+    # Teste BUY com rota específica
+    route = [pair['srcToken'], WMATIC, pair['destToken']]
+    buy = get_prices(pair['srcToken'], pair['destToken'],
+                     side="BUY",
+                     route=route)
+
+    data, data_buy = await asyncio.gather(sell, buy)
+    if as_quote(data_buy) is not None:
+        data = data_buy
+    return data
 
 def detect_arbitrage(data):
-    if not data or "priceRoute" not in data:
+    quote = as_quote(data)
+    if quote is None:
         return None
 
-    price_route = data["priceRoute"]
-    token_in = price_route["srcToken"]
-    token_out = price_route["destToken"]
-    gas_usd = float(price_route["gasCostUSD"])
-    src_amount = price_route["srcAmount"]
-    dest_amount = price_route["destAmount"]
-    best_route = price_route["bestRoute"]
-
-    # Calcular a diferença percentual dos preços
-    src_usd = float(price_route["srcUSD"])
-    dest_usd = float(price_route["destUSD"])
-    if src_usd == 0:
-        price_difference_percent = 0
-    else:
-        price_difference_percent = ((dest_usd - src_usd) / src_usd) * 100
-
     # Verificar se a oportunidade é lucrativa após custos
-    profit_after_costs = price_difference_percent - gas_usd
+    profit_after_costs = quote.profit_after_costs
     if profit_after_costs < MIN_PROFIT_THRESHOLD:
         return None
 
-    return {
-        "tokenIn": token_in,
-        "tokenOut": token_out,
-        "gasUSD": gas_usd,
-        "srcAmount": src_amount,
-        "destAmount": dest_amount,
-        "bestRoute": best_route,
-        "priceDifferencePercent": price_difference_percent,
-        "profitAfterCosts": profit_after_costs
-    }
-
-def trigger_arbitrage(pair, buy_dex, sell_dex, amount):
-    """Executa a arbitragem chamando o contrato inteligente"""
+    return Opportunity(quote.src_token, quote.dest_token, quote.gas_cost_usd, quote.src_amount,
+                       quote.dest_amount, quote.price_difference_percent, profit_after_costs,
+                       quote.buy_exchange, quote.sell_exchange)
+
+def trigger_arbitrage(pair, buy_dex, sell_dex, amount, data=None, detected_at=None):
+    """
+    Executa a arbitragem chamando o contrato inteligente (buy_dex/sell_dex são índices de DEX
+    do contrato). Com `data`, envia exatamente o calldata que já foi simulado; `detected_at`
+    (time.perf_counter()) mede detecção -> envio.
+    """
+    route = (pair["tokenIn"].lower(), pair["tokenOut"].lower(), buy_dex, sell_dex)
+    # Mesma rota ainda pendente (ou exposição no teto): outro envio só reverteria ou disputaria a liquidez
+    if not inflight.acquire(route):
+        return None
+    nonce = None
     try:
-        # Estimar gas
-        gas_estimate = contract.functions.initiateArbitrage(
-            pair["tokenIn"],
-            pair["tokenOut"],
-            amount,
-            buy_dex,
-            sell_dex
-        ).estimate_gas({'from': account.address})
-        
-        # Obter gas price atual e aplicar multiplicador
-        gas_price = int(w3.eth.gas_price * GAS_PRICE_MULTIPLIER)
-        
-        # Construir transação
-        txn = contract.functions.initiateArbitrage(
-            pair["tokenIn"],
-            pair["tokenOut"],
-            amount,
-            buy_dex,
-            sell_dex
-        ).build_transaction({
-            'from': account.address,
-            'gas': int(gas_estimate * 1.1),  # 10% a mais para segurança
-            'gasPrice': gas_price,
-            'nonce': w3.eth.get_transaction_count(account.address),
-        })
-        
+        # Nonce, taxas e limite de gas vêm de estado local: nenhuma leitura ao nó antes do envio
+        nonce = nonce_manager.next_nonce()
+        with arb_logger.stage("build_tx"):
+            if data is None:
+                from utils.simulator import encode_execute_arbitrage
+                data = encode_execute_arbitrage(pair["tokenIn"], pair["tokenOut"], amount, buy_dex, sell_dex)
+            txn = {
+                'from': account.address,
+                'to': CONTRACT_ADDRESS,
+                'data': data,
+                'value': 0,
+                'chainId': CHAIN_ID,
+                'gas': gas_limits.get(route),
+                'nonce': nonce,
+                **fee_oracle.fees()
+            }
+
         # Assinar e enviar transação
-        signed_txn = w3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        
-        # Aguardar confirmação
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        
-        # Registrar resultado
-        if receipt.status == 1:
-            arb_logger.log_trade(
-                f"{TOKEN_NAMES.get(pair['tokenIn'].lower(), 'Unknown')}/{TOKEN_NAMES.get(pair['tokenOut'].lower(), 'Unknown')}",
-                pair["profitAfterCosts"],
-                receipt.gasUsed
-            )
-            return receipt
-        else:
-            arb_logger.logger.error("Transação falhou", tx_hash=tx_hash.hex())
-            return None
-            
+        with arb_logger.stage("sign"):
+            signed_txn = w3.eth.account.sign_transaction(txn, PRIVATE_KEY)
+        with arb_logger.stage("send"):
+            tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed_txn))
     except Exception as e:
         arb_logger.logger.error("Erro ao executar arbitragem", error=str(e))
+        inflight.release(route)
+        if nonce is not None:
+            # O nonce reservado não foi usado (ou o nó discorda dele): volta a sincronizar
+            try:
+                nonce_manager.resync(e)
+            except Exception as sync_error:
+                arb_logger.logger.error("Erro ao ressincronizar nonce", error=str(sync_error))
         return None
+    if detected_at is not None:
+        arb_logger.log_detect_to_broadcast(detected_at)
+
+    # A confirmação chega pelo receipt_watcher; o loop segue varrendo enquanto isso
+    receipt_watcher.track(tx_hash, nonce=nonce, route=route, opportunity=pair)
+    return tx_hash
 
-async def main():
+async def handle_receipt(pending, receipt):
+    """Chamado pelo receipt_watcher quando uma transação enviada é minerada"""
+    pair = pending.context["opportunity"]
+    inflight.release(pending.context["route"])
+    nonce_manager.confirm(pending.context["nonce"])
+    gas_limits.observe(pending.context["route"], receipt.gasUsed)
+
+    # Registrar resultado
+    if receipt.status == 1:
+        pair_name = f"{TOKEN_NAMES.get(pair['tokenIn'].lower(), 'Unknown')}/{TOKEN_NAMES.get(pair['tokenOut'].lower(), 'Unknown')}"
+        arb_logger.log_trade(pair_name, pair.get("profitUSD"), receipt.gasUsed,
+                             profit_percent=pair["profitAfterCosts"])
+        arb_logger.notify(
+            f"Arbitragem executada com sucesso!\n" +
+            f"Par: {pair_name}\n" +
+            f"Lucro: {pair['profitAfterCosts']:.2f}%\n" +
+            f"Gas usado: {receipt.gasUsed}"
+        )
+    else:
+        arb_logger.logger.error("Transação falhou", tx_hash=pending.tx_hash)
+
+async def handle_receipt_timeout(pending):
+    """Transação sem recibo após vários blocos: o nonce pode ter ficado órfão"""
+    inflight.release(pending.context["route"])
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, nonce_manager.resync)
+    except Exception as e:
+        arb_logger.logger.error("Erro ao ressincronizar nonce", error=str(e))
+
+async def process_quote(data):
+    """
+    Avalia a cotação de um par: retorna o trade dimensionado como simulator.Candidate
+    (contexto: oportunidade e instante da detecção), ou None se não há o que enviar
+    """
+    quote = as_quote(data)
+    if quote is not None:
+        with arb_logger.stage("detect"):
+            opportunity = detect_arbitrage(quote)
+        if opportunity:
+            detected_at = time.perf_counter()
+            # Escada de tamanhos: executa no tamanho de maior lucro líquido, não no da cotação
+            with arb_logger.stage("size"):
+                sized = await trade_sizer.size(opportunity.token_in, opportunity.token_out)
+            if sized is None:
+                arb_logger.logger.info("Sem tamanho lucrativo após custos",
+                                       token_in=opportunity.token_in, token_out=opportunity.token_out)
+                return None
+            opportunity.src_amount = sized.amount_in
+            opportunity.dest_amount = sized.amount_out
+            opportunity.buy_exchange = sized.quote.buy_exchange
+            opportunity.sell_exchange = sized.quote.sell_exchange
+            opportunity.profit_usd = sized.profit_usd
+
+            arb_logger.log_opportunity(
+                f"{TOKEN_NAMES.get(opportunity.token_in.lower(), 'Unknown')}/{TOKEN_NAMES.get(opportunity.token_out.lower(), 'Unknown')}",
+                opportunity.price_difference_percent,
+                opportunity.gas_usd
+            )
+
+            # DEXs da melhor rota: primeira perna compra, última vende
+            buy_dex, sell_dex = opportunity.buy_exchange, opportunity.sell_exchange
+            if buy_dex is None or sell_dex is None:
+                arb_logger.logger.info("Cotação sem rota", token_in=opportunity.token_in,
+                                       token_out=opportunity.token_out)
+                return None
+            buy_index = DEX_INDEXES.get(buy_dex.lower())
+            sell_index = DEX_INDEXES.get(sell_dex.lower())
+            if buy_index is None or sell_index is None:
+                arb_logger.logger.info("Rota usa DEX não cadastrada no contrato", buy_dex=buy_dex, sell_dex=sell_dex)
+                return None
+            if buy_index == sell_index:
+                # Compra e venda no mesmo pool: o contrato só devolveria menos que o emprestado
+                arb_logger.logger.info("Rota compra e vende na mesma DEX", dex=buy_dex)
+                return None
+
+            from utils.simulator import Candidate
+            return Candidate(opportunity.token_in, opportunity.token_out, sized.amount_in,
+                             buy_index, sell_index, (opportunity, detected_at))
+    return None
+
+async def simulate_candidates(candidates, block_number):
+    """Todos os candidatos do bloco num único lote de eth_call; só os que não reverteriam seguem"""
+    if not candidates:
+        return []
+    try:
+        winners, _ = await trade_simulator.simulate_async(candidates, block_number)
+    except Exception as e:
+        arb_logger.logger.error("Erro ao simular candidatos", error=str(e))
+        return []
+    return winners
+
+async def scan_paraswap(block_number):
+    """Um ciclo de varredura via API Paraswap"""
+    # Cotações de um bloco já consultado continuam válidas no cache
+    quote_cache.advance_block(block_number)
+
+    indexes = range(len(PAIRS)) if pair_scheduler is None else pair_scheduler.due()
+    arb_logger.log_scan_schedule(len(indexes), len(PAIRS))
+
+    # Dispara todas as cotações do ciclo de uma vez: o ciclo dura o tempo da mais lenta
+    results = await asyncio.gather(*(fetch_pair_quotes(PAIRS[i]) for i in indexes),
+                                   return_exceptions=True)
+    candidates = []
+    for pair_index, data in zip(indexes, results):
+        try:
+            if isinstance(data, Exception):
+                raise data
+            if pair_scheduler is not None:
+                quote = as_quote(data)
+                if quote is not None:
+                    pair_scheduler.observe(pair_index, quote.profit_after_costs)
+            candidate = await process_quote(data)
+            if candidate is not None:
+                candidates.append(candidate)
+        except Exception as e:
+            arb_logger.logger.error("Erro no loop principal", error=str(e))
+
+    # Só os trades que o eth_call confirma seguem para envio, com o calldata já simulado
+    for result in await simulate_candidates(candidates, block_number):
+        opportunity, detected_at = result.candidate.context
+        try:
+            # Executar arbitragem (só envia; o recibo é tratado em handle_receipt)
+            trigger_arbitrage(opportunity, result.candidate.buy_dex, result.candidate.sell_dex,
+                              result.candidate.amount, data=result.data, detected_at=detected_at)
+        except Exception as e:
+            arb_logger.logger.error("Erro no loop principal", error=str(e))
+
+async def poll_reserves(block_number):
+    """
+    Pares alterados e suas reservas (n_alterados, n_dexes, 2): do ReserveState deste processo
+    ou, com SCAN_WORKERS, do quadro em memória compartilhada escrito pelos shards.
+    """
+    if shard_pool is not None:
+        changed = await shard_pool.advance(block_number)
+        reserves = shard_pool.read(changed)
+        changed = changed.tolist()
+        if recorder is not None and changed:
+            from utils.reserves import Reserves, ReserveSnapshot
+            recorder.record_snapshot(ReserveSnapshot(block_number, {
+                (pair_index, dex): Reserves(int(reserves[row, col, 0]), int(reserves[row, col, 1]), 0)
+                for row, pair_index in enumerate(changed) for col, (dex, _) in enumerate(DEXES)
+                if reserves[row, col, 0] > 0
+            }), changed)
+        return changed, reserves
+
+    loop = asyncio.get_running_loop()
+    changed = await loop.run_in_executor(None, reserve_state.poll, block_number)
+    if recorder is not None and changed:
+        recorder.record_snapshot(reserve_state.snapshot(), changed)
+    changed = reserve_state.take_dirty()
+    return changed, spread_engine.reserves_from_snapshot(reserve_state.snapshot(), len(PAIRS), changed)
+
+async def scan_onchain(block_number):
+    """Um ciclo on-chain: ingere os eventos Sync novos e reavalia só os pares alterados"""
+    try:
+        changed, reserves = await poll_reserves(block_number)
+    except Exception as e:
+        arb_logger.logger.error("Erro ao atualizar reservas", error=str(e))
+        return
+    if not changed:
+        return
+
+    # Atualiza só as arestas dos pares alterados; a busca parte apenas dos tokens afetados
+    for row, pair_index in enumerate(changed):
+        pair = PAIRS[pair_index]
+        for col, (dex, _) in enumerate(DEXES):
+            reserve_in, reserve_out = reserves[row, col]
+            if reserve_in > 0 or reserve_out > 0:
+                token_graph.set_reserves(pair['srcToken'], pair['destToken'], dex, reserve_in, reserve_out)
+    for cycle in token_graph.find_cycles():
+        arb_logger.logger.info(
+            "cycle_found",
+            path="/".join(TOKEN_NAMES.get(t, t) for t in cycle.path),
+            dexes=list(cycle.dexes),
+            profit_percent=cycle.profit_percent
+        )
+
+    from utils.simulator import Candidate
+    with arb_logger.stage("detect"):
+        opportunities = spread_engine.scan(reserves, pair_indexes=changed)
+    detected_at = time.perf_counter()
+    candidates = []
+    for opp in opportunities:
+        if opp.profit_percent < MIN_PROFIT_THRESHOLD:
+            continue
+        pair = PAIRS[opp.pair_index]
+        candidates.append(Candidate(pair['srcToken'], pair['destToken'], opp.amount_in,
+                                    opp.buy_dex, opp.sell_dex, opp))
+    for result in await simulate_candidates(candidates, block_number):
+        opp = result.candidate.context
+        pair = PAIRS[opp.pair_index]
+        opportunity = {
+            "tokenIn": pair['srcToken'],
+            "tokenOut": pair['destToken'],
+            "gasUSD": 0.0,
+            "srcAmount": opp.amount_in,
+            "destAmount": result.amount_out,
+            "priceDifferencePercent": opp.profit_percent,
+            "profitAfterCosts": result.profit / opp.amount_in * 100,
+            "profitUSD": None
+        }
+        # Preço do token de entrada aprendido das cotações, quando houver
+        price = trade_sizer.prices.get(pair['srcToken'].lower())
+        if price:
+            opportunity["profitUSD"] = result.profit * price
+        try:
+            arb_logger.log_opportunity(
+                f"{TOKEN_NAMES.get(pair['srcToken'].lower(), 'Unknown')}/{TOKEN_NAMES.get(pair['destToken'].lower(), 'Unknown')}",
+                opportunity["profitAfterCosts"],
+                0.0
+            )
+            trigger_arbitrage(opportunity, opp.buy_dex, opp.sell_dex, opp.amount_in, data=result.data,
+                              detected_at=detected_at)
+        except Exception as e:
+            arb_logger.logger.error("Erro no loop principal", error=str(e))
+
+async def scan_block(block_number):
+    """Um ciclo de varredura por bloco novo"""
+    # Taxas e recibos atualizados em paralelo à varredura, uma vez por bloco
+    asyncio.ensure_future(fee_oracle.refresh_async(block_number))
+    asyncio.ensure_future(receipt_watcher.on_block(block_number))
+    inflight.advance_block(block_number)
+    if recorder is not None:
+        recorder.advance_block(block_number)
+    if PRICE_SOURCE == "onchain":
+        await scan_onchain(block_number)
+    else:
+        await scan_paraswap(block_number)
+
+async def main(max_blocks=None):
     arb_logger.start_metrics_server(int(os.getenv("PROMETHEUS_PORT", 9090)))
     
     arb_logger.logger.info("Iniciando monitoramento", extra={
@@ -200,54 +465,48 @@ async def main():
         "chain_id": CHAIN_ID
     })
 
-    while True:
-        for pair in PAIRS:
-            try:
-                # Teste SELL com outras exchanges
-                data = get_prices(pair['srcToken'], pair['destToken'],
-                               side="SELL",
-                               other_exchange_prices=True)
-                
-                # Teste BUY com rota específica
-                route = [pair['srcToken'], "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270", pair['destToken']]
-                data_buy = get_prices(pair['srcToken'], pair['destToken'],
-                                   side="BUY",
-                                   route=route,
-                                   other_exchange_prices=True)
-
-                if data_buy and "priceRoute" in data_buy:
-                    data = data_buy
-
-                if data and "priceRoute" in data:
-                    opportunity = detect_arbitrage(data)
-                    if opportunity:
-                        arb_logger.log_opportunity(
-                            f"{TOKEN_NAMES.get(opportunity['tokenIn'].lower(), 'Unknown')}/{TOKEN_NAMES.get(opportunity['tokenOut'].lower(), 'Unknown')}",
-                            opportunity['priceDifferencePercent'],
-                            opportunity['gasUSD']
-                        )
-                        
-                        # Encontrar as DEXs com melhor spread
-                        best_route = opportunity['bestRoute'][0]
-                        buy_dex = best_route['swaps'][0]['swapExchanges'][0]['exchange']
-                        sell_dex = best_route['swaps'][-1]['swapExchanges'][0]['exchange']
-                        
-                        # Executar arbitragem
-                        result = trigger_arbitrage(opportunity, buy_dex, sell_dex, opportunity['srcAmount'])
-                        if result:
-                            await arb_logger.notify(
-                                f"Arbitragem executada com sucesso!\n" +
-                                f"Par: {TOKEN_NAMES.get(opportunity['tokenIn'].lower(), 'Unknown')}/{TOKEN_NAMES.get(opportunity['tokenOut'].lower(), 'Unknown')}\n" +
-                                f"Lucro: {opportunity['profitAfterCosts']:.2f}%\n" +
-                                f"Gas usado: {result.gasUsed}"
-                            )
-            
-            except Exception as e:
-                arb_logger.logger.error("Erro no loop principal", error=str(e))
-            
-            # Espera entre verificações
-            time.sleep(3)
+    # Nonce lido uma única vez; daqui em diante é controlado localmente
+    loop = asyncio.get_running_loop()
+    try:
+        # `kill -USR1 <pid>` liga/desliga os histogramas por etapa sem reiniciar
+        loop.add_signal_handler(signal.SIGUSR1, arb_logger.toggle_profiling)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        await loop.run_in_executor(None, nonce_manager.sync)
+    except Exception as e:
+        arb_logger.logger.error("Erro ao sincronizar nonce", error=str(e))
+    # Taxas prontas antes do primeiro envio: fees() só consulta o nó se o cache estiver vazio
+    await fee_oracle.refresh_async()
+    try:
+        # decimals() de todos os tokens configurados num único multicall: a cotação não espera o nó
+        tokens = [pair[side] for pair in PAIRS for side in ("srcToken", "destToken")] + list(CONFIG.tokens.values())
+        await loop.run_in_executor(None, token_decimals.prefetch, tokens)
+    except Exception as e:
+        arb_logger.logger.error("Erro ao ler decimals dos tokens", error=str(e))
+
+    global shard_pool
+    if PRICE_SOURCE == "onchain" and SCAN_WORKERS > 0:
+        # Workers só leem reservas; nonce, simulação e envio ficam neste processo
+        from functools import partial
+        from utils.reserves import MULTICALL3_ADDRESS
+        from utils.shard_pool import ShardPool, reserve_state_factory
+        factory = partial(reserve_state_factory, CONFIG.rpc_endpoints, DEXES,
+                          CONFIG.contracts.get('multicall3', MULTICALL3_ADDRESS))
+        shard_pool = ShardPool(PAIRS, [name for name, _ in DEXES], factory, workers=SCAN_WORKERS).start()
+
+    # Um ciclo por bloco; o ciclo de um bloco superado é cancelado
+    scheduler = BlockScheduler(w3, scan_block, poll_interval=BLOCK_POLL_INTERVAL)
+    try:
+        await scheduler.run(max_blocks)
+    finally:
+        if shard_pool is not None:
+            shard_pool.close()
+            shard_pool = None
+        await paraswap_client.close()
+        await arb_logger.notifier.close()
+        if recorder is not None:
+            recorder.close()
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
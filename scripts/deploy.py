@@ -1,11 +1,17 @@
-from web3 import Web3
 import json
 import os
 from eth_account import Account
 import sys
 
+# Executado como `python scripts/deploy.py` a partir da raiz: torna `utils` importável
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.config import CONFIG_PATH, get_config
+from utils.rpc_pool import make_web3
+from utils.tx_manager import raw_transaction
+
 def load_config():
-    with open('config/contracts.json', 'r') as f:
+    # Documento bruto: o deploy grava o endereço do contrato de volta no arquivo
+    with open(CONFIG_PATH, 'r') as f:
         return json.load(f)
 
 def load_contract_abi():
@@ -36,7 +42,7 @@ def deploy_contract(w3, account, config):
 
         # Assinar e enviar transação
         signed = account.sign_transaction(construct_txn)
-        tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+        tx_hash = w3.eth.send_raw_transaction(raw_transaction(signed))
         
         print(f'Transação enviada: {tx_hash.hex()}')
         
@@ -46,9 +52,10 @@ def deploy_contract(w3, account, config):
         
         print(f'Contrato implantado em: {contract_address}')
 
-        # Atualizar config com endereço do contrato
+        # Atualizar config com endereço do contrato (e bloco do deploy, início do utils.indexer)
         config['polygon']['contracts']['arbitrageBot'] = contract_address
-        with open('config/contracts.json', 'w') as f:
+        config['polygon']['contracts']['arbitrageBotDeployBlock'] = tx_receipt.blockNumber
+        with open(CONFIG_PATH, 'w') as f:
             json.dump(config, f, indent=4)
 
         return contract_address
@@ -61,8 +68,8 @@ def main():
     # Carregar configurações
     config = load_config()
     
-    # Configurar Web3
-    w3 = Web3(Web3.HTTPProvider(config['polygon']['network']['rpc']))
+    # Configurar Web3 com os mesmos endpoints do monitor
+    w3 = make_web3(get_config().rpc_endpoints)
     
     # Verificar conexão
     if not w3.is_connected():
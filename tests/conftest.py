@@ -0,0 +1,82 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+
+class ParaswapStub:
+    """Servidor local que imita o endpoint /prices da Paraswap"""
+
+    def __init__(self):
+        self.requests = []
+        self.url = None
+        # handler(request) -> web.Response; por padrão devolve uma cotação vazia
+        self.handler = lambda request: web.json_response({"priceRoute": {}})
+
+    async def _prices(self, request):
+        self.requests.append(dict(request.query))
+        response = self.handler(request)
+        if hasattr(response, "__await__"):
+            response = await response
+        return response
+
+
+@pytest_asyncio.fixture
+async def paraswap_stub():
+    stub = ParaswapStub()
+    app = web.Application()
+    app.router.add_get("/prices", stub._prices)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    stub.url = f"http://127.0.0.1:{port}/prices"
+    yield stub
+    await runner.cleanup()
+
+
+class FakeChain:
+    """Nó local mínimo: responde eth_call do Multicall3 despachando para pools em memória"""
+
+    def __init__(self, block_number=1):
+        from types import SimpleNamespace
+        self.block_number = block_number
+        self.contracts = {}  # endereço -> {selector: callable(args_bytes) -> bytes}
+        self.calls = 0
+        self.eth = SimpleNamespace(call=self._eth_call)
+
+    def register(self, address, handlers):
+        self.contracts[address.lower()] = handlers
+
+    def add_pool(self, address, token0, token1, reserve0, reserve1):
+        from eth_abi import encode
+        from utils import reserves as r
+        pool = {"reserves": [reserve0, reserve1]}
+        self.register(address, {
+            r.GET_RESERVES: lambda args: encode(["uint112", "uint112", "uint32"],
+                                                [pool["reserves"][0], pool["reserves"][1], 0]),
+            r.TOKEN0: lambda args: encode(["address"], [token0]),
+        })
+        return pool
+
+    def _eth_call(self, tx, block_identifier="latest"):
+        from eth_abi import decode, encode
+        from utils import reserves as r
+        self.calls += 1
+        data = bytes(tx["data"])
+        assert data[:4] == r.TRY_BLOCK_AND_AGGREGATE
+        _, calls = decode(["bool", "(address,bytes)[]"], data[4:])
+        results = []
+        for target, calldata in calls:
+            handler = self.contracts.get(target.lower(), {}).get(bytes(calldata[:4]))
+            if handler is None:
+                results.append((False, b""))
+            else:
+                results.append((True, handler(bytes(calldata[4:]))))
+        return encode(["uint256", "bytes32", "(bool,bytes)[]"],
+                      [self.block_number, b"\x00" * 32, results])
+
+
+@pytest.fixture
+def fake_chain():
+    return FakeChain()
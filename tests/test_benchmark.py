@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.scan_cycle import run
+
+
+@pytest.mark.asyncio
+async def test_scan_cycle_benchmark_smoke():
+    """Roda o benchmark offline com poucos pares e confere o formato do JSON"""
+    report = await run([6, 20], cycles=2, warmup=1, profitable=0.5)
+
+    assert [r["pairs"] for r in report["results"]] == [6, 20]
+    for result in report["results"]:
+        assert result["cycles_per_second"] > 0
+        stages = result["stages"]
+        assert stages["cycle"]["count"] == 2
+        assert stages["get_prices"]["count"] == 2 * 2 * result["pairs"]
+        assert stages["get_prices"]["p50_ms"] <= stages["get_prices"]["p99_ms"]
+    # Metade dos pares com spread: ao menos um trade dimensionado e enviado ao nó local
+    assert any(r["transactions_sent"] > 0 for r in report["results"])
+    assert "trigger_arbitrage" in report["results"][-1]["stages"]
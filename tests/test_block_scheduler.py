@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.block_scheduler import BlockScheduler
+
+
+class StandInEth:
+    """Imita w3.eth: get_block("latest") e eth_newBlockFilter opcional"""
+
+    def __init__(self, supports_filter=True):
+        self.supports_filter = supports_filter
+        self.head = 100
+        self.pending_hashes = []
+
+    def get_block(self, block_identifier):
+        return {"number": self.head, "timestamp": 1700000000 + 2 * self.head}
+
+    def mine(self):
+        self.head += 1
+        self.pending_hashes.append(b"%d" % self.head)
+
+    def filter(self, kind):
+        if not self.supports_filter:
+            raise ValueError("the method eth_newBlockFilter does not exist")
+        return SimpleNamespace(get_new_entries=self._new_entries)
+
+    def _new_entries(self):
+        entries, self.pending_hashes = self.pending_hashes, []
+        return entries
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("supports_filter", [True, False])
+async def test_one_scan_per_new_block(supports_filter):
+    chain = SimpleNamespace(eth=StandInEth(supports_filter))
+    scanned = []
+
+    async def scan(block_number):
+        scanned.append(block_number)
+        chain.eth.mine()
+
+    if supports_filter:
+        chain.eth.mine()
+    scheduler = BlockScheduler(chain, scan, poll_interval=0.001)
+    await scheduler.run(max_blocks=3)
+
+    assert scanned == sorted(set(scanned))
+    assert len(scanned) == 3
+    assert scheduler.use_filter is supports_filter
+
+
+@pytest.mark.asyncio
+async def test_superseded_scan_is_cancelled():
+    scheduler = BlockScheduler(None, None)
+    started, finished = [], []
+
+    async def slow_scan(block_number):
+        started.append(block_number)
+        await asyncio.sleep(0.2)
+        finished.append(block_number)
+
+    scheduler.scan = slow_scan
+    first = scheduler.on_block(1)
+    await asyncio.sleep(0.01)
+    second = scheduler.on_block(2)
+    await asyncio.gather(first, second, return_exceptions=True)
+
+    assert started == [1, 2]
+    assert finished == [2]
+    assert first.cancelled()
+    assert scheduler.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_scan_errors_do_not_stop_scheduler():
+    scheduler = BlockScheduler(None, None)
+
+    async def failing_scan(block_number):
+        raise RuntimeError("rpc fora do ar")
+
+    scheduler.scan = failing_scan
+    await scheduler.on_block(1)
+    assert scheduler.last_block == 1
+
+
+@pytest.mark.asyncio
+async def test_scan_near_completion_finishes_and_newest_block_runs_next():
+    scheduler = BlockScheduler(None, None, finish_grace=0.5)
+    scheduler.scan_duration = 0.05
+    started, finished = [], []
+
+    async def scan(block_number):
+        started.append(block_number)
+        await asyncio.sleep(0.05)
+        finished.append(block_number)
+
+    scheduler.scan = scan
+    first = scheduler.on_block(1)
+    await asyncio.sleep(0.01)
+    # Dois blocos chegam com o ciclo quase no fim: só o mais novo roda depois
+    assert scheduler.on_block(2) is first
+    assert scheduler.on_block(3) is first
+    await first
+    await scheduler._task
+
+    assert finished == [1, 3]
+    assert scheduler.cancelled == 0
+    assert scheduler.deferred == 2
+
+
+@pytest.mark.asyncio
+async def test_scans_longer_than_a_block_still_complete():
+    """Testa que ciclos mais longos que o bloco não são cancelados indefinidamente"""
+    scheduler = BlockScheduler(None, None, finish_grace=0.0)
+    finished = []
+
+    async def scan(block_number):
+        await asyncio.sleep(0.05)
+        finished.append(block_number)
+
+    scheduler.scan = scan
+    for block_number in range(1, 11):
+        scheduler.on_block(block_number)
+        await asyncio.sleep(0.02)
+    while not scheduler._task.done():
+        await scheduler._task
+
+    assert len(finished) >= 3
+    assert finished[-1] == 10
+    assert scheduler.cancelled <= len(finished)
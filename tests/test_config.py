@@ -0,0 +1,84 @@
+import json
+import threading
+
+import pytest
+
+from utils.config import Lazy, Pair, load_abi, load_config
+
+CONFIG = {
+    "abi": [{"type": "function", "name": "executeArbitrage"}],
+    "polygon": {
+        "network": {"chainId": 137, "rpc": "https://a", "rpcFallbacks": ["https://b"]},
+        "contracts": {"arbitrageBot": "0x00000000000000000000000000000000000000aa", "multicall3": "0xmc"},
+        "dexes": {"quickswap": "0xq", "sushiswap": "0xs"},
+        "tokens": {"USDC": "0xusdc", "WETH": "0xweth"},
+        "pairs": [["USDC", "WETH"], ["0xother", "USDC"]],
+    },
+}
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    for name in ("WEB3_PROVIDERS", "WEB3_PROVIDER", "CONTRACT_ADDRESS", "MIN_PROFIT_THRESHOLD"):
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / "contracts.json"
+    path.write_text(json.dumps(CONFIG))
+    return str(path)
+
+
+def test_load_config(config_path, monkeypatch):
+    monkeypatch.setenv("MIN_PROFIT_THRESHOLD", "0.5")
+    monkeypatch.setenv("PARASWAP_RATE_LIMIT", "2.5")
+    config = load_config(config_path)
+    assert config.chain_id == 137
+    assert config.rpc_endpoints == ("https://a", "https://b")
+    assert config.contract_address == "0x00000000000000000000000000000000000000aa"
+    assert config.dexes == (("quickswap", "0xq"), ("sushiswap", "0xs"))
+    # Pares por símbolo ou endereço
+    assert config.pairs == (Pair("0xusdc", "0xweth"), Pair("0xother", "0xusdc"))
+    assert config.pairs[0].as_dict() == {"srcToken": "0xusdc", "destToken": "0xweth"}
+    assert config.token_names["0xweth"] == "WETH"
+    assert config.dex_indexes == {"quickswap": 0, "sushiswap": 1}
+    assert config.min_profit_threshold == 0.5
+    assert config.paraswap_rate_limit == 2.5
+    assert load_abi(config) == CONFIG["abi"]
+
+
+def test_config_is_immutable(config_path):
+    config = load_config(config_path)
+    with pytest.raises(AttributeError):
+        config.min_profit_threshold = 1.0
+    with pytest.raises(TypeError):
+        config.tokens["DAI"] = "0xdai"
+
+
+def test_env_overrides_contract_address(config_path, monkeypatch):
+    monkeypatch.setenv("CONTRACT_ADDRESS", "0x00000000000000000000000000000000000000bb")
+    monkeypatch.setenv("WEB3_PROVIDERS", "https://x, https://y")
+    config = load_config(config_path)
+    assert config.contract_address == "0x00000000000000000000000000000000000000bb"
+    assert config.rpc_endpoints == ("https://x", "https://y")
+
+
+def test_lazy_creates_once_on_first_use():
+    class Client:
+        def __init__(self):
+            self.provider = "default"
+
+    created = []
+
+    def factory():
+        created.append(1)
+        return Client()
+
+    client = Lazy(factory)
+    assert created == [] and not client._initialized
+    threads = [threading.Thread(target=lambda: client.provider) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert created == [1]
+    # Escrita repassada ao objeto criado
+    client.provider = "stub"
+    assert client._resolve().provider == "stub"
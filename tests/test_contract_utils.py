@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from eth_account import Account
+from hexbytes import HexBytes
+
+from utils.config import Config
+from utils.contract_utils import ContractManager
+from utils.events import EventDecoder
+from utils.receipt_watcher import ReceiptWatcher
+from utils.simulator import encode_execute_arbitrage
+from utils.tx_manager import FeeOracle, NonceManager, raw_transaction
+
+BOT = "0x00000000000000000000000000000000000000aa"
+USDC = "0x2791bca1f2de4661ed88a30c99a7a9449aa84174"
+WETH = "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619"
+TX_HASH = "0x" + "cd" * 32
+
+
+class ReceiptProvider:
+    def __init__(self):
+        self.receipts = {}
+
+    def make_batch_request(self, requests):
+        return [{"jsonrpc": "2.0", "id": i, "result": self.receipts.get(params[0])}
+                for i, (_, params) in enumerate(requests)]
+
+
+def _manager():
+    manager = ContractManager.__new__(ContractManager)
+    manager.config = SimpleNamespace(chain_id=137, dex_indexes=Config.dex_indexes.fget(
+        SimpleNamespace(dexes=(("quickswap", "0x1"), ("sushiswap", "0x2")))))
+    manager.w3 = Mock()
+    manager.w3.provider = ReceiptProvider()
+    manager.w3.eth.get_transaction_count.return_value = 3
+    manager.w3.eth.get_block.side_effect = lambda block: {"number": block, "baseFeePerGas": 10 ** 9}
+    manager.w3.eth.max_priority_fee = 30 * 10 ** 9
+    manager.w3.eth.send_raw_transaction.return_value = HexBytes(TX_HASH)
+    manager.account = Account.from_key("0x" + "11" * 32)
+    manager.contract = SimpleNamespace(address="0x00000000000000000000000000000000000000AA")
+    manager.event_decoder = EventDecoder(address=BOT)
+    manager.nonce_manager = NonceManager(manager.w3, manager.account.address)
+    manager.fee_oracle = FeeOracle(manager.w3)
+    manager.fee_oracle._fees = {"gasPrice": 30 * 10 ** 9}
+    manager.receipt_watcher = ReceiptWatcher(manager.w3, manager._handle_receipt,
+                                             on_timeout=manager._handle_timeout)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_execute_arbitrage_sends_calldata_and_reports_through_watcher():
+    manager = _manager()
+    results = []
+
+    sent = manager.execute_arbitrage(USDC, WETH, 1000, "QuickSwap", 1, on_result=results.append)
+    assert sent == {"tx_hash": TX_HASH, "nonce": 3}
+    raw = manager.w3.eth.send_raw_transaction.call_args[0][0]
+    tx = Account.from_key("0x" + "11" * 32).sign_transaction({
+        "to": manager.contract.address, "data": encode_execute_arbitrage(USDC, WETH, 1000, 0, 1), "value": 0,
+        "chainId": 137, "nonce": 3, "gas": 2000000, "gasPrice": 30 * 10 ** 9})
+    assert raw == raw_transaction(tx)
+    assert manager.nonce_manager.pending == {3}
+
+    # Nenhuma espera síncrona: o recibo chega no próximo bloco
+    await manager.on_block(100)
+    assert results == []
+    manager.w3.provider.receipts[TX_HASH] = {"transactionHash": TX_HASH, "status": "0x1", "gasUsed": "0x1",
+                                             "logs": []}
+    await manager.on_block(101)
+    assert results == [{"tx_hash": TX_HASH, "status": 1, "events": []}]
+    assert manager.nonce_manager.pending == set()
+    # Taxas renovadas pelo próprio bloco, fora do caminho de envio
+    assert manager.fee_oracle.block_number == 101
+    assert "maxFeePerGas" in manager.fee_oracle.fees()
+
+
+def test_unknown_dex_is_rejected_before_sending():
+    manager = _manager()
+    with pytest.raises(Exception, match="não cadastrada"):
+        manager.execute_arbitrage(USDC, WETH, 1000, "uniswap", 1)
+    manager.w3.eth.send_raw_transaction.assert_not_called()
+    assert manager.nonce_manager.pending == set()
+
+
+def test_failed_signature_does_not_leave_nonce_gap():
+    manager = _manager()
+    manager.fee_oracle._fees = {"gasPrice": "não é um número"}
+    with pytest.raises(Exception, match="Erro ao executar arbitragem"):
+        manager.execute_arbitrage(USDC, WETH, 1000, "quickswap", "sushiswap")
+    manager.w3.eth.send_raw_transaction.assert_not_called()
+    # O nonce reservado volta para a fila: o próximo envio reutiliza o 3
+    assert manager.nonce_manager.next_nonce() == 3
@@ -0,0 +1,67 @@
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+
+from utils.events import EventDecoder
+from utils.reserve_state import SYNC_TOPIC
+
+BOT = "0x00000000000000000000000000000000000000aa"
+USDC = "0x2791bca1f2de4661ed88a30c99a7a9449aa84174"
+WETH = "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619"
+EXECUTED = bytes(Web3.keccak(text="ArbitrageExecuted(address,address,uint256,uint256,string,string)"))
+DEX_UPDATED = bytes(Web3.keccak(text="DexUpdated(uint8,address,string,bool)"))
+
+
+def _executed_log(log_index=0, address=BOT):
+    return {
+        "address": address, "blockNumber": 10, "logIndex": log_index, "transactionHash": HexBytes("0x" + "ab" * 32),
+        "topics": [HexBytes(EXECUTED)],
+        "data": HexBytes(encode(["address", "address", "uint256", "uint256", "string", "string"],
+                                [USDC, WETH, 1000, 1010, "quickswap", "sushiswap"])),
+    }
+
+
+def _dex_updated_log():
+    # Formato cru do JSON-RPC: hex em vez de HexBytes
+    return {
+        "address": BOT, "blockNumber": 11, "logIndex": 0,
+        "topics": ["0x" + DEX_UPDATED.hex(), "0x" + encode(["uint8"], [1]).hex()],
+        "data": "0x" + encode(["address", "string", "bool"], [WETH, "sushiswap", False]).hex(),
+    }
+
+
+def _sync_log():
+    return {"address": "0x" + "cc" * 20, "topics": [HexBytes(SYNC_TOPIC)],
+            "data": HexBytes(encode(["uint112", "uint112"], [1, 2]))}
+
+
+def test_decodes_bot_events_and_skips_foreign_logs():
+    decoder = EventDecoder(address=BOT)
+    receipt = {"logs": [_sync_log(), _executed_log(1), {"address": BOT, "topics": [], "data": "0x"}]}
+
+    events = decoder.decode_receipt(receipt)
+    assert len(events) == 1
+    event = events[0]
+    assert event.name == "ArbitrageExecuted"
+    assert event.args == {"tokenIn": USDC, "tokenOut": WETH, "amountIn": 1000, "amountOut": 1010,
+                          "buyDex": "quickswap", "sellDex": "sushiswap"}
+    assert (event.block_number, event.log_index) == (10, 1)
+    assert event.transaction_hash == "0x" + "ab" * 32
+
+
+def test_indexed_args_and_batch_of_receipts():
+    decoder = EventDecoder(address=BOT)
+    events = decoder.decode_receipts([{"logs": [_executed_log(0), _executed_log(1)]},
+                                      {"logs": [_dex_updated_log()]}])
+    assert [e.name for e in events] == ["ArbitrageExecuted", "ArbitrageExecuted", "DexUpdated"]
+    assert events[-1].args == {"index": 1, "router": WETH, "name": "sushiswap", "enabled": False}
+    assert decoder.topic("DexUpdated") == "0x" + DEX_UPDATED.hex()
+
+
+def test_same_topic_from_other_contract_or_bad_data_is_skipped():
+    decoder = EventDecoder(address=BOT)
+    assert decoder.decode_log(_executed_log(address="0x" + "dd" * 20)) is None
+    truncated = dict(_executed_log(), data=HexBytes(b"\x00" * 31))
+    assert decoder.decode_log(truncated) is None
+    # Sem filtro de endereço, o mesmo evento de outro contrato é decodificado
+    assert EventDecoder().decode_log(_executed_log(address="0x" + "dd" * 20)).name == "ArbitrageExecuted"
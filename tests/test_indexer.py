@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+
+from utils.events import EventDecoder
+from utils.indexer import EventIndexer, PairProfit, TradeStore
+
+BOT = "0x00000000000000000000000000000000000000aa"
+USDC = "0x2791bca1f2de4661ed88a30c99a7a9449aa84174"
+WETH = "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619"
+DAI = "0x8f3cf7ad23cd3cadbd9735aff958023239c6a063"
+DECODER = EventDecoder(address=BOT)
+
+
+def _trade(block, token_in, token_out, amount_in, amount_out, buy="quickswap", sell="sushiswap"):
+    return {"address": Web3.to_checksum_address(BOT), "blockNumber": block, "logIndex": 0,
+            "transactionHash": HexBytes(block.to_bytes(32, "big")),
+            "topics": [HexBytes(DECODER.topic("ArbitrageExecuted"))],
+            "data": HexBytes(encode(["address", "address", "uint256", "uint256", "string", "string"],
+                                    [token_in, token_out, amount_in, amount_out, buy, sell]))}
+
+
+def _dex_updated(block):
+    return {"address": Web3.to_checksum_address(BOT), "blockNumber": block, "logIndex": 1,
+            "topics": [HexBytes(DECODER.topic("DexUpdated")), HexBytes(encode(["uint8"], [1]))],
+            "data": HexBytes(encode(["address", "string", "bool"], [WETH, "sushiswap", False]))}
+
+
+class FakeChain:
+    """eth_getLogs sobre uma lista em memória; recusa intervalos maiores que `max_range` blocos"""
+
+    def __init__(self, logs, head, max_range=500):
+        self.logs = logs
+        self.block_number = head
+        self.max_range = max_range
+        self.requests = []
+
+    def get_logs(self, params):
+        start, end = params["fromBlock"], params["toBlock"]
+        if end - start + 1 > self.max_range:
+            raise ValueError("query returned more than 10000 results")
+        self.requests.append((start, end))
+        return [log for log in self.logs if start <= log["blockNumber"] <= end]
+
+    def get_block(self, number):
+        return {"number": number, "timestamp": number * 60}
+
+
+def _w3(chain):
+    return SimpleNamespace(eth=chain, to_checksum_address=Web3.to_checksum_address)
+
+
+LOGS = [
+    _trade(1100, USDC, WETH, 1000, 1010),
+    _dex_updated(1500),
+    _trade(2600, USDC, WETH, 1000, 1030, buy="sushiswap", sell="quickswap"),
+    _trade(4100, DAI, USDC, 10 ** 24, 10 ** 24 + 5 * 10 ** 18),
+]
+
+
+@pytest.mark.asyncio
+async def test_backfill_adapts_range_and_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "trades.db")
+    chain = FakeChain(LOGS[:3], head=3000)
+    store = TradeStore(path)
+    indexer = EventIndexer(_w3(chain), store, BOT, DECODER, start_block=1000, chunk_size=2000, concurrency=2)
+
+    assert await indexer.backfill(3000) == 3
+    assert store.checkpoint() == 3000
+    # O nó recusou 2000 blocos: os intervalos foram reduzidos até caber
+    assert indexer.chunk_size <= 500
+    assert all(end - start + 1 <= 500 for start, end in chain.requests)
+    assert store.db.execute("SELECT dex_index, name, enabled FROM dex_updates").fetchall() == [(1, "sushiswap", 0)]
+    store.close()
+
+    # Reinício: novo processo continua do checkpoint, sem repetir blocos
+    chain.logs, chain.block_number, chain.requests = LOGS, 5000, []
+    store = TradeStore(path)
+    indexer = EventIndexer(_w3(chain), store, BOT, DECODER, start_block=1000, chunk_size=400)
+    assert indexer.next_block() == 3001
+    await indexer.follow(poll_interval=0, max_polls=1)
+    assert min(start for start, _ in chain.requests) == 3001
+    assert store.checkpoint() == 5000 - indexer.confirmations
+    assert store.db.execute("SELECT COUNT(*) FROM trades").fetchone() == (3,)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_profit_by_pair_and_dex_over_time_range(tmp_path):
+    store = TradeStore(str(tmp_path / "trades.db"))
+    indexer = EventIndexer(_w3(FakeChain(LOGS, head=5000)), store, BOT, DECODER, start_block=1000)
+    await indexer.backfill(5000)
+
+    assert store.profit_by_pair() == [
+        PairProfit(DAI, USDC, 1, pytest.approx(5e18)),
+        PairProfit(USDC, WETH, 2, 40.0),
+    ]
+    # Blocos 1100, 2600 e 4100 caem nos dias 0, 1 e 2 (timestamps 66000, 156000 e 246000)
+    assert store.profit_by_pair(150_000, 160_000) == [PairProfit(USDC, WETH, 1, 30.0)]
+    # Dia 2 inteiro pelo agregado, mais a ponta do dia 1 pelos trades
+    assert store.profit_by_pair(100_000, 300_000) == [
+        PairProfit(DAI, USDC, 1, pytest.approx(5e18)),
+        PairProfit(USDC, WETH, 1, 30.0),
+    ]
+    by_dex = {(d.dex, d.token_in): (d.trades, d.profit) for d in store.profit_by_dex(end_time=200_000)}
+    assert by_dex == {("quickswap", USDC): (2, 40.0), ("sushiswap", USDC): (2, 40.0)}
+    # Os valores exatos (acima de 64 bits) ficam em texto
+    assert store.db.execute("SELECT amount_in FROM trades WHERE token_in = ?", (DAI,)).fetchone() == (str(10 ** 24),)
+    store.close()
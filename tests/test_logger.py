@@ -0,0 +1,172 @@
+import json
+import logging
+import queue
+import time
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from utils.logger import (DEFAULT_LOG_RATE_LIMITS, AsyncLogHandler, EventRateLimiter, LogWriter,
+                          NotificationDispatcher, OrjsonFormatter, StubSink, arb_logger, parse_rate_limits)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def profiling():
+    enabled = arb_logger.profiling
+    arb_logger.set_profiling(True)
+    yield
+    arb_logger.set_profiling(enabled)
+
+
+def test_api_latency_is_a_labeled_histogram():
+    before = _sample("api_latency_seconds_count", endpoint="test_endpoint")
+    arb_logger.log_api_latency("test_endpoint", 0.2)
+    arb_logger.log_api_latency("test_endpoint", 3.0)
+    assert _sample("api_latency_seconds_count", endpoint="test_endpoint") == before + 2
+    assert _sample("api_latency_seconds_bucket", endpoint="test_endpoint", le="0.25") >= 1
+
+
+def test_stage_timer_tracks_in_flight_and_latency(profiling):
+    before = _sample("arb_stage_latency_seconds_count", stage="test_stage")
+    with arb_logger.stage("test_stage"):
+        assert _sample("arb_in_flight", stage="test_stage") == 1
+        time.sleep(0.002)
+    assert _sample("arb_in_flight", stage="test_stage") == 0
+    assert _sample("arb_stage_latency_seconds_count", stage="test_stage") == before + 1
+    assert _sample("arb_stage_latency_seconds_sum", stage="test_stage") >= 0.002
+
+
+def test_profiling_toggle_disables_stage_metrics(profiling):
+    before = _sample("arb_stage_latency_seconds_count", stage="test_toggle")
+    arb_logger.toggle_profiling()
+    with arb_logger.stage("test_toggle"):
+        pass
+    arb_logger.observe_stage("test_toggle", 1.0)
+    assert _sample("arb_stage_latency_seconds_count", stage="test_toggle") == before
+
+    arb_logger.toggle_profiling()
+    arb_logger.observe_stage("test_toggle", 1.0)
+    assert _sample("arb_stage_latency_seconds_count", stage="test_toggle") == before + 1
+
+
+def test_detect_to_broadcast(profiling):
+    before = _sample("arb_detect_to_broadcast_seconds_count")
+    arb_logger.log_detect_to_broadcast(time.perf_counter() - 0.01)
+    assert _sample("arb_detect_to_broadcast_seconds_count") == before + 1
+
+
+def _record(event, level=logging.INFO, **extra):
+    record = logging.makeLogRecord({"msg": event, "levelno": level, "levelname": logging.getLevelName(level),
+                                    "name": "test"})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_orjson_formatter_renders_structlog_fields():
+    line = OrjsonFormatter().format(_record("opportunity_found", pair="WETH/USDC", profit_percent=1.5,
+                                            timestamp="2024-01-01T00:00:00Z", when=object()))
+    entry = json.loads(line)
+    assert entry["event"] == "opportunity_found"
+    assert entry["level"] == "info"
+    assert entry["pair"] == "WETH/USDC"
+    assert entry["profit_percent"] == 1.5
+    assert entry["timestamp"] == "2024-01-01T00:00:00Z"
+    # Valores não serializáveis viram texto em vez de derrubar a escrita
+    assert entry["when"].startswith("<object")
+
+
+def test_formatter_falls_back_to_stdlib_json():
+    """Testa que sem orjson o formatter ainda escreve uma linha JSON por registro"""
+    with patch("utils.logger.orjson_dumps", None):
+        line = OrjsonFormatter().format(_record("trade_executed", pair="WETH/USDC", when=object()))
+    entry = json.loads(line)
+    assert entry["event"] == "trade_executed"
+    assert entry["when"].startswith("<object")
+
+
+def test_rate_limiter_caps_each_event_independently():
+    now = [0.0]
+    limiter = EventRateLimiter({"cycle_found": 2}, clock=lambda: now[0])
+    assert [limiter.filter(_record("cycle_found")) for _ in range(4)] == [True, True, False, False]
+    assert all(limiter.filter(_record("trade_executed")) for _ in range(10))
+    now[0] = 0.5
+    assert limiter.filter(_record("cycle_found"))
+    assert not limiter.filter(_record("cycle_found"))
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("cycle_found=5, Erro na requisição=0.5") == {
+        "cycle_found": 5.0, "Erro na requisição": 0.5}
+    assert parse_rate_limits("") == DEFAULT_LOG_RATE_LIMITS
+
+
+def test_full_queue_drops_without_blocking():
+    handler = AsyncLogHandler(queue.Queue(maxsize=1))
+    before = _sample("log_records_dropped_total")
+    handler.handle(_record("a"))
+    start = time.perf_counter()
+    handler.handle(_record("b"))
+    assert time.perf_counter() - start < 0.1
+    assert handler.queue.qsize() == 1
+    assert _sample("log_records_dropped_total") == before + 1
+
+
+def test_writer_drains_queue_on_stop():
+    lines = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            lines.append(self.format(record))
+
+    collect = Collect()
+    collect.setFormatter(OrjsonFormatter())
+    log_queue = queue.Queue(maxsize=100)
+    writer = LogWriter(log_queue, collect)
+    handler = AsyncLogHandler(log_queue, block=True)
+    writer.start()
+    for i in range(50):
+        handler.handle(_record("quote", index=i))
+    writer.stop()
+    assert [json.loads(line)["index"] for line in lines] == list(range(50))
+
+
+@pytest.mark.asyncio
+async def test_notifications_are_coalesced_into_a_digest():
+    sink = StubSink()
+    dispatcher = NotificationDispatcher([sink], coalesce_window=0.05)
+    start = time.perf_counter()
+    for i in range(3):
+        dispatcher.submit(f"trade {i}")
+    # submit só enfileira: nenhuma espera pela rede
+    assert time.perf_counter() - start < 0.01
+    await dispatcher.close()
+    assert sink.messages == ["Resumo de 3 notificações:\n\ntrade 0\n\ntrade 1\n\ntrade 2"]
+
+
+@pytest.mark.asyncio
+async def test_notification_retries_and_isolates_sinks(tmp_path):
+    flaky, steady = StubSink(fail=2), StubSink(str(tmp_path / "notify.log"))
+    dispatcher = NotificationDispatcher([flaky, steady], coalesce_window=0, backoff=0.001)
+    dispatcher.submit("falhou", level="ERROR")
+    await dispatcher.close()
+    assert flaky.messages == steady.messages == ["[ERROR] falhou"]
+    assert (tmp_path / "notify.log").read_text() == "[ERROR] falhou\n\n"
+
+
+@pytest.mark.asyncio
+async def test_notification_gives_up_after_retries_and_drops_when_full():
+    sink = StubSink(fail=10)
+    dispatcher = NotificationDispatcher([sink], maxsize=1, coalesce_window=0, retries=1, backoff=0.001)
+    failed = _sample("notifications_failed_total", sink="stub")
+    dropped = _sample("notifications_dropped_total")
+    dispatcher.submit("a")
+    dispatcher.submit("b")
+    await dispatcher.close()
+    assert sink.messages == []
+    assert _sample("notifications_failed_total", sink="stub") == failed + 1
+    assert _sample("notifications_dropped_total") == dropped + 1
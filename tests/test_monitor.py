@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 import json
 import os
 from datetime import datetime
@@ -54,55 +54,71 @@ def env_setup():
     os.environ.pop('MIN_PROFIT_THRESHOLD', None)
 
 @pytest.mark.asyncio
-async def test_get_prices_success():
+async def test_get_prices_success(paraswap_stub):
     """Testa obtenção de preços com sucesso"""
+    from aiohttp import web
     from monitor import get_prices
-    
-    with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = MOCK_PRICE_RESPONSE
-        mock_get.return_value.status_code = 200
-        
-        result = get_prices(
+    from utils.paraswap import ParaswapClient
+
+    paraswap_stub.handler = lambda request: web.json_response(MOCK_PRICE_RESPONSE)
+    client = ParaswapClient(paraswap_stub.url)
+    with patch('monitor.paraswap_client', client):
+        result = await get_prices(
             "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
             "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
         )
-        
-        assert result == MOCK_PRICE_RESPONSE
-        assert 'priceRoute' in result
-        assert result['priceRoute']['srcToken'] == "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+    await client.close()
+
+    assert result == MOCK_PRICE_RESPONSE
+    assert 'priceRoute' in result
+    assert result['priceRoute']['srcToken'] == "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
 
 @pytest.mark.asyncio
-async def test_get_prices_rate_limit():
+async def test_get_prices_rate_limit(paraswap_stub):
     """Testa retry em caso de rate limit"""
+    from aiohttp import web
     from monitor import get_prices
-    
-    with patch('requests.get') as mock_get:
-        mock_get.return_value.status_code = 429
-        mock_get.return_value.headers = {'Retry-After': '1'}
-        
-        result = get_prices(
+    from utils.paraswap import ParaswapClient
+    from utils.rate_limiter import RateLimiter
+
+    paraswap_stub.handler = lambda request: web.Response(status=429, headers={'Retry-After': '0'})
+    client = ParaswapClient(paraswap_stub.url, limiter=RateLimiter(rate=1000, burst=10))
+    with patch('monitor.paraswap_client', client):
+        result = await get_prices(
             "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
             "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
         )
-        
-        assert result is None
-        assert mock_get.call_count > 1  # Verifica se houve retry
+    await client.close()
+
+    assert result is None
+    assert len(paraswap_stub.requests) > 1  # Verifica se houve retry
 
 def test_detect_arbitrage_profitable():
     """Testa detecção de oportunidade lucrativa"""
     from monitor import detect_arbitrage
-    
-    result = detect_arbitrage(MOCK_PRICE_RESPONSE)
-    
+
+    data = {
+        "priceRoute": {
+            **MOCK_PRICE_RESPONSE['priceRoute'],
+            "destUSD": "1010.0",
+            "gasCostUSD": "0.5"
+        }
+    }
+
+    with patch('monitor.MIN_PROFIT_THRESHOLD', 0.1):
+        result = detect_arbitrage(data)
+
     assert result is not None
     assert result['tokenIn'] == "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
     assert result['tokenOut'] == "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
-    assert result['priceDifferencePercent'] == pytest.approx(0.2, 0.1)
+    assert result['priceDifferencePercent'] == pytest.approx(1.0)
+    assert result['profitAfterCosts'] == pytest.approx(0.5)
+    assert result.buy_exchange == "QuickSwap"
 
 def test_detect_arbitrage_no_opportunity():
     """Testa quando não há oportunidade"""
     from monitor import detect_arbitrage
-    
+
     data = {
         "priceRoute": {
             **MOCK_PRICE_RESPONSE['priceRoute'],
@@ -110,57 +126,197 @@ def test_detect_arbitrage_no_opportunity():
             "destUSD": "999.0"  # Preço menor = sem oportunidade
         }
     }
-    
-    result = detect_arbitrage(data)
-    
-    assert result is not None
-    assert result['priceDifferencePercent'] < 0
+
+    with patch('monitor.MIN_PROFIT_THRESHOLD', 0.1):
+        assert detect_arbitrage(data) is None
+        # Spread positivo, mas consumido pelo gas
+        assert detect_arbitrage(MOCK_PRICE_RESPONSE) is None
+
+def _send_stubs(mock_web3):
+    """Estado de envio do monitor sem RPC: nonce, taxas, rotas em voo e recibos locais"""
+    from utils.tx_manager import InFlightRegistry
+
+    mock_web3.eth.send_raw_transaction.return_value = b"\xcd" * 32
+    nonce_manager = Mock()
+    nonce_manager.next_nonce.return_value = 7
+    fee_oracle = Mock()
+    fee_oracle.fees.return_value = {'gasPrice': 30 * 10 ** 9}
+    return {
+        'monitor.w3': mock_web3,
+        'monitor.account': Mock(address="0x00000000000000000000000000000000000000aa"),
+        'monitor.nonce_manager': nonce_manager,
+        'monitor.fee_oracle': fee_oracle,
+        'monitor.inflight': InFlightRegistry(),
+        'monitor.receipt_watcher': Mock(),
+    }
 
 @pytest.mark.asyncio
 async def test_trigger_arbitrage(mock_web3, mock_contract, env_setup):
     """Testa execução de arbitragem"""
+    from contextlib import ExitStack
     from monitor import trigger_arbitrage
-    
-    # Setup dos mocks
-    buy_dex = "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff"  # QuickSwap
-    sell_dex = "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506"  # SushiSwap
+    from utils.simulator import encode_execute_arbitrage
+
+    pair = {
+        'tokenIn': "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
+        'tokenOut': "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+    }
     amount = 1000000000  # 1000 USDC
-    
-    result = trigger_arbitrage({
+    stubs = _send_stubs(mock_web3)
+
+    with ExitStack() as stack:
+        for target, stub in stubs.items():
+            stack.enter_context(patch(target, stub))
+        result = trigger_arbitrage(pair, 0, 1, amount)
+        # Mesma rota ainda pendente: não reenvia
+        assert trigger_arbitrage(pair, 0, 1, amount) is None
+
+    assert result == b"\xcd" * 32
+    txn = mock_web3.eth.account.sign_transaction.call_args[0][0]
+    assert txn['nonce'] == 7
+    assert txn['gasPrice'] == 30 * 10 ** 9
+    assert txn['data'] == encode_execute_arbitrage(pair['tokenIn'], pair['tokenOut'], amount, 0, 1)
+    mock_web3.eth.send_raw_transaction.assert_called_once()
+    track = stubs['monitor.receipt_watcher'].track
+    track.assert_called_once()
+    assert track.call_args.kwargs['nonce'] == 7
+    assert track.call_args.kwargs['opportunity'] is pair
+
+@pytest.mark.asyncio
+async def test_trigger_arbitrage_send_failure_releases_route_and_nonce(mock_web3, env_setup):
+    """Testa que uma falha no envio libera a rota e ressincroniza o nonce"""
+    from contextlib import ExitStack
+    from monitor import trigger_arbitrage
+
+    pair = {
         'tokenIn': "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
         'tokenOut': "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
-    }, buy_dex, sell_dex, amount)
-    
-    # Por enquanto retorna string pois função não está implementada
-    assert isinstance(result, str)
-    assert "não implementada" in result
+    }
+    stubs = _send_stubs(mock_web3)
+    mock_web3.eth.send_raw_transaction.side_effect = ValueError("nonce too low")
+
+    with ExitStack() as stack:
+        for target, stub in stubs.items():
+            stack.enter_context(patch(target, stub))
+        assert trigger_arbitrage(pair, 0, 1, 1000) is None
+
+    stubs['monitor.nonce_manager'].resync.assert_called_once()
+    assert stubs['monitor.inflight'].acquire((pair['tokenIn'].lower(), pair['tokenOut'].lower(), 0, 1))
+    stubs['monitor.receipt_watcher'].track.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_handle_receipt_logs_profit_in_usd():
+    """Testa que o total de lucro recebe USD, não o percentual da oportunidade"""
+    from types import SimpleNamespace
+    from monitor import handle_receipt
+
+    pending = SimpleNamespace(tx_hash="0x1", context={
+        'opportunity': {
+            'tokenIn': "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
+            'tokenOut': "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619",
+            'profitAfterCosts': 0.8,
+            'profitUSD': 4.25
+        },
+        'route': ("a", "b", 0, 1),
+        'nonce': 7
+    })
+    with patch('monitor.nonce_manager'), \
+         patch('monitor.arb_logger.notify'), \
+         patch('monitor.arb_logger.log_trade') as log_trade:
+        await handle_receipt(pending, SimpleNamespace(status=1, gasUsed=210000))
+
+    log_trade.assert_called_once()
+    assert log_trade.call_args.args[1] == 4.25
+    assert log_trade.call_args.kwargs['profit_percent'] == 0.8
 
 @pytest.mark.asyncio
 async def test_main_loop(mock_web3, mock_contract, env_setup):
     """Testa loop principal com mock de todas as dependências"""
     from monitor import main
     
-    with patch('monitor.get_prices') as mock_get_prices, \
+    mock_web3.eth.filter.side_effect = ValueError("filtros não suportados")
+    mock_web3.eth.get_block.return_value = {"number": 100, "timestamp": 1700000000}
+    
+    with patch('monitor.w3', mock_web3), \
+         patch('monitor.get_prices', new_callable=AsyncMock) as mock_get_prices, \
          patch('monitor.detect_arbitrage') as mock_detect, \
          patch('monitor.trigger_arbitrage') as mock_trigger, \
-         patch('time.sleep'):  # Evita delays nos testes
+         patch('monitor.arb_logger.start_metrics_server'):
         
         # Setup dos mocks
         mock_get_prices.return_value = MOCK_PRICE_RESPONSE
-        mock_detect.return_value = {
-            'tokenIn': "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
-            'tokenOut': "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619",
-            'priceDifferencePercent': 0.2
-        }
-        mock_trigger.return_value = "Arbitragem não implementada"
+        mock_detect.return_value = None
         
-        # Executa main por algumas iterações
-        try:
-            with patch('builtins.__import__', side_effect=KeyboardInterrupt):
-                main()
-        except KeyboardInterrupt:
-            pass
+        # Executa main por um bloco
+        await main(max_blocks=1)
         
         # Verifica se as funções principais foram chamadas
         mock_get_prices.assert_called()
-        mock_detect.assert_called()
\ No newline at end of file
+        mock_detect.assert_called()
+        mock_trigger.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_fetch_pair_quotes_concurrent():
+    """Testa que as cotações SELL e BUY do par são buscadas juntas"""
+    import asyncio
+    from monitor import fetch_pair_quotes
+
+    started = []
+
+    async def fake_get_prices(src, dest, side="SELL", route=None, other_exchange_prices=False):
+        started.append(side)
+        await asyncio.sleep(0.01)
+        assert len(started) == 2  # As duas cotações já estão em voo
+        return MOCK_PRICE_RESPONSE if side == "BUY" else None
+
+    with patch('monitor.get_prices', side_effect=fake_get_prices):
+        data = await fetch_pair_quotes({
+            "srcToken": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
+            "destToken": "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+        })
+
+    assert data == MOCK_PRICE_RESPONSE
+    assert sorted(started) == ["BUY", "SELL"]
+
+@pytest.mark.asyncio
+async def test_scan_paraswap_simulates_block_before_sending():
+    """Trades dimensionados do bloco vão num único lote de simulação; só os vencedores são enviados"""
+    import monitor
+    from utils.quotes import Quote
+    from utils.simulator import SimulationResult
+    from utils.trade_sizer import SizedTrade
+
+    usdc, weth = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174", "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+    routes = {0: ("QuickSwap", "SushiSwap"), 1: ("QuickSwap", "QuickSwap"), 2: ("SushiSwap", "QuickSwap")}
+    pairs = [{"srcToken": usdc, "destToken": weth, "index": i} for i in routes]
+
+    def quote(index):
+        buy, sell = routes[index]
+        return Quote(usdc, weth, 10 ** 9, 5 * 10 ** 17, 1000.0, 1010.0, 0.01, buy, sell)
+
+    async def fake_fetch(pair):
+        return quote(pair["index"])
+
+    sized = [SizedTrade(10 ** 9 * (i + 1), 0, 1.0, quote(i), 10 ** 9) for i in routes]
+    simulated = []
+
+    async def fake_simulate(candidates, block):
+        simulated.append((list(candidates), block))
+        # Só o primeiro candidato não reverteria
+        return [SimulationResult(candidates[0], b"calldata", 0, 1, 0.0, None)], []
+
+    with patch.object(monitor, "PAIRS", pairs), patch.object(monitor, "pair_scheduler", None), \
+         patch('monitor.fetch_pair_quotes', side_effect=fake_fetch), \
+         patch.object(monitor.trade_sizer, "size", new=AsyncMock(side_effect=sized)), \
+         patch.object(monitor, "trade_simulator", Mock(simulate_async=fake_simulate)), \
+         patch('monitor.trigger_arbitrage') as mock_trigger:
+        await monitor.scan_paraswap(42)
+
+    # A rota QuickSwap -> QuickSwap nunca chega à simulação
+    (candidates, block), = simulated
+    assert block == 42
+    assert [(c.buy_dex, c.sell_dex, c.amount) for c in candidates] == [(0, 1, 10 ** 9), (1, 0, 3 * 10 ** 9)]
+    mock_trigger.assert_called_once()
+    args, kwargs = mock_trigger.call_args
+    assert args[1:] == (0, 1, 10 ** 9)
+    assert kwargs["data"] == b"calldata"
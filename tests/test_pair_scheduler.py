@@ -0,0 +1,44 @@
+import numpy as np
+
+from utils.pair_scheduler import PairScheduler
+
+
+def test_unknown_pairs_share_the_budget():
+    scheduler = PairScheduler(4, budget=2, threshold=0.1)
+    polled = [scheduler.due() for _ in range(4)]
+    assert all(len(due) == 2 for due in polled)
+    counts = np.bincount(np.concatenate(polled), minlength=4)
+    assert counts.tolist() == [2, 2, 2, 2]
+
+
+def test_budget_goes_to_volatile_pairs_and_cold_ones_decay_to_floor():
+    rng = np.random.default_rng(7)
+    scheduler = PairScheduler(4, budget=2, threshold=0.1, history=32, floor_rate=0.05)
+    counts = np.zeros(4, dtype=int)
+    for block in range(400):
+        for pair_index in scheduler.due():
+            counts[pair_index] += 1
+            if pair_index < 2:
+                # Voláteis: spread passa do limiar com frequência
+                scheduler.observe(pair_index, rng.normal(0.0, 0.5))
+            else:
+                # Stablecoins: spread negativo e quase parado
+                scheduler.observe(pair_index, rng.normal(-0.3, 0.001))
+
+    assert counts.sum() <= 2 * 400
+    # Os frios ficam perto do piso (0,05 * 400 = 20), o resto do orçamento vai para os voláteis
+    assert counts[2] < 50 and counts[3] < 50
+    assert counts[0] > 300 and counts[1] > 300
+    rates = scheduler.rates()
+    assert rates[2] == rates[3] < 0.06
+
+
+def test_ring_buffer_forgets_old_spreads():
+    scheduler = PairScheduler(1, budget=1, threshold=0.1, history=8, min_samples=8)
+    for _ in range(8):
+        scheduler.observe(0, 1.0)
+    assert scheduler.scores()[0] > 0.8
+    for _ in range(8):
+        scheduler.observe(0, -1.0)
+    assert scheduler.samples[0] == 16
+    assert scheduler.scores()[0] < 0.2
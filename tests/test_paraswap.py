@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from utils.paraswap import ParaswapClient
+from utils.rate_limiter import RateLimiter
+
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+WETH = "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+
+
+@pytest.mark.asyncio
+async def test_get_prices_sends_params(paraswap_stub):
+    """Testa montagem dos parâmetros e retorno do JSON"""
+    paraswap_stub.handler = lambda request: web.json_response({"priceRoute": {"srcToken": USDC}})
+    client = ParaswapClient(paraswap_stub.url)
+    try:
+        result = await client.get_prices(USDC, WETH, side="BUY", route=[USDC, WETH],
+                                          other_exchange_prices=True)
+    finally:
+        await client.close()
+
+    assert result == {"priceRoute": {"srcToken": USDC}}
+    query = paraswap_stub.requests[0]
+    assert query["side"] == "BUY"
+    assert query["route"] == f"{USDC}-{WETH}"
+    assert query["otherExchangePrices"] == "true"
+    assert query["network"] == "137"
+
+
+@pytest.mark.asyncio
+async def test_quotes_run_concurrently(paraswap_stub):
+    """Testa que as cotações são disparadas em paralelo e respeitam o limite"""
+    in_flight = {"now": 0, "max": 0}
+
+    async def slow(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.2)
+        in_flight["now"] -= 1
+        return web.json_response({"priceRoute": {}})
+
+    paraswap_stub.handler = slow
+    client = ParaswapClient(paraswap_stub.url, concurrency=4,
+                            limiter=RateLimiter(rate=1000, burst=10))
+    try:
+        start = time.monotonic()
+        results = await asyncio.gather(*(client.get_prices(USDC, WETH) for _ in range(8)))
+        elapsed = time.monotonic() - start
+    finally:
+        await client.close()
+
+    assert all(r == {"priceRoute": {}} for r in results)
+    assert in_flight["max"] == 4
+    assert elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_get_prices_retries_on_rate_limit(paraswap_stub):
+    """Testa retry em caso de rate limit"""
+    paraswap_stub.handler = lambda request: web.Response(status=429, headers={"Retry-After": "0"})
+    client = ParaswapClient(paraswap_stub.url, limiter=RateLimiter(rate=1000, burst=10))
+    try:
+        result = await client.get_prices(USDC, WETH)
+    finally:
+        await client.close()
+
+    assert result is None
+    assert len(paraswap_stub.requests) > 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_pauses_endpoint(paraswap_stub):
+    """Testa que o Retry-After pausa o endpoint antes do novo envio"""
+    calls = []
+
+    def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0.3"})
+        return web.json_response({"priceRoute": {}})
+
+    paraswap_stub.handler = handler
+    limiter = RateLimiter(rate=1000, burst=10)
+    client = ParaswapClient(paraswap_stub.url, limiter=limiter)
+    try:
+        result = await client.get_prices(USDC, WETH)
+    finally:
+        await client.close()
+
+    assert result == {"priceRoute": {}}
+    assert calls[1] - calls[0] >= 0.3
+    assert limiter.metrics()["paraswap_prices"]["throttled_seconds_total"] == pytest.approx(0.3)
+
+
+@pytest.mark.asyncio
+async def test_get_prices_client_error(paraswap_stub):
+    """Testa que erros 4xx não geram retry"""
+    paraswap_stub.handler = lambda request: web.Response(status=400)
+    client = ParaswapClient(paraswap_stub.url)
+    try:
+        result = await client.get_prices(USDC, WETH)
+    finally:
+        await client.close()
+
+    assert result is None
+    assert len(paraswap_stub.requests) == 1
@@ -0,0 +1,102 @@
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from utils.price_board import PriceBoard
+from utils.reserves import Reserves
+from utils.shard_pool import ShardPool, shard_indexes
+from utils.spread_engine import SpreadEngine
+
+DEXES = ["quickswap", "sushiswap"]
+
+
+class FakeShardState:
+    """Estado de shard sem rede: o par i tem reserva 10*i + bloco na quickswap; pares ímpares só mudam em blocos pares"""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.reserves = {}
+
+    def poll(self, block_number):
+        changed = set()
+        for local, pair in enumerate(self.pairs):
+            index = int(pair["srcToken"])
+            if index % 2 and block_number % 2:
+                continue
+            self.reserves[(local, "quickswap")] = Reserves(10 * index + block_number, 2 * (10 * index + block_number), 0)
+            changed.add(local)
+        return changed
+
+
+def fake_state_factory(pairs):
+    return FakeShardState(pairs)
+
+
+def _write_from_child(name):
+    board = PriceBoard.attach(name)
+    board.write(2, 7, np.array([[1.0, 2.0], [3.0, 4.0]]))
+    board.mark_done(0, 7)
+    board.close()
+
+
+@pytest.fixture
+def board():
+    board = PriceBoard.create(n_pairs=4, n_dexes=2, n_workers=1)
+    yield board
+    board.close()
+
+
+def test_board_write_read_and_changed(board):
+    seen = board.seq.copy()
+    board.write(1, 100, np.array([[2.0 ** 100, 5.0], [0.0, 0.0]]))
+    assert board.changed(seen).tolist() == [1]
+    reserves, blocks, seqs = board.read([1, 3])
+    assert reserves[0, 0].tolist() == [2.0 ** 100, 5.0]
+    assert blocks.tolist() == [100, -1]
+    assert seqs.tolist() == [2, 0]
+
+
+def test_torn_row_is_not_marked_as_seen(board):
+    board.seq[0] = 1  # Escrita em andamento
+    _, _, seqs = board.read([0], retries=2)
+    assert seqs[0] % 2 == 1
+
+
+def test_board_is_shared_across_processes(board):
+    process = mp.get_context("spawn").Process(target=_write_from_child, args=(board.name,))
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+    assert board.done_block.tolist() == [7]
+    reserves, blocks, _ = board.read([2])
+    assert reserves[0].tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    assert blocks.tolist() == [7]
+
+
+def test_shard_indexes_cover_every_pair_once():
+    shards = shard_indexes(7, 3)
+    assert shards == [[0, 3, 6], [1, 4], [2, 5]]
+
+
+@pytest.mark.asyncio
+async def test_shard_pool_publishes_changed_pairs():
+    pairs = [{"srcToken": str(i), "destToken": str(i + 100)} for i in range(5)]
+    pool = ShardPool(pairs, DEXES, fake_state_factory, workers=2, timeout=30).start()
+    try:
+        changed = await pool.advance(10)
+        assert changed.tolist() == [0, 1, 2, 3, 4]
+        reserves = pool.read(changed)
+        assert reserves[:, 0, 0].tolist() == [10.0, 20.0, 30.0, 40.0, 50.0]
+        assert reserves[:, 1].tolist() == [[0.0, 0.0]] * 5
+
+        # Bloco ímpar: só os pares pares mudam, e só eles voltam para a decisão
+        changed = await pool.advance(11)
+        assert changed.tolist() == [0, 2, 4]
+        reserves = pool.read(changed)
+        assert reserves[:, 0, 0].tolist() == [11.0, 31.0, 51.0]
+
+        # O quadro entra direto no SpreadEngine
+        assert SpreadEngine(DEXES).scan(reserves, pair_indexes=changed.tolist()) == []
+    finally:
+        pool.close()
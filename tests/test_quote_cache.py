@@ -0,0 +1,74 @@
+import pytest
+from aiohttp import web
+
+from utils.paraswap import ParaswapClient
+from utils.quote_cache import QuoteCache
+from utils.rate_limiter import RateLimiter
+
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+WETH = "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+
+
+def test_hit_and_miss_counters():
+    cache = QuoteCache()
+    key = QuoteCache.make_key(USDC, WETH, "SELL", None, 100)
+    assert cache.get(key) is None
+    cache.set(key, {"priceRoute": {}})
+    assert cache.get(key) == {"priceRoute": {}}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_normalizes_addresses():
+    assert QuoteCache.make_key(USDC, WETH, "BUY", [USDC, WETH], 1) == \
+        QuoteCache.make_key(USDC.lower(), WETH.lower(), "BUY", [USDC.lower(), WETH.lower()], "1")
+
+
+def test_new_block_invalidates():
+    cache = QuoteCache()
+    cache.advance_block(100)
+    cache.set("k", 1)
+    assert cache.advance_block(100) is False
+    assert cache.get("k") == 1
+    assert cache.advance_block(101) is True
+    assert cache.get("k") is None
+
+
+def test_ttl_expiry():
+    now = [0.0]
+    cache = QuoteCache(ttl=2.0, clock=lambda: now[0])
+    cache.set("k", 1)
+    now[0] = 1.5
+    assert cache.get("k") == 1
+    now[0] = 3.6
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = QuoteCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" passa a ser o menos usado
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_client_skips_http_on_hit(paraswap_stub):
+    """Testa que cotações repetidas no mesmo bloco não geram nova requisição"""
+    paraswap_stub.handler = lambda request: web.json_response({"priceRoute": {"srcToken": USDC}})
+    cache = QuoteCache()
+    cache.advance_block(1)
+    client = ParaswapClient(paraswap_stub.url, limiter=RateLimiter(rate=1000, burst=10), cache=cache)
+    try:
+        first = await client.get_prices(USDC, WETH)
+        second = await client.get_prices(USDC, WETH)
+        cache.advance_block(2)
+        third = await client.get_prices(USDC, WETH)
+    finally:
+        await client.close()
+
+    assert first == second == third
+    assert len(paraswap_stub.requests) == 2
@@ -0,0 +1,78 @@
+import json
+import sys
+
+import pytest
+from aiohttp import web
+
+from utils.paraswap import ParaswapClient
+from utils.quote_cache import QuoteCache
+from utils.quotes import Opportunity, Quote, as_quote, decode_quote
+
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+WETH = "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+
+RESPONSE = {"priceRoute": {
+    "srcToken": USDC, "destToken": WETH, "srcAmount": "1000000000", "destAmount": "500000000000000000",
+    "srcUSD": "1000.00", "destUSD": "1002.50", "gasCostUSD": "0.5", "blockNumber": 1,
+    "bestRoute": [{"percent": 100, "swaps": [
+        {"swapExchanges": [{"exchange": "QuickSwap", "data": {"path": [USDC, WETH]}}]},
+        {"swapExchanges": [{"exchange": "SushiSwap"}]},
+    ]}],
+    "others": [{"exchange": "Curve", "destAmount": "1"}] * 10,
+}}
+
+
+def test_decode_quote_keeps_only_used_fields():
+    quote = decode_quote(json.dumps(RESPONSE).encode())
+    assert quote == Quote(USDC, WETH, 10 ** 9, 5 * 10 ** 17, 1000.0, 1002.5, 0.5, "QuickSwap", "SushiSwap")
+    assert not hasattr(quote, "__dict__")
+    assert decode_quote(b'{"priceRoute": {}}') is None
+    assert decode_quote(b'{"error": "No routes found"}') is None
+
+
+def test_decode_quote_without_orjson(monkeypatch):
+    import importlib.util
+    import utils.quotes
+
+    # Sem orjson instalado, o módulo cai no json da stdlib
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    spec = importlib.util.spec_from_file_location("quotes_stdlib", utils.quotes.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.json_loads is json.loads
+    quote = module.decode_quote(json.dumps(RESPONSE).encode())
+    assert (quote.src_amount, quote.buy_exchange, quote.sell_exchange) == (10 ** 9, "QuickSwap", "SushiSwap")
+
+
+def test_as_quote_and_minimal_response_roundtrip():
+    quote = as_quote(RESPONSE)
+    assert as_quote(quote) is quote
+    assert as_quote(None) is None
+    # A resposta reconstruída (gravação) decodifica no mesmo Quote
+    assert as_quote(quote.to_response()) == quote
+    assert as_quote({"priceRoute": {**RESPONSE["priceRoute"], "bestRoute": []}}).buy_exchange is None
+
+
+def test_opportunity_keeps_dict_access():
+    opportunity = Opportunity(USDC, WETH, 0.5, 10 ** 9, 5 * 10 ** 17, 0.25, -0.25, "QuickSwap", "SushiSwap")
+    assert opportunity["tokenIn"] == USDC
+    assert opportunity["profitAfterCosts"] == -0.25
+    assert opportunity.get("profitUSD") is None
+    assert "tokenOut" in opportunity
+    with pytest.raises(KeyError):
+        opportunity["bestRoute"]
+
+
+@pytest.mark.asyncio
+async def test_client_with_decode_quote_caches_records(paraswap_stub):
+    paraswap_stub.handler = lambda request: web.json_response(RESPONSE)
+    client = ParaswapClient(paraswap_stub.url, cache=QuoteCache(), decode=decode_quote)
+    try:
+        first = await client.get_prices(USDC, WETH)
+        second = await client.get_prices(USDC, WETH)
+    finally:
+        await client.close()
+
+    assert isinstance(first, Quote) and first.sell_exchange == "SushiSwap"
+    assert second is first
+    assert len(paraswap_stub.requests) == 1
@@ -0,0 +1,81 @@
+import asyncio
+from email.utils import formatdate
+
+import pytest
+
+from utils.rate_limiter import RateLimiter, TokenBucket, retry_after_seconds
+
+
+def test_bucket_spreads_requests_after_burst():
+    """Testa que, esgotado o burst, as reservas saem espaçadas de 1/rate"""
+    bucket = TokenBucket(rate=5, burst=2)
+    waits = [bucket.reserve(100.0) for _ in range(4)]
+    assert waits == pytest.approx([0.0, 0.0, 0.2, 0.4])
+    assert bucket.tokens(100.0) == 0
+
+
+def test_bucket_refills_over_time():
+    bucket = TokenBucket(rate=10, burst=3)
+    for _ in range(3):
+        bucket.reserve(0.0)
+    assert bucket.tokens(0.0) == pytest.approx(0.0)
+    assert bucket.tokens(0.2) == pytest.approx(2.0)
+    assert bucket.tokens(5.0) == 3
+
+
+def test_throttle_only_affects_endpoint():
+    """Testa que um 429 pausa apenas o endpoint afetado"""
+    now = [0.0]
+    limiter = RateLimiter(rate=10, burst=1, clock=lambda: now[0])
+    limiter.throttle("prices", 2.0)
+
+    assert limiter.bucket("prices").reserve(now[0]) == pytest.approx(2.0)
+    assert limiter.bucket("transactions").reserve(now[0]) == 0
+    metrics = limiter.metrics()
+    assert metrics["prices"]["throttled_for"] == pytest.approx(2.0)
+    assert metrics["prices"]["throttled_seconds_total"] == pytest.approx(2.0)
+
+    # Pausas sobrepostas contam só o tempo adicional
+    limiter.throttle("prices", 3.0)
+    assert limiter.metrics()["prices"]["throttled_seconds_total"] == pytest.approx(3.0)
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_without_blocking_loop():
+    limiter = RateLimiter(rate=20, burst=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(ticker(), *(limiter.acquire("prices") for _ in range(3)))
+    assert loop.time() - start >= 0.1
+    assert len(ticks) == 5
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_return_their_slots():
+    """Testa que scans cancelados não deixam reservas acumuladas para o próximo bloco"""
+    limiter = RateLimiter(rate=10, burst=1)
+    for _ in range(3):
+        waiters = [asyncio.ensure_future(limiter.acquire("prices")) for _ in range(5)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    # Sem a devolução seriam 12 reservas pendentes (~1.2s); resta só o intervalo da última usada
+    assert limiter.bucket("prices").reserve(limiter.clock()) <= 0.1 + 1e-6
+
+
+def test_retry_after_seconds_formats():
+    assert retry_after_seconds({"Retry-After": "7"}) == 7
+    assert retry_after_seconds({"X-RateLimit-Reset": "1060"}, now=1000) == 1060
+    assert retry_after_seconds({"X-RateLimit-Reset": "1700000060"}, now=1700000000) == pytest.approx(60)
+    assert retry_after_seconds({"Retry-After": formatdate(1030, usegmt=True)}, now=1000) == pytest.approx(30)
+    assert retry_after_seconds({"Retry-After": "2", "X-RateLimit-Reset": "5"}) == 5
+    assert retry_after_seconds({}) is None
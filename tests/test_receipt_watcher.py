@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils.receipt_watcher import ReceiptWatcher, format_receipt
+
+HASH_A = "0x" + "aa" * 32
+HASH_B = "0x" + "bb" * 32
+
+
+class BatchProvider:
+    def __init__(self):
+        self.receipts = {}
+        self.batches = []
+
+    def make_batch_request(self, requests):
+        self.batches.append(requests)
+        return [{"jsonrpc": "2.0", "id": i, "result": self.receipts.get(params[0])}
+                for i, (method, params) in enumerate(requests)]
+
+
+def _raw_receipt(tx_hash, status=1):
+    return {
+        "transactionHash": tx_hash,
+        "blockNumber": "0x10",
+        "gasUsed": "0x249f0",
+        "status": hex(status),
+        "logs": [{"address": "0x0000000000000000000000000000000000000001", "topics": ["0x" + "11" * 32],
+                  "data": "0x", "logIndex": "0x0", "blockNumber": "0x10"}],
+    }
+
+
+def test_format_receipt():
+    receipt = format_receipt(_raw_receipt(HASH_A))
+    assert receipt.status == 1
+    assert receipt.gasUsed == 150000
+    assert receipt.blockNumber == 16
+    assert receipt.logs[0].logIndex == 0
+    assert bytes(receipt.logs[0].topics[0]) == b"\x11" * 32
+
+
+@pytest.mark.asyncio
+async def test_polls_all_pending_in_one_batch():
+    provider = BatchProvider()
+    confirmed = []
+
+    async def on_receipt(pending, receipt):
+        confirmed.append((pending.tx_hash, pending.context["nonce"], receipt.status))
+
+    watcher = ReceiptWatcher(SimpleNamespace(provider=provider), on_receipt)
+    watcher.track(HASH_A, nonce=1)
+    watcher.track(bytes.fromhex(HASH_B[2:]), nonce=2)
+
+    await watcher.on_block(100)
+    assert confirmed == []
+    assert len(provider.batches) == 1 and len(provider.batches[0]) == 2
+
+    provider.receipts[HASH_B] = _raw_receipt(HASH_B, status=0)
+    await watcher.on_block(101)
+    assert confirmed == [(HASH_B, 2, 0)]
+    assert list(watcher.pending) == [HASH_A]
+    assert len(provider.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_falls_back_without_batch_support():
+    calls = []
+
+    def make_request(method, params):
+        calls.append(method)
+        return {"result": _raw_receipt(params[0])}
+
+    provider = SimpleNamespace(make_request=make_request)
+    confirmed = []
+
+    async def on_receipt(pending, receipt):
+        confirmed.append(pending.tx_hash)
+
+    watcher = ReceiptWatcher(SimpleNamespace(provider=provider), on_receipt)
+    watcher.track(HASH_A)
+    await watcher.poll()
+    assert confirmed == [HASH_A]
+    assert calls == ["eth_getTransactionReceipt"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_after_blocks():
+    timed_out = []
+
+    async def on_timeout(pending):
+        timed_out.append(pending.tx_hash)
+
+    async def on_receipt(pending, receipt):
+        pass
+
+    watcher = ReceiptWatcher(SimpleNamespace(provider=BatchProvider()), on_receipt,
+                             on_timeout=on_timeout, timeout_blocks=2)
+    watcher.block_number = 10
+    watcher.track(HASH_A)
+    await watcher.on_block(12)
+    assert timed_out == []
+    await watcher.on_block(13)
+    assert timed_out == [HASH_A]
+    assert watcher.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_tx_tracked_before_first_block_still_times_out():
+    """Testa que envios anteriores ao primeiro bloco visto também expiram (e liberam a rota)"""
+    timed_out = []
+
+    async def on_timeout(pending):
+        timed_out.append(pending.tx_hash)
+
+    async def on_receipt(pending, receipt):
+        pass
+
+    watcher = ReceiptWatcher(SimpleNamespace(provider=BatchProvider()), on_receipt,
+                             on_timeout=on_timeout, timeout_blocks=2)
+    watcher.track(HASH_A)
+    assert watcher.pending[HASH_A].sent_block is None
+    await watcher.on_block(100)
+    assert watcher.pending[HASH_A].sent_block == 100
+    await watcher.on_block(102)
+    assert timed_out == []
+    await watcher.on_block(103)
+    assert timed_out == [HASH_A]
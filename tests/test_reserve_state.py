@@ -0,0 +1,110 @@
+from eth_abi import encode
+
+from utils.reserve_state import SYNC_TOPIC, ReserveState
+from utils.reserves import ReserveReader
+from utils.spread_engine import SpreadEngine
+
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+WETH = "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+USDT = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+POOLS = {
+    (0, "quickswap"): "0x853Ee4b2A13f8a742d64C8F088bE7bA2131f670d",
+    (0, "sushiswap"): "0x34965ba0ac2451A34a0471F04CCa3F990b8dea27",
+    (1, "quickswap"): "0x2cF7252e74036d1Da831d11089D326296e64a728",
+    (1, "sushiswap"): "0x4B1F1e2435A9C96f7330FAea190Ef6A7C8D70001",
+}
+
+
+def _sync_log(address, block, index, reserve0, reserve1):
+    return {
+        "address": address,
+        "topics": [SYNC_TOPIC],
+        "data": encode(["uint112", "uint112"], [reserve0, reserve1]),
+        "blockNumber": block,
+        "logIndex": index,
+    }
+
+
+def _build_state(fake_chain):
+    # Pares 0 = USDC/WETH (WETH é token0), 1 = USDC/USDT (USDC é token0)
+    fake_chain.add_pool(POOLS[(0, "quickswap")], WETH, USDC, 500, 1_000_000)
+    fake_chain.add_pool(POOLS[(0, "sushiswap")], WETH, USDC, 500, 1_000_000)
+    fake_chain.add_pool(POOLS[(1, "quickswap")], USDC, USDT, 1_000_000, 1_000_000)
+    fake_chain.add_pool(POOLS[(1, "sushiswap")], USDC, USDT, 1_000_000, 1_000_000)
+    fake_chain.logs = []
+    fake_chain.eth.get_logs = lambda params: [
+        log for log in fake_chain.logs if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]
+    ]
+    fake_chain.eth.block_number = 10
+    fake_chain.block_number = 10
+    reader = ReserveReader(fake_chain, [{"srcToken": USDC, "destToken": WETH},
+                                        {"srcToken": USDC, "destToken": USDT}],
+                           [("quickswap", "0x0"), ("sushiswap", "0x0")], pair_addresses=POOLS)
+    return ReserveState(reader)
+
+
+def test_bootstrap_marks_everything_dirty(fake_chain):
+    state = _build_state(fake_chain)
+    assert state.poll() == {0, 1}
+    assert state.block_number == 10
+    assert state.reserves[(0, "quickswap")].reserve_in == 1_000_000
+
+
+def test_sync_updates_only_changed_pairs(fake_chain):
+    state = _build_state(fake_chain)
+    state.poll()
+    state.take_dirty()
+
+    fake_chain.logs = [
+        _sync_log(POOLS[(0, "sushiswap")], 11, 0, 500, 1_100_000),
+        _sync_log(POOLS[(0, "sushiswap")], 11, 3, 490, 1_120_000),
+        _sync_log("0x0000000000000000000000000000000000000001", 11, 1, 1, 1),
+    ]
+    fake_chain.eth.block_number = 11
+    calls = fake_chain.calls
+
+    assert state.poll() == {0}
+    assert fake_chain.calls == calls  # nenhum Multicall após o bootstrap
+    # O último Sync do bloco vence e a orientação token0/token1 é respeitada
+    assert state.reserves[(0, "sushiswap")].reserve_in == 1_120_000
+    assert state.reserves[(0, "sushiswap")].reserve_out == 490
+    assert state.block_number == 11
+
+
+def test_replayed_logs_are_ignored(fake_chain):
+    state = _build_state(fake_chain)
+    state.poll()
+    log = _sync_log(POOLS[(1, "quickswap")], 11, 0, 1_000_000, 900_000)
+    assert state.ingest_logs([log]) == {1}
+    assert state.ingest_logs([log]) == set()
+
+
+def test_get_logs_shrinks_chunk_on_error(fake_chain):
+    state = _build_state(fake_chain)
+    state.chunk_size = 8
+    state.poll()
+    ranges = []
+
+    def get_logs(params):
+        ranges.append((params["fromBlock"], params["toBlock"]))
+        if params["toBlock"] - params["fromBlock"] >= 4:
+            raise ValueError("query returned more than 10000 results")
+        return []
+
+    fake_chain.eth.get_logs = get_logs
+    fake_chain.eth.block_number = 18
+    state.poll()
+    assert ranges[0] == (11, 18)
+    assert ranges[1:] == [(11, 14), (15, 18)]
+
+
+def test_detect_opportunities_only_scans_dirty_pairs(fake_chain):
+    state = _build_state(fake_chain)
+    state.poll()
+    engine = SpreadEngine(["quickswap", "sushiswap"])
+    assert state.detect_opportunities(engine) == []  # sem spread no bootstrap
+
+    state.ingest_logs([_sync_log(POOLS[(0, "sushiswap")], 11, 0, 500, 1_100_000)])
+    opportunities = state.detect_opportunities(engine, gas_cost=[0.0, 1e12])
+    assert [(o.pair_index, o.buy_dex, o.sell_dex) for o in opportunities] == [(0, 0, 1)]
+    assert state.detect_opportunities(engine) == []
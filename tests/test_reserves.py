@@ -0,0 +1,75 @@
+from eth_abi import decode, encode
+
+from utils import reserves as r
+from utils.reserves import ReserveReader, get_amount_out
+
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+WETH = "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619"
+QUICK_ROUTER = "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff"
+SUSHI_ROUTER = "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506"
+QUICK_FACTORY = "0x5757371414417b8C6CAad45bAeF941aBc7d3Ab32"
+SUSHI_FACTORY = "0xc35DADB65012eC5796536bD9864eD8773aBc74C4"
+QUICK_POOL = "0x853Ee4b2A13f8a742d64C8F088bE7bA2131f670d"
+SUSHI_POOL = "0x34965ba0ac2451A34a0471F04CCa3F990b8dea27"
+
+
+def test_get_amount_out_matches_uniswap():
+    # 1000 in numa pool 1e6/1e6 com fee de 0,3%
+    assert get_amount_out(1000, 10 ** 6, 10 ** 6) == 996
+    assert get_amount_out(0, 10 ** 6, 10 ** 6) == 0
+    assert get_amount_out(1000, 0, 10 ** 6) == 0
+
+
+def _setup_chain(fake_chain):
+    # WETH < USDC em ordem de endereço, então o pool guarda WETH como token0
+    fake_chain.add_pool(QUICK_POOL, WETH, USDC, 500 * 10 ** 18, 1_000_000 * 10 ** 6)
+    fake_chain.add_pool(SUSHI_POOL, WETH, USDC, 100 * 10 ** 18, 210_000 * 10 ** 6)
+    for router, factory, pool in ((QUICK_ROUTER, QUICK_FACTORY, QUICK_POOL),
+                                  (SUSHI_ROUTER, SUSHI_FACTORY, SUSHI_POOL)):
+        fake_chain.register(router, {r.FACTORY: lambda args, f=factory: encode(["address"], [f])})
+        fake_chain.register(factory, {
+            r.GET_PAIR: lambda args, p=pool: encode(["address"], [p])
+            if {a.lower() for a in decode(["address", "address"], args)} == {USDC.lower(), WETH.lower()}
+            else encode(["address"], [r.ZERO_ADDRESS])
+        })
+
+
+def test_fetch_resolves_pools_and_orients_reserves(fake_chain):
+    _setup_chain(fake_chain)
+    reader = ReserveReader(fake_chain, [{"srcToken": USDC, "destToken": WETH}],
+                           [("quickswap", QUICK_ROUTER), ("sushiswap", SUSHI_ROUTER)])
+    fake_chain.block_number = 42
+    snapshot = reader.fetch()
+
+    assert snapshot.block_number == 42
+    assert snapshot.reserves[(0, "quickswap")].reserve_in == 1_000_000 * 10 ** 6
+    assert snapshot.reserves[(0, "quickswap")].reserve_out == 500 * 10 ** 18
+    assert snapshot.reserves[(0, "sushiswap")].reserve_in == 210_000 * 10 ** 6
+
+    # Depois do bootstrap, cada bloco custa um único eth_call
+    calls = fake_chain.calls
+    reader.fetch()
+    assert fake_chain.calls == calls + 1
+
+
+def test_quote_uses_local_constant_product(fake_chain):
+    _setup_chain(fake_chain)
+    reader = ReserveReader(fake_chain, [{"srcToken": USDC, "destToken": WETH}],
+                           [("quickswap", QUICK_ROUTER)],
+                           pair_addresses={(0, "quickswap"): QUICK_POOL})
+    snapshot = reader.fetch()
+
+    amount_in = 2000 * 10 ** 6
+    expected = get_amount_out(amount_in, 1_000_000 * 10 ** 6, 500 * 10 ** 18)
+    assert reader.quote(snapshot, 0, "quickswap", amount_in) == expected
+    assert reader.quote(snapshot, 0, "quickswap", 10 ** 18, reverse=True) == \
+        get_amount_out(10 ** 18, 500 * 10 ** 18, 1_000_000 * 10 ** 6)
+    assert reader.quote(snapshot, 0, "sushiswap", amount_in) == 0
+
+
+def test_failed_calls_are_skipped(fake_chain):
+    reader = ReserveReader(fake_chain, [{"srcToken": USDC, "destToken": WETH}],
+                           [("quickswap", QUICK_ROUTER)],
+                           pair_addresses={(0, "quickswap"): QUICK_POOL})
+    snapshot = reader.fetch()
+    assert snapshot.reserves == {}
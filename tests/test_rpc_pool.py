@@ -0,0 +1,190 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from web3 import Web3
+
+from utils.config import rpc_endpoints
+from utils.rpc_pool import RpcEndpointError, RpcPool, endpoint_label
+
+
+class FakeNode:
+    """Provider mínimo: responde eth_blockNumber com um valor fixo por nó"""
+
+    def __init__(self, block=1, delay=0.0, fail=False, error_code=None):
+        self.block = block
+        self.delay = delay
+        self.fail = fail
+        self.error_code = error_code
+        self.requests = []
+        self.batches = []
+
+    def _respond(self, method, params, i=0):
+        if self.error_code is not None:
+            return {"jsonrpc": "2.0", "id": i, "error": {"code": self.error_code, "message": "limit exceeded"}}
+        if method == "eth_call":
+            return {"jsonrpc": "2.0", "id": i, "error": {"code": 3, "message": "execution reverted"}}
+        return {"jsonrpc": "2.0", "id": i, "result": hex(self.block)}
+
+    def make_request(self, method, params):
+        self.requests.append(method)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("node down")
+        return self._respond(method, params)
+
+    def make_batch_request(self, requests):
+        self.batches.append(requests)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("node down")
+        return [self._respond(method, params, i) for i, (method, params) in enumerate(requests)]
+
+
+def _pool(*nodes, **kwargs):
+    kwargs.setdefault("batch_window", 0)
+    return RpcPool([(f"http://node{i}", node) for i, node in enumerate(nodes)], **kwargs)
+
+
+def test_failover_to_next_endpoint():
+    down, up = FakeNode(fail=True), FakeNode(block=7)
+    pool = _pool(down, up, hedge_after=None)
+    assert pool.make_request("eth_blockNumber", [])["result"] == "0x7"
+    # O nó com falha fica em quarentena e sai da frente
+    assert pool.ranked()[0].provider is up
+    pool.make_request("eth_blockNumber", [])
+    assert len(down.requests) == 1
+
+
+def test_retryable_error_fails_over_but_revert_does_not():
+    limited, up = FakeNode(error_code=-32005), FakeNode(block=3)
+    pool = _pool(limited, up, hedge_after=None)
+    assert pool.make_request("eth_blockNumber", [])["result"] == "0x3"
+    # Revert é resposta válida da chamada: não troca de nó
+    response = pool.make_request("eth_call", [{}, "latest"])
+    assert response["error"]["code"] == 3
+    assert up.requests == ["eth_blockNumber", "eth_call"]
+
+
+def test_routes_to_lowest_latency():
+    slow, fast = FakeNode(block=1, delay=0.05), FakeNode(block=2)
+    pool = _pool(slow, fast, hedge_after=None)
+    pool.make_request("eth_blockNumber", [])
+    pool.endpoints[1].latency = 0.001
+    for _ in range(3):
+        assert pool.make_request("eth_blockNumber", [])["result"] == "0x2"
+    assert len(slow.requests) == 1
+
+
+def test_hedges_slow_endpoint():
+    slow, fast = FakeNode(block=1, delay=0.5), FakeNode(block=2)
+    pool = _pool(slow, fast, hedge_after=0.02)
+    start = time.perf_counter()
+    assert pool.make_request("eth_blockNumber", [])["result"] == "0x2"
+    assert time.perf_counter() - start < 0.4
+
+
+def test_send_is_not_hedged():
+    slow, fast = FakeNode(delay=0.05), FakeNode()
+    pool = _pool(slow, fast, hedge_after=0.001)
+    pool.make_request("eth_sendRawTransaction", ["0x00"])
+    assert fast.requests == []
+
+
+def test_filters_stay_on_one_endpoint():
+    a, b = FakeNode(), FakeNode()
+    pool = _pool(a, b, hedge_after=None)
+    pool.make_request("eth_newBlockFilter", [])
+    pool.endpoints[1].latency = 0.0
+    pool.endpoints[0].latency = 1.0
+    pool.make_request("eth_getFilterChanges", ["0x1"])
+    assert a.requests == ["eth_newBlockFilter", "eth_getFilterChanges"]
+
+
+def test_concurrent_calls_are_batched():
+    node = FakeNode(block=5)
+    pool = _pool(node, batch_window=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.make_request("eth_blockNumber", [])))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(node.batches) == 1
+    assert len(node.batches[0]) == 4
+    assert [r["result"] for r in results] == ["0x5"] * 4
+
+
+def test_batch_responses_matched_by_id():
+    class Dropping(FakeNode):
+        """Responde o lote fora de ordem e omite a segunda chamada"""
+        def make_batch_request(self, requests):
+            self.batches.append(requests)
+            return [{"jsonrpc": "2.0", "id": i, "result": hex(i)} for i in reversed(range(len(requests))) if i != 1]
+
+    pool = _pool(Dropping(), batch_window=0.05)
+    results, errors = {}, {}
+
+    def call(i):
+        try:
+            results[i] = pool.make_request("eth_getBalance", [hex(i)])
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+        time.sleep(0.005)
+    for t in threads:
+        t.join(timeout=2)
+    # Cada thread recebe a resposta do seu id; a omitida falha em vez de travar
+    assert not any(t.is_alive() for t in threads)
+    assert {i: r["result"] for i, r in results.items()} == {0: "0x0", 2: "0x2"}
+    assert list(errors) == [1]
+
+    responses = pool.make_batch_request([("eth_blockNumber", [])] * 3)
+    assert [r.get("result") for r in responses] == ["0x0", None, "0x2"]
+    assert responses[1]["error"]["message"] == "sem resposta no lote"
+
+
+def test_follower_wait_is_bounded():
+    pool = _pool(FakeNode(), batch_window=0.01, timeout=0.05)
+    # Um líder que nunca envia o lote: quem está na fila desiste após wait_timeout
+    pool._queue.append(("eth_blockNumber", [], Future()))
+    start = time.perf_counter()
+    with pytest.raises(RpcEndpointError):
+        pool.make_request("eth_blockNumber", [])
+    assert time.perf_counter() - start < 1
+
+
+def test_batch_error_object_fails_over():
+    class Rejecting(FakeNode):
+        def make_batch_request(self, requests):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch not supported"}}
+
+    pool = _pool(Rejecting(), FakeNode(block=9), hedge_after=None)
+    responses = pool.make_batch_request([("eth_blockNumber", [])] * 2)
+    assert [r["result"] for r in responses] == ["0x9", "0x9"]
+
+
+def test_all_endpoints_down():
+    pool = _pool(FakeNode(fail=True), FakeNode(fail=True), hedge_after=0.01)
+    with pytest.raises(ConnectionError):
+        pool.make_request("eth_blockNumber", [])
+
+
+def test_web3_over_pool():
+    w3 = Web3(_pool(FakeNode(block=42)))
+    assert w3.eth.block_number == 42
+
+
+def test_rpc_endpoints(monkeypatch):
+    network = {"rpc": "https://a", "rpcFallbacks": ["https://b", "https://a"]}
+    monkeypatch.delenv("WEB3_PROVIDERS", raising=False)
+    monkeypatch.delenv("WEB3_PROVIDER", raising=False)
+    assert rpc_endpoints(network) == ["https://a", "https://b"]
+    monkeypatch.setenv("WEB3_PROVIDERS", "https://x, https://y")
+    assert rpc_endpoints(network) == ["https://x", "https://y"]
+    assert endpoint_label("https://polygon-mainnet.g.alchemy.com/v2/secret") == "polygon-mainnet.g.alchemy.com"
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from eth_abi import decode, encode
+
+from utils.simulator import EXECUTE_ARBITRAGE, Candidate, TradeSimulator, encode_execute_arbitrage
+
+CONTRACT = "0x" + "cc" * 20
+SENDER = "0x" + "dd" * 20
+TOKEN_A = "0x" + "0a" * 20
+TOKEN_B = "0x" + "0b" * 20
+
+
+class MockRouterProvider:
+    """Responde eth_call como o ArbitrageBot com os routers mock (150% por swap)"""
+
+    def __init__(self, rates=(150, 150), batch=True):
+        self.rates = rates
+        self.calls = []
+        self.batches = []
+        if not batch:
+            self.make_batch_request = None
+
+    def _execute(self, tx):
+        data = bytes.fromhex(tx["data"][2:])
+        assert data[:4] == EXECUTE_ARBITRAGE
+        token_in, token_out, amount, buy_dex, sell_dex = decode(
+            ["(address,address,uint256,uint8,uint8)"], data[4:])[0]
+        if max(buy_dex, sell_dex) >= len(self.rates):
+            return {"error": {"code": 3, "message": "execution reverted: Invalid DEX index"}}
+        amount_out = amount * self.rates[buy_dex] // 100 * self.rates[sell_dex] // 100
+        if amount_out <= amount:
+            return {"error": {"code": 3, "message": "execution reverted: No profit made"}}
+        return {"result": "0x" + encode(["uint256"], [amount_out]).hex()}
+
+    def make_request(self, method, params):
+        self.calls.append((method, params))
+        return self._execute(params[0])
+
+    def make_batch_request(self, requests):
+        self.batches.append(requests)
+        return [self._execute(params[0]) for method, params in requests]
+
+
+def _simulator(provider):
+    return TradeSimulator(SimpleNamespace(provider=provider), CONTRACT, SENDER)
+
+
+def test_encode_execute_arbitrage():
+    data = encode_execute_arbitrage(TOKEN_A, TOKEN_B, 10 ** 18, 0, 1)
+    assert data[:4] == EXECUTE_ARBITRAGE
+    assert len(data) == 4 + 5 * 32
+    assert decode(["(address,address,uint256,uint8,uint8)"], data[4:])[0][2:] == (10 ** 18, 0, 1)
+
+
+def test_simulate_batches_and_ranks_winners():
+    provider = MockRouterProvider(rates=(150, 120))
+    candidates = [
+        Candidate(TOKEN_A, TOKEN_B, 100, 0, 1, "small"),
+        Candidate(TOKEN_A, TOKEN_B, 1000, 0, 0, "large"),
+        Candidate(TOKEN_A, TOKEN_B, 1000, 0, 5, "invalid"),
+    ]
+    winners, losers = _simulator(provider).simulate(candidates, block_identifier=16)
+
+    # Um único lote com os três eth_call, no bloco informado
+    assert len(provider.batches) == 1
+    assert [params[1] for _, params in provider.batches[0]] == ["0x10"] * 3
+    assert [w.candidate.context for w in winners] == ["large", "small"]
+    assert winners[0].amount_out == 2250
+    assert winners[0].profit == 1250
+    assert winners[0].latency >= 0
+    assert losers[0].candidate.context == "invalid"
+    assert "Invalid DEX index" in losers[0].error
+
+
+def test_simulate_drops_reverts():
+    provider = MockRouterProvider(rates=(90, 100))
+    winners, losers = _simulator(provider).simulate([Candidate(TOKEN_A, TOKEN_B, 1000, 0, 1, None)])
+    assert winners == []
+    assert "No profit made" in losers[0].error
+
+
+def test_simulate_without_batch_support():
+    provider = MockRouterProvider(batch=False)
+    winners, _ = _simulator(provider).simulate([Candidate(TOKEN_A, TOKEN_B, 100, 0, 1, None)] * 2)
+    assert len(provider.calls) == 2
+    assert len(winners) == 2
+
+
+def test_simulate_empty():
+    assert _simulator(MockRouterProvider()).simulate([]) == ([], [])
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils.reserves import Reserves, ReserveSnapshot, get_amount_out
+from utils.spread_engine import SpreadEngine, optimal_round_trips
+
+FEES = np.array([0.003, 0.003])
+
+
+def _round_trip(amount_in, buy, sell, fee_bps=30):
+    bought = get_amount_out(amount_in, buy[0], buy[1], fee_bps)
+    return get_amount_out(bought, sell[1], sell[0], fee_bps)
+
+
+def test_optimal_size_matches_brute_force():
+    """Testa que o tamanho em forma fechada coincide com a busca exaustiva"""
+    cheap = (1_000_000 * 10 ** 6, 500 * 10 ** 18)   # 2000 USDC/WETH
+    rich = (1_100_000 * 10 ** 6, 500 * 10 ** 18)    # 2200 USDC/WETH
+    reserves = np.array([[cheap, rich]], dtype=np.float64)
+
+    opportunities = optimal_round_trips(reserves, FEES)
+
+    assert len(opportunities) == 1
+    best = opportunities[0]
+    assert (best.buy_dex, best.sell_dex) == (0, 1)
+
+    grid = np.linspace(1, 60_000, 600) * 10 ** 6
+    brute = max(_round_trip(int(d), cheap, rich) - int(d) for d in grid)
+    exact = _round_trip(best.amount_in, cheap, rich) - best.amount_in
+    assert exact >= brute
+    assert best.profit == pytest.approx(exact, rel=1e-6)
+
+
+def test_no_opportunity_without_spread():
+    pool = (1_000_000.0, 500.0)
+    reserves = np.array([[pool, pool]])
+    assert optimal_round_trips(reserves, FEES) == []
+
+
+def test_flash_fee_and_gas_reduce_profit():
+    reserves = np.array([[(1_000_000.0, 500.0), (1_010_000.0, 500.0)]])
+    gross = optimal_round_trips(reserves, FEES)[0]
+    with_fee = optimal_round_trips(reserves, FEES, flash_fee=0.0005)[0]
+    assert with_fee.amount_in < gross.amount_in
+    assert with_fee.profit < gross.profit
+    assert optimal_round_trips(reserves, FEES, gas_cost=np.array([gross.profit + 1])) == []
+
+
+def test_missing_pools_are_ignored():
+    reserves = np.array([[(1_000_000.0, 500.0), (0.0, 0.0), (1_100_000.0, 500.0)]])
+    opportunities = optimal_round_trips(reserves, np.array([0.003] * 3))
+    assert [(o.buy_dex, o.sell_dex) for o in opportunities] == [(0, 2)]
+
+
+def test_ranked_by_usd_profit():
+    reserves = np.array([
+        [(1_000_000.0, 500.0), (1_020_000.0, 500.0)],
+        [(1_000_000.0, 500.0), (1_100_000.0, 500.0)],
+    ])
+    opportunities = optimal_round_trips(reserves, FEES, token_values=np.array([1.0, 1.0]))
+    assert [o.pair_index for o in opportunities] == [1, 0]
+    assert optimal_round_trips(reserves, FEES, token_values=np.array([100.0, 1.0]))[0].pair_index == 0
+
+
+def test_engine_from_snapshot_keeps_contract_order():
+    engine = SpreadEngine(["quickswap", "sushiswap"])
+    snapshot = ReserveSnapshot(10, {
+        (3, "quickswap"): Reserves(1_100_000, 500, 0),
+        (3, "sushiswap"): Reserves(1_000_000, 500, 0),
+    })
+    reserves = engine.reserves_from_snapshot(snapshot, 5, pair_indexes=[3])
+    opportunities = engine.scan(reserves, pair_indexes=[3])
+    assert len(opportunities) == 1
+    assert opportunities[0].pair_index == 3
+    assert (opportunities[0].buy_dex, opportunities[0].sell_dex) == (1, 0)
+
+
+def test_scan_is_vectorized():
+    rng = np.random.default_rng(1)
+    reserves = rng.uniform(1e6, 2e6, size=(500, 4, 2))
+    start = time.perf_counter()
+    optimal_round_trips(reserves, np.full(4, 0.003))
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,68 @@
+import pytest
+
+from utils.token_graph import TokenGraph
+
+USDC, WETH, WMATIC, USDT = "usdc", "weth", "wmatic", "usdt"
+
+
+def _graph(**kwargs):
+    graph = TokenGraph([USDC, WETH, WMATIC, USDT], **kwargs)
+    # Preços consistentes: 1 WETH = 2000 USDC = 4000 WMATIC, 1 WMATIC = 0,5 USDC
+    graph.set_reserves(USDC, WETH, "quickswap", 2_000_000, 1_000, fee_bps=0)
+    graph.set_reserves(WETH, WMATIC, "quickswap", 1_000, 4_000_000, fee_bps=0)
+    graph.set_reserves(WMATIC, USDC, "sushiswap", 4_000_000, 2_000_000, fee_bps=0)
+    graph.set_reserves(USDC, USDT, "quickswap", 1_000_000, 1_000_000, fee_bps=0)
+    return graph
+
+
+def test_no_cycle_when_prices_consistent():
+    graph = _graph()
+    assert graph.find_cycles() == []
+
+
+def test_finds_triangular_cycle():
+    graph = _graph()
+    graph.find_cycles()
+    # WMATIC mais barato na SushiSwap: USDC -> WETH -> WMATIC -> USDC lucra ~5%
+    graph.set_reserves(WMATIC, USDC, "sushiswap", 4_000_000, 2_100_000, fee_bps=0)
+
+    cycles = graph.find_cycles()
+    assert len(cycles) == 1
+    cycle = cycles[0]
+    assert set(cycle.path) == {USDC, WETH, WMATIC}
+    assert len(cycle.path) == 4 and cycle.path[0] == cycle.path[-1]
+    assert cycle.profit_percent == pytest.approx(5.0)
+    hops = dict(zip(zip(cycle.path, cycle.path[1:]), cycle.dexes))
+    assert hops[(WMATIC, USDC)] == "sushiswap"
+
+
+def test_fees_can_remove_cycle():
+    graph = _graph()
+    graph.set_reserves(WMATIC, USDC, "sushiswap", 4_000_000, 2_004_000, fee_bps=30)
+    assert graph.find_cycles() == []
+
+
+def test_hop_limit():
+    graph = _graph(max_hops=2)
+    graph.set_reserves(WMATIC, USDC, "sushiswap", 4_000_000, 2_100_000, fee_bps=0)
+    assert graph.find_cycles() == []
+
+
+def test_two_dex_round_trip_uses_best_edge_per_direction():
+    graph = TokenGraph([USDC, WETH])
+    graph.set_reserves(USDC, WETH, "quickswap", 2_000_000, 1_000, fee_bps=0)
+    graph.set_reserves(USDC, WETH, "sushiswap", 2_200_000, 1_000, fee_bps=0)
+    cycles = graph.find_cycles()
+    assert len(cycles) == 1
+    hops = dict(zip(zip(cycles[0].path, cycles[0].path[1:]), cycles[0].dexes))
+    assert hops == {(USDC, WETH): "quickswap", (WETH, USDC): "sushiswap"}
+
+
+def test_only_changed_tokens_are_searched():
+    graph = _graph()
+    graph.find_cycles()
+    assert graph.dirty == set()
+    graph.set_reserves(USDC, USDT, "quickswap", 1_000_000, 1_000_000, fee_bps=0)
+    assert graph.dirty == set()  # mesma taxa: nada a reavaliar
+    graph.set_reserves(USDC, USDT, "quickswap", 1_000_000, 999_000, fee_bps=0)
+    assert graph.dirty == {USDC, USDT}
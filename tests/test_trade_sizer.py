@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+from eth_abi import encode
+
+from utils.quotes import Quote
+from utils.reserves import MULTICALL3_ADDRESS, get_amount_out
+from utils.trade_sizer import (TokenDecimals, TradeSizer, fit_output_curve, net_profit_usd,
+                               optimal_amount)
+
+USDC = "0x2791bca1f2de4661ed88a30c99a7a9449aa84174"
+WETH = "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619"
+
+# Pool com WETH barato (1900 USDC) enquanto o mercado paga 2000 USD por WETH
+POOL = (1_900_000 * 10 ** 6, 1000 * 10 ** 18)
+USDC_PRICE = 1 / 10 ** 6
+WETH_PRICE = 2000 / 10 ** 18
+GAS_USD = 0.5
+
+
+class CurveClient:
+    """Cotações Paraswap geradas de um pool constant-product"""
+
+    def __init__(self):
+        self.amounts = []
+
+    async def get_prices(self, src, dest, side="SELL", amount="0", **kwargs):
+        amount = int(amount)
+        self.amounts.append(amount)
+        out = get_amount_out(amount, POOL[0], POOL[1])
+        return {"priceRoute": {
+            "srcToken": src, "destToken": dest,
+            "srcAmount": str(amount), "destAmount": str(out),
+            "srcUSD": str(amount * USDC_PRICE), "destUSD": str(out * WETH_PRICE),
+            "gasCostUSD": str(GAS_USD), "bestRoute": [],
+        }}
+
+
+def _net(amount):
+    out = get_amount_out(amount, POOL[0], POOL[1])
+    return out * WETH_PRICE - amount * USDC_PRICE - GAS_USD
+
+
+def test_token_decimals_known_and_onchain():
+    w3 = Mock()
+    w3.to_checksum_address.side_effect = lambda a: a
+    w3.eth.call.return_value = (8).to_bytes(32, "big")
+    decimals = TokenDecimals(w3)
+    assert decimals.get(USDC.upper().replace("0X", "0x")) == 6
+    assert decimals.get("0x" + "ab" * 20) == 8
+    decimals.get("0x" + "ab" * 20)
+    w3.eth.call.assert_called_once()
+
+
+def test_token_decimals_prefetch_in_one_multicall():
+    tokens = ["0x" + "ab" * 20, "0x" + "cd" * 20, USDC]
+    w3 = Mock()
+    # Resposta do tryBlockAndAggregate: o segundo token não implementa decimals()
+    w3.eth.call.return_value = encode(["uint256", "bytes32", "(bool,bytes)[]"],
+                                      [1, b"\x00" * 32, [(True, encode(["uint256"], [8])), (False, b"")]])
+    decimals = TokenDecimals(w3)
+    decimals.prefetch(tokens)
+    w3.eth.call.assert_called_once()
+    assert w3.eth.call.call_args[0][0]["to"] == MULTICALL3_ADDRESS
+    assert [decimals.get(t) for t in tokens] == [8, 18, 6]
+    decimals.prefetch(tokens)
+    w3.eth.call.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_token_decimals_lookup_does_not_block_loop():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_call(tx):
+        started.set()
+        release.wait(1)
+        return (8).to_bytes(32, "big")
+
+    w3 = Mock()
+    w3.to_checksum_address.side_effect = lambda a: a
+    w3.eth.call.side_effect = slow_call
+    decimals = TokenDecimals(w3)
+    lookups = asyncio.gather(*(decimals.get_async("0x" + "ab" * 20) for _ in range(3)))
+    # Com o nó ainda respondendo, o loop continua livre
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 1)
+    assert started.is_set()
+    release.set()
+    assert await lookups == [8, 8, 8]
+    w3.eth.call.assert_called_once()
+
+
+def test_fit_recovers_constant_product_curve():
+    amounts = [10 ** 9 * 2 ** i for i in range(6)]
+    outputs = [get_amount_out(a, *POOL) for a in amounts]
+    b, c = fit_output_curve(amounts, outputs)
+    for a, out in zip(amounts, outputs):
+        assert a / (b + c * a) == pytest.approx(out, rel=1e-4)
+    assert fit_output_curve(amounts[:2], outputs[:2]) is None
+
+
+def test_optimal_amount_maximizes_profit():
+    amounts = [10 ** 9 * 2 ** i for i in range(8)]
+    b, c = fit_output_curve(amounts, [get_amount_out(a, *POOL) for a in amounts])
+    best = optimal_amount(b, c, USDC_PRICE, WETH_PRICE)
+    assert _net(int(best)) >= _net(int(best * 0.9))
+    assert _net(int(best)) >= _net(int(best * 1.1))
+    # Sem spread não há tamanho ótimo
+    assert optimal_amount(b, c, 1.0, 1e-30) is None
+
+
+@pytest.mark.asyncio
+async def test_size_picks_best_net_amount():
+    client = CurveClient()
+    sizer = TradeSizer(client, TokenDecimals(), steps=8, reference_usd=4000)
+    sizer.prices = {USDC: USDC_PRICE, WETH: WETH_PRICE}
+
+    sized = await sizer.size(USDC, WETH)
+
+    ladder = client.amounts[:8]
+    assert len(ladder) == 8
+    assert sized.fitted_amount is not None
+    # Escolhe o tamanho da curva ajustada, melhor que qualquer degrau da escada
+    assert sized.profit_usd >= max(_net(a) for a in ladder)
+    assert sized.profit_usd == pytest.approx(_net(sized.amount_in))
+
+
+class NoSpreadClient(CurveClient):
+    async def get_prices(self, *args, **kwargs):
+        data = await super().get_prices(*args, **kwargs)
+        data["priceRoute"]["destUSD"] = data["priceRoute"]["srcUSD"]
+        return data
+
+
+@pytest.mark.asyncio
+async def test_size_rejects_unprofitable():
+    sizer = TradeSizer(NoSpreadClient(), TokenDecimals(), steps=4)
+    # Mesmo valor na entrada e na saída: o gas torna todo tamanho prejuízo
+    assert await sizer.size(USDC, WETH) is None
+
+
+@pytest.mark.asyncio
+async def test_reference_amount_uses_decimals_then_price():
+    sizer = TradeSizer(None, TokenDecimals())
+    assert await sizer.reference_amount(USDC) == 10 ** 6
+    sizer.observe(Quote(USDC, WETH, 2000000000, 10 ** 18, 2000.0, 2000.0, 0.0))
+    assert await sizer.reference_amount(WETH) == pytest.approx(0.5 * 10 ** 18)
+    assert net_profit_usd(Quote(USDC, WETH, 1, 1, 100.0, 101.0, 0.5), 0.0005) == pytest.approx(0.45)
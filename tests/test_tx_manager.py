@@ -0,0 +1,178 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from utils.tx_manager import FeeOracle, GasLimits, InFlightRegistry, NonceManager
+
+ADDRESS = "0x0000000000000000000000000000000000000001"
+
+
+def test_nonce_manager_reads_node_once():
+    w3 = Mock()
+    w3.eth.get_transaction_count.return_value = 7
+    manager = NonceManager(w3, ADDRESS)
+
+    assert [manager.next_nonce() for _ in range(3)] == [7, 8, 9]
+    w3.eth.get_transaction_count.assert_called_once_with(ADDRESS, "pending")
+    assert manager.pending == {7, 8, 9}
+
+    manager.confirm(7)
+    assert manager.pending == {8, 9}
+
+
+def test_nonce_manager_resync_after_error():
+    w3 = Mock()
+    w3.eth.get_transaction_count.return_value = 7
+    manager = NonceManager(w3, ADDRESS)
+    manager.next_nonce()
+    manager.next_nonce()
+
+    # A segunda transação não chegou ao nó: o próximo nonce volta a 8
+    w3.eth.get_transaction_count.return_value = 8
+    manager.resync(ValueError("nonce too low"))
+    assert manager.next_nonce() == 8
+    assert manager.pending == {8}
+
+
+def test_nonce_manager_is_thread_safe():
+    w3 = Mock()
+    w3.eth.get_transaction_count.return_value = 0
+    manager = NonceManager(w3, ADDRESS)
+    manager.sync()
+    nonces = []
+
+    def worker():
+        for _ in range(200):
+            nonces.append(manager.next_nonce())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(nonces) == list(range(800))
+
+
+def test_fee_oracle_eip1559():
+    w3 = Mock()
+    w3.eth.get_block.return_value = {"number": 10, "baseFeePerGas": 100}
+    w3.eth.max_priority_fee = 30
+    oracle = FeeOracle(w3, multiplier=1.5)
+
+    assert oracle.refresh() == {"maxPriorityFeePerGas": 45, "maxFeePerGas": 245}
+    # Leituras seguintes não tocam o nó
+    w3.eth.get_block.reset_mock()
+    assert oracle.fees() == {"maxPriorityFeePerGas": 45, "maxFeePerGas": 245}
+    w3.eth.get_block.assert_not_called()
+
+
+def test_fee_oracle_legacy():
+    w3 = Mock()
+    w3.eth.get_block.return_value = {"number": 10}
+    w3.eth.gas_price = 100
+    oracle = FeeOracle(w3, multiplier=1.1)
+    assert oracle.fees() == {"gasPrice": 110}
+
+
+@pytest.mark.asyncio
+async def test_fee_oracle_refreshes_once_per_block():
+    w3 = Mock()
+    w3.eth.get_block.return_value = {"number": 10, "baseFeePerGas": 100}
+    w3.eth.max_priority_fee = 30
+    oracle = FeeOracle(w3)
+
+    await oracle.refresh_async(10)
+    await oracle.refresh_async(10)
+    assert w3.eth.get_block.call_count == 1
+
+
+def test_gas_limits_learn_from_receipts():
+    limits = GasLimits(default=2000000, margin=1.2)
+    route = ("usdc", "weth", 0, 1)
+    assert limits.get(route) == 2000000
+    limits.observe(route, 150000)
+    assert limits.get(route) == 180000
+
+
+def _suppressed(reason):
+    return REGISTRY.get_sample_value("arb_inflight_suppressed_total", {"reason": reason}) or 0.0
+
+
+def test_inflight_registry_suppresses_duplicates_until_receipt():
+    registry = InFlightRegistry(ttl_blocks=10)
+    registry.advance_block(100)
+    route = ("usdc", "weth", 0, 1)
+    before = _suppressed("duplicate")
+    assert registry.acquire(route)
+    assert not registry.acquire(route)
+    assert _suppressed("duplicate") == before + 1
+    # Outra direção ou outro par de DEXs é outra rota
+    assert registry.acquire(("usdc", "weth", 1, 0))
+    registry.release(route)
+    registry.release(route)
+    assert registry.acquire(route)
+
+
+def test_inflight_registry_caps_exposure_per_token_and_dex():
+    registry = InFlightRegistry(max_per_token=2, max_per_dex=3)
+    before_token, before_dex = _suppressed("token_cap"), _suppressed("dex_cap")
+    assert registry.acquire(("usdc", "weth", 0, 1))
+    assert registry.acquire(("usdc", "dai", 0, 1))
+    # USDC já está em dois trades pendentes
+    assert not registry.acquire(("usdc", "wbtc", 0, 1))
+    assert registry.acquire(("wbtc", "aave", 0, 1))
+    # A DEX 0 já está em três
+    assert not registry.acquire(("quick", "sushi", 0, 2))
+    assert _suppressed("token_cap") == before_token + 1
+    assert _suppressed("dex_cap") == before_dex + 1
+    registry.release(("usdc", "weth", 0, 1))
+    assert registry.acquire(("usdc", "wbtc", 2, 3))
+
+
+def test_inflight_registry_expires_by_block():
+    registry = InFlightRegistry(ttl_blocks=3)
+    route = ("usdc", "weth", 0, 1)
+    assert registry.acquire(route)  # Antes de qualquer bloco: conta a partir do primeiro
+    registry.advance_block(50)
+    registry.advance_block(52)
+    assert not registry.acquire(route)
+    registry.advance_block(53)
+    assert route not in registry.entries
+    assert registry.acquire(route)
+
+
+@pytest.mark.asyncio
+async def test_inflight_route_outlives_receipt_watcher_timeout():
+    from types import SimpleNamespace
+
+    from utils.config import Config
+    from utils.receipt_watcher import ReceiptWatcher
+
+    timeout = 5
+    registry = InFlightRegistry(ttl_blocks=Config.inflight_ttl_blocks.fget(SimpleNamespace(
+        receipt_timeout_blocks=timeout)))
+    provider = SimpleNamespace(make_batch_request=lambda requests: [{"id": i, "result": None}
+                                                                    for i in range(len(requests))])
+
+    async def on_timeout(pending):
+        registry.release(pending.context["route"])
+
+    watcher = ReceiptWatcher(SimpleNamespace(provider=provider), None, on_timeout=on_timeout,
+                             timeout_blocks=timeout)
+    route = ("usdc", "weth", 0, 1)
+    block = 100
+    registry.advance_block(block)
+    await watcher.on_block(block)
+    assert registry.acquire(route)
+    watcher.track("0x" + "aa" * 32, route=route)
+
+    # Enquanto o watcher acompanha a transação, a rota não é liberada pela idade
+    while watcher.pending:
+        block += 1
+        registry.advance_block(block)
+        assert route in registry.entries
+        await watcher.on_block(block)
+    assert block == 100 + timeout + 1
+    assert route not in registry.entries
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+from utils.logger import BLOCK_SCAN_LAG, SCANS_CANCELLED, SCANS_DEFERRED, arb_logger
+
+
+class BlockScheduler:
+    """
+    Dispara um ciclo de varredura por bloco novo. Se um bloco chega enquanto o ciclo
+    anterior ainda roda, o ciclo antigo é cancelado: suas decisões já estariam velhas.
+    Exceções: ciclos perto do fim (pela duração média) e ciclos que já substituíram
+    max_cancel_streak cancelados seguidos terminam, e o bloco mais novo roda logo depois.
+    Sem isso, um ciclo mais longo que o bloco nunca terminaria.
+    """
+
+    def __init__(self, w3, scan: Callable[[int], Awaitable], poll_interval: float = 0.5,
+                 use_filter: bool = True, finish_grace: float = 0.5, max_cancel_streak: int = 1):
+        self.w3 = w3
+        self.scan = scan
+        self.poll_interval = poll_interval
+        self.use_filter = use_filter
+        self.finish_grace = finish_grace
+        self.max_cancel_streak = max_cancel_streak
+        self.last_block: Optional[int] = None
+        self.cancelled = 0
+        self.deferred = 0
+        self.scan_duration: Optional[float] = None  # média móvel dos ciclos concluídos
+        self._streak = 0
+        self._started_at = 0.0
+        self._pending: Optional[Tuple[int, Optional[int]]] = None
+        self._filter = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _setup_filter(self):
+        """Filtro de blocos novos; nem todo RPC público suporta eth_newBlockFilter"""
+        try:
+            self._filter = self.w3.eth.filter("latest")
+        except Exception as e:
+            arb_logger.logger.info("Filtro de blocos indisponível, usando eth_blockNumber", error=str(e))
+            self.use_filter = False
+
+    def _poll_block(self) -> Optional[Tuple[int, int]]:
+        """Retorna (número, timestamp) do bloco mais recente se houver bloco novo"""
+        if self.use_filter and self._filter is not None:
+            try:
+                if not self._filter.get_new_entries():
+                    return None
+            except Exception as e:
+                # Filtros expiram no nó após alguns minutos sem uso: recria
+                arb_logger.logger.info("Recriando filtro de blocos", error=str(e))
+                self._setup_filter()
+        block = self.w3.eth.get_block("latest")
+        if self.last_block is not None and block["number"] <= self.last_block:
+            return None
+        return block["number"], block["timestamp"]
+
+    async def _run_scan(self, block_number: int, timestamp: Optional[int]):
+        if timestamp is not None:
+            # Atraso desde a produção do bloco: inclui propagação, polling e ciclos adiados
+            BLOCK_SCAN_LAG.observe(max(0.0, time.time() - timestamp))
+        started = time.monotonic()
+        try:
+            await self.scan(block_number)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            arb_logger.logger.error("Erro no ciclo do bloco", block=block_number, error=str(e))
+
+        duration = time.monotonic() - started
+        self.scan_duration = duration if self.scan_duration is None else 0.8 * self.scan_duration + 0.2 * duration
+        self._streak = 0
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._start(*pending)
+
+    def _should_cancel(self) -> bool:
+        """Cancela só o ciclo que ainda demoraria e enquanto a sequência de cancelamentos é curta"""
+        if self._streak >= self.max_cancel_streak:
+            return False
+        if self.scan_duration is None:
+            return True
+        remaining = self.scan_duration - (time.monotonic() - self._started_at)
+        return remaining > self.finish_grace
+
+    def _start(self, block_number: int, timestamp: Optional[int]):
+        self._started_at = time.monotonic()
+        self._task = asyncio.ensure_future(self._run_scan(block_number, timestamp))
+
+    def on_block(self, block_number: int, timestamp: Optional[int] = None):
+        """Inicia o ciclo do bloco; o do bloco anterior é cancelado ou, se perto do fim, termina antes"""
+        self.last_block = block_number
+        if self._task is not None and not self._task.done():
+            if not self._should_cancel():
+                # Só o bloco mais novo espera: os intermediários já ficaram velhos
+                self._pending = (block_number, timestamp)
+                self.deferred += 1
+                SCANS_DEFERRED.inc()
+                return self._task
+            self._task.cancel()
+            self.cancelled += 1
+            self._streak += 1
+            SCANS_CANCELLED.inc()
+        self._pending = None
+        self._start(block_number, timestamp)
+        return self._task
+
+    async def run(self, max_blocks: Optional[int] = None):
+        """Acompanha a chain; max_blocks encerra após N blocos (útil em testes e benchmarks)"""
+        loop = asyncio.get_running_loop()
+        if self.use_filter:
+            await loop.run_in_executor(None, self._setup_filter)
+        seen = 0
+        try:
+            while max_blocks is None or seen < max_blocks:
+                try:
+                    block = await loop.run_in_executor(None, self._poll_block)
+                except Exception as e:
+                    arb_logger.logger.error("Erro ao consultar novos blocos", error=str(e))
+                    block = None
+                if block is not None:
+                    self.on_block(*block)
+                    seen += 1
+                    if max_blocks is not None and seen >= max_blocks:
+                        break
+                await asyncio.sleep(self.poll_interval)
+            # Um ciclo adiado começa quando o atual termina: espera até não sobrar nenhum
+            while self._task is not None and not self._task.done():
+                await asyncio.gather(self._task, return_exceptions=True)
+        finally:
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
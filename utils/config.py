@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Mapping, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+CONFIG_PATH = "config/contracts.json"
+ARTIFACT_PATH = "artifacts/contracts/ArbitrageBot.sol/ArbitrageBot.json"
+
+
+class Pair(NamedTuple):
+    src_token: str
+    dest_token: str
+
+    def as_dict(self) -> dict:
+        """Formato {"srcToken", "destToken"} usado pelo monitor e pelo ReserveReader"""
+        return {"srcToken": self.src_token, "destToken": self.dest_token}
+
+
+class Config(NamedTuple):
+    """Configuração imutável: contracts.json (rede `network`) + variáveis de ambiente, lida uma vez"""
+    network: str
+    chain_id: int
+    rpc_endpoints: Tuple[str, ...]
+    contract_address: Optional[str]
+    deploy_block: int  # Bloco do deploy do ArbitrageBot, início do indexador de eventos
+    contracts: Mapping[str, str]
+    dexes: Tuple[Tuple[str, str], ...]  # (nome, router) na ordem de índices do contrato
+    tokens: Mapping[str, str]  # símbolo -> endereço
+    pairs: Tuple[Pair, ...]
+    abi: Optional[tuple]  # ABI embutida no contracts.json; senão vem do artefato do Hardhat
+    paraswap_api_url: str
+    paraswap_rate_limit: float  # Requisições por segundo à Paraswap
+    paraswap_rate_burst: int
+    min_profit_threshold: float
+    gas_price_multiplier: float
+    flash_loan_fee: float
+    max_cycle_hops: int
+    quote_concurrency: int
+    block_poll_interval: float
+    quote_cache_ttl: float
+    quote_cache_size: int
+    price_source: str
+    size_ladder_steps: int
+    size_reference_usd: float
+    record_path: Optional[str]
+    rpc_hedge_after: float
+    rpc_batch_window: float
+    scan_workers: int
+    scan_budget: int  # Pares cotados por bloco na varredura Paraswap (0 = todos)
+    scan_floor_rate: float
+    scan_history: int
+    receipt_timeout_blocks: int  # Blocos até o ReceiptWatcher desistir de uma transação sem recibo
+    max_inflight_per_token: int
+    max_inflight_per_dex: int
+
+    @property
+    def token_names(self) -> Mapping[str, str]:
+        """endereço (minúsculo) -> símbolo, para logs"""
+        return MappingProxyType({address.lower(): symbol for symbol, address in self.tokens.items()})
+
+    @property
+    def inflight_ttl_blocks(self) -> int:
+        """
+        Expiração das rotas no InFlightRegistry: só depois do timeout do ReceiptWatcher (que
+        expira após receipt_timeout_blocks + 1 blocos), para não liberar uma rota ainda pendente
+        """
+        return self.receipt_timeout_blocks + 2
+
+    @property
+    def dex_indexes(self) -> Mapping[str, int]:
+        """nome da DEX (minúsculo, como a Paraswap nomeia a rota) -> índice no contrato"""
+        return MappingProxyType({name.lower(): index for index, (name, _) in enumerate(self.dexes)})
+
+
+def rpc_endpoints(network: dict) -> List[str]:
+    """
+    Endpoints configurados: WEB3_PROVIDERS (lista separada por vírgulas) tem precedência;
+    senão WEB3_PROVIDER/`rpc` seguido de `rpcFallbacks` do contracts.json.
+    """
+    configured = os.getenv("WEB3_PROVIDERS")
+    if configured:
+        return [uri.strip() for uri in configured.split(",") if uri.strip()]
+    primary = os.getenv("WEB3_PROVIDER", network["rpc"])
+    return [primary] + [uri for uri in network.get("rpcFallbacks", []) if uri != primary]
+
+
+def _pair(entry, tokens: Mapping[str, str]) -> Pair:
+    # Pares aceitam símbolo de `tokens` ou endereço
+    src, dest = entry
+    return Pair(tokens.get(src, src), tokens.get(dest, dest))
+
+
+def load_config(path: str = CONFIG_PATH, network: str = "polygon") -> Config:
+    with open(path) as f:
+        raw = json.load(f)
+    section = raw[network]
+    tokens = MappingProxyType(dict(section.get("tokens", {})))
+    abi = raw.get("abi")
+    return Config(
+        network=network,
+        chain_id=int(section["network"]["chainId"]),
+        rpc_endpoints=tuple(rpc_endpoints(section["network"])),
+        contract_address=os.getenv("CONTRACT_ADDRESS") or section["contracts"].get("arbitrageBot") or None,
+        deploy_block=int(os.getenv("DEPLOY_BLOCK") or section["contracts"].get("arbitrageBotDeployBlock") or 0),
+        contracts=MappingProxyType(dict(section["contracts"])),
+        dexes=tuple(section["dexes"].items()),
+        tokens=tokens,
+        pairs=tuple(_pair(entry, tokens) for entry in section.get("pairs", [])),
+        abi=tuple(abi) if abi is not None else None,
+        paraswap_api_url=os.getenv("PARASWAP_API_URL", "https://api.paraswap.io/prices"),
+        paraswap_rate_limit=float(os.getenv("PARASWAP_RATE_LIMIT", "5")),
+        paraswap_rate_burst=int(os.getenv("PARASWAP_RATE_BURST", "5")),
+        min_profit_threshold=float(os.getenv("MIN_PROFIT_THRESHOLD", "0.1")),
+        gas_price_multiplier=float(os.getenv("GAS_PRICE_MULTIPLIER", "1.1")),
+        flash_loan_fee=float(os.getenv("FLASH_LOAN_FEE", "0.0005")),
+        max_cycle_hops=int(os.getenv("MAX_CYCLE_HOPS", "3")),
+        quote_concurrency=int(os.getenv("QUOTE_CONCURRENCY", "10")),
+        block_poll_interval=float(os.getenv("BLOCK_POLL_INTERVAL", "0.5")),
+        quote_cache_ttl=float(os.getenv("QUOTE_CACHE_TTL", "2")),
+        quote_cache_size=int(os.getenv("QUOTE_CACHE_SIZE", "1024")),
+        price_source=os.getenv("PRICE_SOURCE", "paraswap"),
+        size_ladder_steps=int(os.getenv("SIZE_LADDER_STEPS", "6")),
+        size_reference_usd=float(os.getenv("SIZE_REFERENCE_USD", "1000")),
+        record_path=os.getenv("RECORD_PATH") or None,
+        rpc_hedge_after=float(os.getenv("RPC_HEDGE_AFTER", "1.0")),
+        rpc_batch_window=float(os.getenv("RPC_BATCH_WINDOW", "0.002")),
+        scan_workers=int(os.getenv("SCAN_WORKERS", "0")),
+        scan_budget=int(os.getenv("SCAN_BUDGET", "0")),
+        scan_floor_rate=float(os.getenv("SCAN_FLOOR_RATE", "0.05")),
+        scan_history=int(os.getenv("SCAN_HISTORY", "64")),
+        receipt_timeout_blocks=int(os.getenv("RECEIPT_TIMEOUT_BLOCKS", "50")),
+        max_inflight_per_token=int(os.getenv("MAX_INFLIGHT_PER_TOKEN", "2")),
+        max_inflight_per_dex=int(os.getenv("MAX_INFLIGHT_PER_DEX", "4")),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_config(path: str = CONFIG_PATH, network: str = "polygon") -> Config:
+    """Config compartilhada do processo (monitor, ContractManager, deploy.py)"""
+    load_dotenv()
+    return load_config(path, network)
+
+
+def load_abi(config: Config, artifact_path: str = ARTIFACT_PATH) -> list:
+    """ABI do ArbitrageBot: a do contracts.json, senão a do artefato compilado pelo Hardhat"""
+    if config.abi is not None:
+        return list(config.abi)
+    with open(artifact_path) as f:
+        return json.load(f)["abi"]
+
+
+_UNSET = object()
+
+
+class Lazy:
+    """
+    Proxy que só cria o objeto (conexão, contrato, conta) no primeiro uso de um atributo.
+    Leitura e escrita de atributos são repassadas ao objeto criado.
+    """
+    __slots__ = ("_factory", "_value", "_lock")
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_value", _UNSET)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        value = self._value
+        if value is _UNSET:
+            # Executores do monitor podem pedir o mesmo objeto ao mesmo tempo
+            with self._lock:
+                value = self._value
+                if value is _UNSET:
+                    value = self._factory()
+                    object.__setattr__(self, "_value", value)
+        return value
+
+    @property
+    def _initialized(self) -> bool:
+        return self._value is not _UNSET
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        return repr(self._value) if self._initialized else f"<Lazy {getattr(self._factory, '__name__', '?')}>"
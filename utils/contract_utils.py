@@ -1,7 +1,12 @@
-from web3 import Web3
-import json
+import asyncio
 import os
 from eth_account import Account
+from utils.config import get_config, load_abi
+from utils.events import ARBITRAGE_BOT_EVENTS, EventDecoder
+from utils.receipt_watcher import ReceiptWatcher
+from utils.rpc_pool import make_web3
+from utils.simulator import encode_execute_arbitrage
+from utils.tx_manager import DEFAULT_GAS_LIMIT, FeeOracle, NonceManager, raw_transaction
 
 class ContractManager:
     def __init__(self):
@@ -9,14 +14,14 @@ class ContractManager:
         self.setup_web3()
         self.setup_account()
         self.load_contract()
+        self.setup_transactions()
 
     def load_config(self):
-        with open('config/contracts.json', 'r') as f:
-            self.config = json.load(f)
-            self.network = self.config['polygon']
+        # Mesma configuração imutável do monitor (contracts.json + .env)
+        self.config = get_config()
 
     def setup_web3(self):
-        self.w3 = Web3(Web3.HTTPProvider(self.network['network']['rpc']))
+        self.w3 = make_web3(self.config.rpc_endpoints)
         if not self.w3.is_connected():
             raise Exception("Não foi possível conectar à rede Polygon")
 
@@ -26,15 +31,23 @@ class ContractManager:
             raise Exception("PRIVATE_KEY não encontrada nas variáveis de ambiente")
         self.account = Account.from_key(private_key)
 
+    def setup_transactions(self):
+        # Nonce e taxas mantidos localmente para não consultar o nó a cada envio
+        self.nonce_manager = NonceManager(self.w3, self.account.address)
+        # Taxas lidas já na inicialização e depois renovadas por on_block: o envio não consulta o nó
+        self.fee_oracle = FeeOracle(self.w3, multiplier=self.config.gas_price_multiplier)
+        self.fee_oracle.refresh()
+        # Recibos consultados em lote a cada on_block, como no monitor, em vez de esperar cada envio
+        self.receipt_watcher = ReceiptWatcher(self.w3, self._handle_receipt, on_timeout=self._handle_timeout,
+                                              timeout_blocks=self.config.receipt_timeout_blocks)
+
     def load_contract(self):
-        contract_address = self.network['contracts']['arbitrageBot']
+        contract_address = self.config.contract_address
         if not contract_address:
             raise Exception("Endereço do contrato ArbitrageBot não encontrado na configuração")
 
         try:
-            with open('artifacts/contracts/ArbitrageBot.sol/ArbitrageBot.json', 'r') as f:
-                contract_json = json.load(f)
-                self.contract_abi = contract_json['abi']
+            self.contract_abi = load_abi(self.config)
         except Exception as e:
             raise Exception(f"Erro ao carregar ABI do contrato: {e}")
 
@@ -42,61 +55,82 @@ class ContractManager:
             address=self.w3.to_checksum_address(contract_address),
             abi=self.contract_abi
         )
+        # Índice topic0 -> evento montado uma vez; ABIs sem eventos usam os do ArbitrageBot.sol
+        events_abi = [entry for entry in self.contract_abi if entry.get("type") == "event"] or ARBITRAGE_BOT_EVENTS
+        self.event_decoder = EventDecoder(events_abi, address=contract_address)
+
+    def dex_index(self, dex):
+        """Índice da DEX no contrato; aceita o índice ou o nome (QuickSwap, sushiswap, ...)"""
+        if isinstance(dex, int):
+            return dex
+        index = self.config.dex_indexes.get(dex.lower())
+        if index is None:
+            raise ValueError(f"DEX não cadastrada no contrato: {dex}")
+        return index
 
-    def execute_arbitrage(self, token_in, token_out, amount, buy_dex, sell_dex):
+    def execute_arbitrage(self, token_in, token_out, amount, buy_dex, sell_dex, on_result=None):
+        """
+        Envia executeArbitrage e retorna sem esperar o recibo. O resultado ({'tx_hash', 'status',
+        'events'}) é entregue a `on_result` quando o recibo chega por on_block.
+        """
         try:
-            # Construir transação
-            tx = self.contract.functions.initiateArbitrage(
-                token_in,
-                token_out,
-                amount,
-                buy_dex,
-                sell_dex
-            ).build_transaction({
+            data = encode_execute_arbitrage(token_in, token_out, amount,
+                                            self.dex_index(buy_dex), self.dex_index(sell_dex))
+            tx = {
                 'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 2000000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-
-            # Assinar e enviar transação
-            signed_tx = self.account.sign_transaction(tx)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+                'to': self.contract.address,
+                'data': data,
+                'value': 0,
+                'chainId': self.config.chain_id,
+                'gas': DEFAULT_GAS_LIMIT,
+                **self.fee_oracle.fees()
+            }
 
-            # Aguardar recibo
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            # Nonce reservado por último; qualquer falha depois dele ressincroniza para não deixar buraco
+            nonce = self.nonce_manager.next_nonce()
+            try:
+                signed_tx = self.account.sign_transaction({**tx, 'nonce': nonce})
+                tx_hash = self.w3.eth.send_raw_transaction(raw_transaction(signed_tx))
+            except Exception as e:
+                self.nonce_manager.resync(e)
+                raise
 
-            # Processar eventos
-            events = self.process_events(receipt)
-            
-            return {
-                'tx_hash': tx_hash.hex(),
-                'status': receipt.status,
-                'events': events
-            }
+            pending = self.receipt_watcher.track(tx_hash, nonce=nonce, on_result=on_result)
+            return {'tx_hash': pending.tx_hash, 'nonce': nonce}
 
         except Exception as e:
             raise Exception(f"Erro ao executar arbitragem: {e}")
 
+    async def on_block(self, block_number):
+        """Renova as taxas e consulta os recibos pendentes; chamar a cada bloco novo"""
+        await asyncio.gather(self.fee_oracle.refresh_async(block_number),
+                             self.receipt_watcher.on_block(block_number))
+
+    async def _handle_receipt(self, pending, receipt):
+        self.nonce_manager.confirm(pending.context['nonce'])
+        on_result = pending.context['on_result']
+        if on_result is not None:
+            on_result({
+                'tx_hash': pending.tx_hash,
+                'status': receipt.status,
+                'events': self.process_events(receipt)
+            })
+
+    async def _handle_timeout(self, pending):
+        # Sem recibo após timeout_blocks: o nonce pode ter ficado órfão
+        await asyncio.get_running_loop().run_in_executor(None, self.nonce_manager.resync)
+
     def process_events(self, receipt):
-        events = []
-        for log in receipt.logs:
-            try:
-                event = self.contract.events.ArbitrageResult().process_log(log)
-                events.append({
-                    'tokenIn': event.args.tokenIn,
-                    'tokenOut': event.args.tokenOut,
-                    'profit': event.args.profit,
-                    'gasUsed': event.args.gasUsed,
-                    'success': event.args.success,
-                    'message': event.args.message
-                })
-            except:
-                continue
-        return events
+        """Eventos do ArbitrageBot no recibo (ArbitrageExecuted, DexAdded, DexUpdated); outros logs são ignorados"""
+        return [{'event': event.name, **event.args} for event in self.event_decoder.decode_receipt(receipt)]
+
+    def process_receipts(self, receipts):
+        """Como process_events, para vários recibos em uma passada"""
+        return [{'event': event.name, 'transactionHash': event.transaction_hash, **event.args}
+                for event in self.event_decoder.decode_receipts(receipts)]
 
     def get_token_address(self, symbol):
-        return self.network['tokens'].get(symbol.upper())
+        return self.config.tokens.get(symbol.upper())
 
     def get_dex_address(self, name):
-        return self.network['dexes'].get(name.lower())
\ No newline at end of file
+        return dict(self.config.dexes).get(name.lower())
\ No newline at end of file
@@ -0,0 +1,136 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from eth_abi import decode
+from eth_abi.exceptions import DecodingError
+from web3 import Web3
+
+# Eventos emitidos pelo ArbitrageBot.sol, para quando a ABI carregada não traz eventos
+ARBITRAGE_BOT_EVENTS = [
+    {"type": "event", "name": "ArbitrageExecuted", "anonymous": False, "inputs": [
+        {"name": "tokenIn", "type": "address", "indexed": False},
+        {"name": "tokenOut", "type": "address", "indexed": False},
+        {"name": "amountIn", "type": "uint256", "indexed": False},
+        {"name": "amountOut", "type": "uint256", "indexed": False},
+        {"name": "buyDex", "type": "string", "indexed": False},
+        {"name": "sellDex", "type": "string", "indexed": False},
+    ]},
+    {"type": "event", "name": "DexAdded", "anonymous": False, "inputs": [
+        {"name": "index", "type": "uint8", "indexed": True},
+        {"name": "router", "type": "address", "indexed": False},
+        {"name": "name", "type": "string", "indexed": False},
+    ]},
+    {"type": "event", "name": "DexUpdated", "anonymous": False, "inputs": [
+        {"name": "index", "type": "uint8", "indexed": True},
+        {"name": "router", "type": "address", "indexed": False},
+        {"name": "name", "type": "string", "indexed": False},
+        {"name": "enabled", "type": "bool", "indexed": False},
+    ]},
+]
+
+
+class DecodedEvent(NamedTuple):
+    name: str
+    args: Dict[str, Any]
+    address: str
+    block_number: Optional[int]
+    log_index: Optional[int]
+    transaction_hash: Optional[str]
+
+
+class _EventSpec(NamedTuple):
+    name: str
+    topic_names: Tuple[str, ...]
+    topic_types: Tuple[str, ...]
+    data_names: Tuple[str, ...]
+    data_types: Tuple[str, ...]
+
+
+def _canonical_type(param: dict) -> str:
+    """Tipo como aparece na assinatura do evento (tuplas expandidas)"""
+    kind = param["type"]
+    if kind.startswith("tuple"):
+        return "(" + ",".join(_canonical_type(c) for c in param["components"]) + ")" + kind[len("tuple"):]
+    return kind
+
+
+def _as_bytes(value) -> bytes:
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value)
+
+
+def _as_hex(value) -> Optional[str]:
+    if value is None:
+        return None
+    return "0x" + _as_bytes(value).hex()
+
+
+class EventDecoder:
+    """
+    Decodifica logs pela ABI com um índice topic0 -> evento montado uma única vez:
+    cada log custa uma consulta ao dict, e logs de outros contratos/eventos são pulados
+    sem exceção. Com `address`, só logs emitidos por esse contrato são considerados.
+    """
+
+    def __init__(self, abi: Sequence[dict] = ARBITRAGE_BOT_EVENTS, address: Optional[str] = None):
+        self.address = address.lower() if address else None
+        self.events: Dict[bytes, _EventSpec] = {}
+        for entry in abi:
+            if entry.get("type") != "event" or entry.get("anonymous"):
+                continue
+            inputs = entry.get("inputs", [])
+            signature = f"{entry['name']}({','.join(_canonical_type(p) for p in inputs)})"
+            topic0 = bytes(Web3.keccak(text=signature))
+            indexed = [p for p in inputs if p.get("indexed")]
+            data = [p for p in inputs if not p.get("indexed")]
+            self.events[topic0] = _EventSpec(
+                entry["name"],
+                tuple(p["name"] for p in indexed), tuple(_canonical_type(p) for p in indexed),
+                tuple(p["name"] for p in data), tuple(_canonical_type(p) for p in data),
+            )
+
+    def topic(self, name: str) -> str:
+        """topic0 (hex) de um evento da ABI, para filtros de eth_getLogs"""
+        for topic0, spec in self.events.items():
+            if spec.name == name:
+                return "0x" + topic0.hex()
+        raise KeyError(name)
+
+    def decode_log(self, log) -> Optional[DecodedEvent]:
+        """O evento do log, ou None se não é um evento conhecido deste contrato"""
+        topics = log["topics"]
+        if not topics:
+            return None
+        spec = self.events.get(_as_bytes(topics[0]))
+        if spec is None or len(topics) != len(spec.topic_types) + 1:
+            return None
+        address = log["address"].lower()
+        if self.address is not None and address != self.address:
+            return None
+        try:
+            args = dict(zip(spec.data_names, decode(spec.data_types, _as_bytes(log["data"]))))
+            for name, kind, topic in zip(spec.topic_names, spec.topic_types, topics[1:]):
+                topic = _as_bytes(topic)
+                # string, bytes, arrays e tuplas indexados viram hash no tópico: o valor não é recuperável
+                hashed = kind in ("string", "bytes") or kind.endswith("]") or kind.startswith("(")
+                args[name] = topic if hashed else decode([kind], topic)[0]
+        except (DecodingError, ValueError, OverflowError):
+            # Mesmo topic0 com layout diferente (outro contrato com evento homônimo)
+            return None
+        return DecodedEvent(spec.name, args, address, log.get("blockNumber"), log.get("logIndex"),
+                            _as_hex(log.get("transactionHash")))
+
+    def decode_logs(self, logs: Iterable) -> List[DecodedEvent]:
+        events = []
+        for log in logs:
+            event = self.decode_log(log)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def decode_receipt(self, receipt) -> List[DecodedEvent]:
+        return self.decode_logs(receipt["logs"])
+
+    def decode_receipts(self, receipts: Iterable) -> List[DecodedEvent]:
+        """Eventos de vários recibos em uma passada, na ordem dos recibos e dos logs"""
+        return self.decode_logs(log for receipt in receipts for log in receipt["logs"])
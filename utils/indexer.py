@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.events import DecodedEvent, EventDecoder
+from utils.logger import INDEXED_BLOCK, arb_logger
+
+INDEXED_EVENTS = ("ArbitrageExecuted", "DexUpdated")
+DAY = 86400
+
+PairProfit = namedtuple("PairProfit", ["token_in", "token_out", "trades", "profit"])
+DexProfit = namedtuple("DexProfit", ["dex", "token_in", "trades", "profit"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT,
+    timestamp INTEGER NOT NULL,
+    token_in TEXT NOT NULL,
+    token_out TEXT NOT NULL,
+    amount_in TEXT NOT NULL,
+    amount_out TEXT NOT NULL,
+    profit REAL NOT NULL,
+    buy_dex TEXT NOT NULL,
+    sell_dex TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS trades_by_time ON trades (timestamp, token_in, token_out, buy_dex, sell_dex, profit);
+-- Agregado por dia (UTC), mantido pelo trigger: consultas longas leem dias inteiros daqui
+CREATE TABLE IF NOT EXISTS daily (
+    day INTEGER NOT NULL,
+    token_in TEXT NOT NULL,
+    token_out TEXT NOT NULL,
+    buy_dex TEXT NOT NULL,
+    sell_dex TEXT NOT NULL,
+    trades INTEGER NOT NULL,
+    profit REAL NOT NULL,
+    PRIMARY KEY (day, token_in, token_out, buy_dex, sell_dex)
+);
+CREATE TRIGGER IF NOT EXISTS trades_daily AFTER INSERT ON trades BEGIN
+    INSERT INTO daily VALUES (NEW.timestamp / 86400, NEW.token_in, NEW.token_out, NEW.buy_dex, NEW.sell_dex,
+                               1, NEW.profit)
+    ON CONFLICT (day, token_in, token_out, buy_dex, sell_dex)
+    DO UPDATE SET trades = trades + 1, profit = profit + excluded.profit;
+END;
+CREATE TABLE IF NOT EXISTS dex_updates (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT,
+    dex_index INTEGER NOT NULL,
+    router TEXT NOT NULL,
+    name TEXT NOT NULL,
+    enabled INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    name TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+"""
+
+
+class TradeStore:
+    """
+    Histórico de eventos do ArbitrageBot em SQLite. Lucro de um trade = amountOut - amountIn,
+    em unidades base do tokenIn (antes da taxa do flash loan); os valores exatos ficam em texto.
+    Inserções e checkpoint entram na mesma transação: um reinício nunca perde nem duplica eventos.
+    """
+
+    def __init__(self, path: str, name: str = "arbitrage_bot"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    def checkpoint(self) -> Optional[int]:
+        """Último bloco indexado por completo"""
+        row = self.db.execute("SELECT block_number FROM checkpoints WHERE name = ?", (self.name,)).fetchone()
+        return row[0] if row else None
+
+    def insert(self, events: Sequence[DecodedEvent], timestamps: Dict[int, int], checkpoint: int):
+        trades, updates = [], []
+        for event in events:
+            args = event.args
+            if event.name == "ArbitrageExecuted":
+                trades.append((event.block_number, event.log_index, event.transaction_hash,
+                               timestamps[event.block_number], args["tokenIn"].lower(), args["tokenOut"].lower(),
+                               str(args["amountIn"]), str(args["amountOut"]),
+                               float(args["amountOut"] - args["amountIn"]),
+                               args["buyDex"].lower(), args["sellDex"].lower()))
+            elif event.name == "DexUpdated":
+                updates.append((event.block_number, event.log_index, event.transaction_hash, args["index"],
+                                args["router"].lower(), args["name"], int(args["enabled"])))
+        with self.db:
+            # OR IGNORE: um intervalo reprocessado após falha não duplica eventos
+            self.db.executemany("INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", trades)
+            self.db.executemany("INSERT OR IGNORE INTO dex_updates VALUES (?, ?, ?, ?, ?, ?, ?)", updates)
+            self.db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?)", (self.name, checkpoint))
+
+    @staticmethod
+    def _ranges(start_time: Optional[int], end_time: Optional[int]) -> Tuple[int, ...]:
+        """
+        Divide [start, end) em dias inteiros (lidos do agregado) e as pontas antes/depois
+        deles (lidas dos trades): (dia_ini, dia_fim, ini, ini2, fim2, fim)
+        """
+        start = 0 if start_time is None else start_time
+        end = 2 ** 62 if end_time is None else end_time
+        first_day, last_day = -(-start // DAY), end // DAY
+        if first_day >= last_day:
+            return 0, 0, start, end, end, end
+        return first_day, last_day, start, first_day * DAY, last_day * DAY, end
+
+    @staticmethod
+    def _rows(columns: str) -> str:
+        """Subconsulta com (columns, n, p) dos dias inteiros mais as pontas do intervalo"""
+        return (
+            f"SELECT {columns}, trades AS n, profit AS p FROM daily WHERE day >= ? AND day < ?"
+            f" UNION ALL SELECT {columns}, 1, profit FROM trades WHERE timestamp >= ? AND timestamp < ?"
+            f" UNION ALL SELECT {columns}, 1, profit FROM trades WHERE timestamp >= ? AND timestamp < ?"
+        )
+
+    def profit_by_pair(self, start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[PairProfit]:
+        """Trades e lucro por par (tokenIn/tokenOut) no intervalo [start_time, end_time) em segundos unix"""
+        rows = self.db.execute(
+            f"SELECT token_in, token_out, SUM(n), SUM(p) FROM ({self._rows('token_in, token_out')})"
+            " GROUP BY token_in, token_out ORDER BY SUM(p) DESC",
+            self._ranges(start_time, end_time))
+        return [PairProfit(*row) for row in rows]
+
+    def profit_by_dex(self, start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[DexProfit]:
+        """Trades e lucro por DEX (em qualquer perna) e tokenIn, no mesmo intervalo"""
+        rows = self.db.execute(
+            f"SELECT buy_dex, sell_dex, token_in, SUM(n), SUM(p) FROM ("
+            f"{self._rows('buy_dex, sell_dex, token_in')})"
+            " GROUP BY buy_dex, sell_dex, token_in",
+            self._ranges(start_time, end_time)).fetchall()
+        totals: Dict[Tuple[str, str], List] = {}
+        for buy_dex, sell_dex, token_in, trades, profit in rows:
+            for dex in {buy_dex, sell_dex}:
+                total = totals.setdefault((dex, token_in), [0, 0.0])
+                total[0] += trades
+                total[1] += profit
+        return sorted((DexProfit(dex, token_in, trades, profit) for (dex, token_in), (trades, profit) in totals.items()),
+                      key=lambda d: d.profit, reverse=True)
+
+    def close(self):
+        self.db.close()
+
+
+class EventIndexer:
+    """
+    Indexa ArbitrageExecuted e DexUpdated do contrato a partir do bloco de deploy:
+    `concurrency` intervalos de eth_getLogs em paralelo por rodada, com tamanho adaptativo
+    (metade quando o nó recusa, o dobro quando volta pouco log), e checkpoint a cada rodada.
+    Depois do backfill, `follow` acompanha a ponta da chain com `confirmations` de atraso.
+    """
+
+    def __init__(self, w3, store: TradeStore, address: str, decoder: Optional[EventDecoder] = None,
+                 start_block: int = 0, chunk_size: int = 2000, max_chunk_size: int = 100000,
+                 target_logs: int = 1000, concurrency: int = 4, confirmations: int = 5):
+        self.w3 = w3
+        self.store = store
+        self.address = w3.to_checksum_address(address)
+        self.decoder = decoder or EventDecoder(address=address)
+        self.topics = [[self.decoder.topic(name) for name in INDEXED_EVENTS]]
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.target_logs = target_logs
+        self.concurrency = concurrency
+        self.confirmations = confirmations
+
+    def next_block(self) -> int:
+        checkpoint = self.store.checkpoint()
+        return self.start_block if checkpoint is None else max(checkpoint + 1, self.start_block)
+
+    def _get_logs(self, from_block: int, to_block: int) -> list:
+        return self.w3.eth.get_logs({"fromBlock": from_block, "toBlock": to_block,
+                                     "address": self.address, "topics": self.topics})
+
+    async def _fetch(self, from_block: int, to_block: int) -> list:
+        loop = asyncio.get_running_loop()
+        try:
+            logs = await loop.run_in_executor(None, self._get_logs, from_block, to_block)
+        except Exception as e:
+            if from_block == to_block:
+                raise
+            # Intervalo grande demais (ou logs demais) para o nó: divide, e os próximos não
+            # voltam a crescer até o tamanho recusado
+            self.max_chunk_size = max(1, min(self.max_chunk_size, (to_block - from_block + 1) // 2))
+            self.chunk_size = min(self.chunk_size, self.max_chunk_size)
+            arb_logger.logger.info("Reduzindo intervalo do eth_getLogs", chunk=self.chunk_size, error=str(e))
+            middle = (from_block + to_block) // 2
+            return await self._fetch(from_block, middle) + await self._fetch(middle + 1, to_block)
+        if len(logs) < self.target_logs // 2 and to_block - from_block + 1 >= self.chunk_size:
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+        return logs
+
+    async def _timestamps(self, blocks) -> Dict[int, int]:
+        loop = asyncio.get_running_loop()
+        blocks = sorted(blocks)
+        headers = await asyncio.gather(*(loop.run_in_executor(None, self.w3.eth.get_block, b) for b in blocks))
+        return {b: int(header["timestamp"]) for b, header in zip(blocks, headers)}
+
+    async def backfill(self, to_block: int) -> int:
+        """Indexa até to_block, retomando do checkpoint; retorna quantos eventos foram gravados"""
+        start = self.next_block()
+        indexed = 0
+        while start <= to_block:
+            ranges = []
+            for _ in range(self.concurrency):
+                if start > to_block:
+                    break
+                end = min(to_block, start + self.chunk_size - 1)
+                ranges.append((start, end))
+                start = end + 1
+            results = await asyncio.gather(*(self._fetch(a, b) for a, b in ranges))
+            events = self.decoder.decode_logs(log for logs in results for log in logs)
+            timestamps = await self._timestamps({e.block_number for e in events if e.name == "ArbitrageExecuted"})
+            self.store.insert(events, timestamps, checkpoint=ranges[-1][1])
+            INDEXED_BLOCK.set(ranges[-1][1])
+            indexed += len(events)
+        return indexed
+
+    async def follow(self, poll_interval: float = 2.0, max_polls: Optional[int] = None):
+        """Backfill até a ponta e depois incremental, bloco a bloco"""
+        polls = 0
+        loop = asyncio.get_running_loop()
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            try:
+                head = await loop.run_in_executor(None, lambda: self.w3.eth.block_number)
+                safe = head - self.confirmations
+                if safe >= self.next_block():
+                    count = await self.backfill(safe)
+                    if count:
+                        arb_logger.logger.info("Eventos indexados", events=count, block=safe)
+            except Exception as e:
+                arb_logger.logger.error("Erro ao indexar eventos", error=str(e))
+            await asyncio.sleep(poll_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexa o histórico de trades do ArbitrageBot em SQLite")
+    parser.add_argument("--db", default=os.getenv("INDEXER_DB", "data/arbitrage.db"))
+    parser.add_argument("--from-block", type=int, help="Bloco inicial (padrão: bloco de deploy do contrato)")
+    parser.add_argument("--follow", action="store_true", help="Continua acompanhando a ponta da chain")
+    parser.add_argument("--report", action="store_true", help="Só imprime o lucro por par e por DEX")
+    parser.add_argument("--since", type=int, help="Início do relatório (segundos unix)")
+    parser.add_argument("--until", type=int, help="Fim do relatório (segundos unix)")
+    args = parser.parse_args(argv)
+
+    store = TradeStore(args.db)
+    try:
+        if not args.report:
+            from utils.config import get_config, load_abi
+            from utils.events import ARBITRAGE_BOT_EVENTS
+            from utils.rpc_pool import make_web3
+            config = get_config()
+            if not config.contract_address:
+                parser.error("endereço do ArbitrageBot não configurado (CONTRACT_ADDRESS ou contracts.json)")
+            try:
+                events_abi = [entry for entry in load_abi(config) if entry.get("type") == "event"]
+            except FileNotFoundError:
+                events_abi = []
+            decoder = EventDecoder(events_abi or ARBITRAGE_BOT_EVENTS, address=config.contract_address)
+            indexer = EventIndexer(make_web3(config.rpc_endpoints), store, config.contract_address, decoder,
+                                   start_block=config.deploy_block if args.from_block is None else args.from_block)
+            if args.follow:
+                asyncio.run(indexer.follow())
+            else:
+                head = indexer.w3.eth.block_number - indexer.confirmations
+                start = time.perf_counter()
+                count = asyncio.run(indexer.backfill(head))
+                print(json.dumps({"events": count, "block": head, "elapsed": time.perf_counter() - start}))
+        print(json.dumps({
+            "pairs": [p._asdict() for p in store.profit_by_pair(args.since, args.until)],
+            "dexes": [d._asdict() for d in store.profit_by_dex(args.since, args.until)],
+        }, indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
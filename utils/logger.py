@@ -1,35 +1,372 @@
 import os
 import sys
-import json
+import asyncio
+import queue
+import atexit
 import logging
+import logging.handlers
+import json
+import time
 import structlog
 from pathlib import Path
-from pythonjsonlogger import jsonlogger
-from prometheus_client import Counter, Gauge, start_http_server
-from typing import Optional
-from slack_sdk import WebClient
-from telegram.ext import ApplicationBuilder
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from typing import Awaitable, Callable, Dict, List, Optional
+
+try:
+    from orjson import dumps as orjson_dumps
+except ImportError:  # orjson é opcional: json da stdlib, mais lento
+    orjson_dumps = None
 
 # Métricas Prometheus
 OPPORTUNITIES = Counter('arb_opportunities_total', 'Total de oportunidades detectadas')
 TRADES = Counter('arb_trades_total', 'Total de trades executados')
 PROFIT = Gauge('arb_profit_total', 'Lucro total em USD')
-API_LATENCY = Gauge('api_latency_seconds', 'Latência das chamadas à API')
+API_LATENCY = Histogram('api_latency_seconds', 'Latência das chamadas à API', ['endpoint'],
+                        buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+RATE_LIMIT_TOKENS = Gauge('rate_limit_tokens', 'Tokens disponíveis no rate limiter', ['endpoint'])
+RATE_LIMIT_THROTTLED = Counter('rate_limit_throttled_seconds', 'Tempo pausado por rate limit do servidor', ['endpoint'])
+QUOTE_CACHE_HITS = Counter('quote_cache_hits_total', 'Cotações servidas pelo cache')
+QUOTE_CACHE_MISSES = Counter('quote_cache_misses_total', 'Cotações não encontradas no cache')
+BLOCK_SCAN_LAG = Histogram('block_scan_lag_seconds', 'Atraso entre o timestamp do bloco e o início da varredura',
+                           buckets=(.25, .5, 1, 1.5, 2, 3, 5, 10, 30))
+SCANS_CANCELLED = Counter('block_scans_cancelled_total', 'Varreduras canceladas por bloco mais novo')
+SCANS_DEFERRED = Counter('block_scans_deferred_total', 'Blocos adiados até a varredura em curso terminar')
+RPC_LATENCY = Histogram('rpc_latency_seconds', 'Latência das chamadas JSON-RPC por endpoint', ['endpoint'],
+                        buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+RPC_ERRORS = Counter('rpc_errors_total', 'Falhas de endpoint RPC (com failover para o próximo)', ['endpoint'])
+RPC_HEDGED = Counter('rpc_hedged_total', 'Chamadas RPC duplicadas em outro endpoint por lentidão')
+SIMULATION_LATENCY = Histogram('trade_simulation_latency_seconds', 'Latência da simulação (eth_call) por candidato',
+                               buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5))
+STAGE_LATENCY = Histogram('arb_stage_latency_seconds', 'Latência de cada etapa do caminho quente', ['stage'],
+                          buckets=(.0001, .0005, .001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60))
+DETECT_TO_BROADCAST = Histogram('arb_detect_to_broadcast_seconds', 'Tempo entre detectar a oportunidade e enviar a transação',
+                                buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+IN_FLIGHT = Gauge('arb_in_flight', 'Operações em andamento por etapa', ['stage'])
+PENDING_TXS = Gauge('arb_pending_transactions', 'Transações enviadas aguardando recibo')
+INDEXED_BLOCK = Gauge('arb_indexer_block', 'Último bloco com eventos do ArbitrageBot indexados em SQLite')
+INFLIGHT_TRADES = Gauge('arb_inflight_trades', 'Rotas com trade enviado e ainda sem recibo')
+INFLIGHT_SUPPRESSED = Counter('arb_inflight_suppressed_total', 'Envios suprimidos pelo registro de trades em voo',
+                              ['reason'])
+LOG_DROPPED = Counter('log_records_dropped_total', 'Registros de log descartados com a fila cheia')
+LOG_SUPPRESSED = Counter('log_records_suppressed_total', 'Registros de log acima do limite por evento', ['event'])
+LOG_QUEUE_SIZE = Gauge('log_queue_size', 'Registros de log aguardando a escrita')
+NOTIFICATIONS_SENT = Counter('notifications_sent_total', 'Mensagens entregues por destino', ['sink'])
+NOTIFICATIONS_FAILED = Counter('notifications_failed_total', 'Mensagens perdidas após todas as tentativas', ['sink'])
+SCAN_PAIRS_QUOTED = Gauge('arb_scan_pairs_quoted', 'Pares cotados na última varredura Paraswap')
+SCAN_PAIRS_SKIPPED = Counter('arb_scan_pairs_skipped_total', 'Pares deixados para blocos seguintes pelo PairScheduler')
+NOTIFICATIONS_DROPPED = Counter('notifications_dropped_total', 'Notificações descartadas com a fila cheia')
+
+# Eventos de alto volume (um por cotação): no máximo N por segundo cada; LOG_RATE_LIMITS substitui
+DEFAULT_LOG_RATE_LIMITS = {
+    "cycle_found": 10,
+    "Sem tamanho lucrativo após custos": 10,
+    "Erro na requisição": 10,
+}
+
+# Atributos próprios do LogRecord; o resto veio de `extra` (campos do structlog)
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class StageTimer:
+    """Mede uma etapa: em andamento no IN_FLIGHT e duração no STAGE_LATENCY"""
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        IN_FLIGHT.labels(stage=self.stage).inc()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_LATENCY.labels(stage=self.stage).observe(time.perf_counter() - self.start)
+        IN_FLIGHT.labels(stage=self.stage).dec()
+        return False
+
+
+class _NullTimer:
+    """Profiling desligado: nenhum relógio nem métrica"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def parse_rate_limits(spec: Optional[str]) -> Dict[str, float]:
+    """"evento=N,outro evento=M" -> {evento: N}; vazio/None mantém os padrões"""
+    if not spec:
+        return dict(DEFAULT_LOG_RATE_LIMITS)
+    limits = {}
+    for item in spec.split(","):
+        event, _, rate = item.rpartition("=")
+        if event.strip():
+            limits[event.strip()] = float(rate)
+    return limits
+
+
+def _json_dumps(entry: dict) -> str:
+    if orjson_dumps is not None:
+        return orjson_dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class OrjsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos do structlog, serializada pelo orjson (ou json)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"event": record.getMessage(), "level": record.levelname.lower(), "logger": record.name}
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if "timestamp" not in entry:
+            entry["timestamp"] = self.formatTime(record)
+        if record.exc_info and "exception" not in entry:
+            entry["exception"] = self.formatException(record.exc_info)
+        return _json_dumps(entry)
+
+
+class EventRateLimiter(logging.Filter):
+    """Token bucket por evento: acima de `limits[evento]` registros/s, os excedentes são descartados"""
+
+    def __init__(self, limits: Dict[str, float], clock=time.monotonic):
+        super().__init__()
+        self.limits = limits
+        self.clock = clock
+        self._buckets: Dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = record.msg
+        rate = self.limits.get(event) if isinstance(event, str) else None
+        if rate is None:
+            return True
+        now = self.clock()
+        bucket = self._buckets.get(event)
+        if bucket is None:
+            bucket = self._buckets[event] = [max(rate, 1), now]
+        # Rajada de até 1 segundo do limite (no mínimo um registro)
+        bucket[0] = min(max(rate, 1), bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        LOG_SUPPRESSED.labels(event=event).inc()
+        return False
+
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """
+    Só enfileira: formatação e escrita em disco/stdout ficam na thread do QueueListener.
+    Com a fila cheia, `block=False` descarta o registro (e conta em LOG_DROPPED) em vez de esperar.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool = False):
+        super().__init__(log_queue)
+        self.block = block
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # O padrão formataria aqui, na thread de quem loga
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class LazyFileHandler(logging.FileHandler):
+    """Só cria o diretório e abre o arquivo no primeiro registro escrito"""
+
+    def __init__(self, filename: str):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class LogWriter(logging.handlers.QueueListener):
+    """QueueListener que não perde o sentinela de parada com a fila cheia"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        record = super().dequeue(block)
+        LOG_QUEUE_SIZE.set(self.queue.qsize())
+        return record
+
+
+class StubSink:
+    """Destino local para testes/ambiente offline: guarda as mensagens (e anexa em `path`)"""
+
+    name = "stub"
+
+    def __init__(self, path: Optional[str] = None, fail: int = 0):
+        self.path = path
+        self.fail = fail  # Falha as primeiras `fail` entregas, para exercitar o retry
+        self.messages: List[str] = []
+
+    async def __call__(self, text: str):
+        if self.fail > 0:
+            self.fail -= 1
+            raise ConnectionError("falha simulada")
+        self.messages.append(text)
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(text + "\n\n")
+
+
+class SlackSink:
+    name = "slack"
+
+    def __init__(self, client, channel: str = "#arbitragem"):
+        self.client = client
+        self.channel = channel
+
+    async def __call__(self, text: str):
+        # WebClient é síncrono: a chamada de rede vai para o executor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self.client.chat_postMessage(channel=self.channel, text=text))
+
+
+class TelegramSink:
+    name = "telegram"
+
+    def __init__(self, app, chat_id: str):
+        self.app = app
+        self.chat_id = chat_id
+
+    async def __call__(self, text: str):
+        await self.app.bot.send_message(chat_id=self.chat_id, text=text)
+
+
+class NotificationDispatcher:
+    """
+    Entrega notificações em background: `submit` só enfileira. Rajadas dentro de
+    `coalesce_window` viram um único resumo; cada destino tem retry com backoff próprio.
+    """
+
+    def __init__(self, sinks: List[Callable[[str], Awaitable]], maxsize: int = 100,
+                 coalesce_window: float = 2.0, max_batch: int = 20, retries: int = 3, backoff: float = 1.0):
+        self.sinks = sinks
+        self.maxsize = maxsize
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.retries = retries
+        self.backoff = backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> bool:
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = loop.create_task(self._run())
+        return True
+
+    def submit(self, message: str, level: str = "INFO"):
+        if not self.sinks:
+            return
+        if not self._ensure_worker():
+            arb_logger.logger.error("Notificação fora do event loop descartada", message=message)
+            return
+        text = message if level == "INFO" else f"[{level}] {message}"
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            NOTIFICATIONS_DROPPED.inc()
+
+    async def _collect(self) -> List[str]:
+        """Primeira mensagem e tudo que chegar até o fim da janela"""
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.coalesce_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def digest(batch: List[str]) -> str:
+        if len(batch) == 1:
+            return batch[0]
+        return f"Resumo de {len(batch)} notificações:\n\n" + "\n\n".join(batch)
+
+    async def _deliver(self, sink, text: str):
+        name = getattr(sink, "name", type(sink).__name__)
+        for attempt in range(self.retries + 1):
+            try:
+                await sink(text)
+                NOTIFICATIONS_SENT.labels(sink=name).inc()
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    NOTIFICATIONS_FAILED.labels(sink=name).inc()
+                    arb_logger.logger.error("Erro ao enviar notificação", sink=name, error=str(e))
+                    return
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                text = self.digest(batch)
+                await asyncio.gather(*(self._deliver(sink, text) for sink in self.sinks))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def close(self, timeout: float = 10.0):
+        """Entrega o que está na fila (até `timeout`) e encerra o worker"""
+        if self._task is None or self._task.done():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            arb_logger.logger.error("Notificações pendentes descartadas", pending=self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
 
 class ArbLogger:
     def __init__(self):
-        # Criar diretório de logs se não existir
-        Path("logs").mkdir(exist_ok=True)
-        
-        # Configurar logging estruturado
-        logging.basicConfig(
-            level=os.getenv("LOG_LEVEL", "INFO"),
-            format="%(message)s",
-            handlers=[
-                logging.StreamHandler(sys.stdout),
-                logging.FileHandler(os.getenv("LOG_FILE", "logs/arbitrage.log"))
-            ]
-        )
+        # Configurar logging estruturado: quem loga só enfileira; stdout e arquivo são escritos
+        # por uma thread própria, então nenhum log espera por disco no caminho de um trade
+        formatter = OrjsonFormatter()
+        handlers = [logging.StreamHandler(sys.stdout),
+                    LazyFileHandler(os.getenv("LOG_FILE", "logs/arbitrage.log"))]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        self.log_handler = AsyncLogHandler(log_queue, block=os.getenv("LOG_QUEUE_POLICY", "drop") == "block")
+        self.log_handler.addFilter(EventRateLimiter(parse_rate_limits(os.getenv("LOG_RATE_LIMITS"))))
+        self.log_writer = LogWriter(log_queue, *handlers)
+        logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), handlers=[self.log_handler])
+        self.log_writer.start()
+        atexit.register(self.close)
 
         # Configurar structlog
         structlog.configure(
@@ -51,44 +388,50 @@ class ArbLogger:
         )
 
         self.logger = structlog.get_logger()
+
+        # Histogramas por etapa; alternável em execução (SIGUSR1 no monitor)
+        self.profiling = os.getenv("STAGE_PROFILING", "true").lower() in ("1", "true", "yes")
         
         # Configurar notificações
         self.slack_client = self._setup_slack() if os.getenv("SLACK_WEBHOOK_URL") else None
         self.telegram_app = self._setup_telegram() if os.getenv("TELEGRAM_BOT_TOKEN") else None
+        sinks = []
+        if self.slack_client:
+            sinks.append(SlackSink(self.slack_client))
+        if self.telegram_app and os.getenv("TELEGRAM_CHAT_ID"):
+            sinks.append(TelegramSink(self.telegram_app, os.getenv("TELEGRAM_CHAT_ID")))
+        if os.getenv("NOTIFY_STUB_PATH"):
+            sinks.append(StubSink(os.getenv("NOTIFY_STUB_PATH")))
+        self.notifier = NotificationDispatcher(
+            sinks, coalesce_window=float(os.getenv("NOTIFY_COALESCE_WINDOW", "2.0"))
+        )
 
-    def _setup_slack(self) -> Optional[WebClient]:
+    def _setup_slack(self):
         """Configura cliente Slack se webhook URL fornecida"""
         webhook_url = os.getenv("SLACK_WEBHOOK_URL")
         if webhook_url:
+            # Importado só quando configurado: slack_sdk pesa na inicialização
+            from slack_sdk import WebClient
             return WebClient(token=webhook_url)
         return None
 
-    def _setup_telegram(self) -> Optional[ApplicationBuilder]:
+    def _setup_telegram(self):
         """Configura cliente Telegram se token fornecido"""
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         if bot_token:
+            from telegram.ext import ApplicationBuilder
             return ApplicationBuilder().token(bot_token).build()
         return None
 
-    async def notify(self, message: str, level: str = "INFO"):
-        """Envia notificação para Slack e Telegram configurados"""
-        if self.slack_client:
-            try:
-                await self.slack_client.chat_postMessage(
-                    channel="#arbitragem",
-                    text=message
-                )
-            except Exception as e:
-                self.logger.error("Erro ao enviar notificação Slack", error=str(e))
+    def notify(self, message: str, level: str = "INFO"):
+        """Enfileira a notificação para Slack/Telegram; a entrega acontece em background"""
+        self.notifier.submit(message, level)
 
-        if self.telegram_app and os.getenv("TELEGRAM_CHAT_ID"):
-            try:
-                await self.telegram_app.bot.send_message(
-                    chat_id=os.getenv("TELEGRAM_CHAT_ID"),
-                    text=message
-                )
-            except Exception as e:
-                self.logger.error("Erro ao enviar notificação Telegram", error=str(e))
+    def close(self):
+        """Escreve o que ainda está na fila e encerra a thread de escrita"""
+        # O flush/close dos handlers fica com o logging.shutdown, que roda depois no atexit
+        if self.log_writer._thread is not None:
+            self.log_writer.stop()
 
     def start_metrics_server(self, port: int = 9090):
         """Inicia servidor Prometheus na porta especificada"""
@@ -108,20 +451,49 @@ class ArbLogger:
             gas_cost=gas_cost
         )
 
-    def log_trade(self, pair: str, profit_usd: float, gas_used: float):
-        """Registra trade executado"""
+    def log_trade(self, pair: str, profit_usd: Optional[float], gas_used: float,
+                  profit_percent: Optional[float] = None):
+        """Registra trade executado; sem preço em USD o lucro fica só no log, fora do total"""
         TRADES.inc()
-        PROFIT.inc(profit_usd)
+        if profit_usd is not None:
+            PROFIT.inc(profit_usd)
         self.logger.info(
             "trade_executed",
             pair=pair,
             profit_usd=profit_usd,
+            profit_percent=profit_percent,
             gas_used=gas_used
         )
 
     def log_api_latency(self, endpoint: str, latency: float):
         """Registra latência de chamada à API"""
-        API_LATENCY.labels(endpoint=endpoint).set(latency)
+        API_LATENCY.labels(endpoint=endpoint).observe(latency)
+
+    def log_scan_schedule(self, quoted: int, total: int):
+        """Pares cotados na varredura do bloco, de `total` monitorados"""
+        SCAN_PAIRS_QUOTED.set(quoted)
+        SCAN_PAIRS_SKIPPED.inc(total - quoted)
+
+    def set_profiling(self, enabled: bool):
+        self.profiling = enabled
+        self.logger.info("Profiling por etapa " + ("ligado" if enabled else "desligado"))
+
+    def toggle_profiling(self):
+        self.set_profiling(not self.profiling)
+
+    def stage(self, name: str):
+        """`with arb_logger.stage("sign"):` mede a etapa; custo nulo com o profiling desligado"""
+        return StageTimer(name) if self.profiling else _NULL_TIMER
+
+    def observe_stage(self, name: str, seconds: float):
+        """Duração medida fora de um `with` (ex.: tempo até o recibo)"""
+        if self.profiling:
+            STAGE_LATENCY.labels(stage=name).observe(seconds)
+
+    def log_detect_to_broadcast(self, detected_at: float):
+        """`detected_at` é um time.perf_counter() do momento da detecção"""
+        if self.profiling:
+            DETECT_TO_BROADCAST.observe(time.perf_counter() - detected_at)
 
 # Instância global do logger
 arb_logger = ArbLogger()
\ No newline at end of file
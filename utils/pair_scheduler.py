@@ -0,0 +1,73 @@
+import math
+from typing import List
+
+import numpy as np
+
+
+class PairScheduler:
+    """
+    Divide o orçamento de cotações por bloco (`budget` pares) entre os pares monitorados.
+
+    Cada par guarda em um ring buffer os últimos `history` spreads observados (lucro % após gas,
+    a mesma medida do detect_arbitrage). Deles saem a taxa histórica de oportunidades e a chance
+    de o próximo spread passar do limiar (normal com média e volatilidade do histórico); o
+    orçamento acima do piso é repartido na proporção dessa chance. Pares frios decaem até
+    `floor_rate` (cotados a cada 1/floor_rate blocos); pares sem histórico suficiente são
+    tratados como quentes até serem conhecidos.
+    """
+
+    def __init__(self, n_pairs: int, budget: int, threshold: float, history: int = 64,
+                 floor_rate: float = 0.05, min_samples: int = 8):
+        self.n_pairs = n_pairs
+        self.budget = max(1, min(budget, n_pairs))
+        self.threshold = threshold
+        self.floor_rate = floor_rate
+        self.min_samples = min(min_samples, history)
+        self.spreads = np.full((n_pairs, history), np.nan)
+        self.hits = np.zeros((n_pairs, history), dtype=bool)
+        self.samples = np.zeros(n_pairs, dtype=np.int64)
+        # Crédito acumulado por par: vence (é cotado) ao chegar a 1
+        self.credit = np.ones(n_pairs)
+
+    def observe(self, pair_index: int, spread: float):
+        slot = self.samples[pair_index] % self.spreads.shape[1]
+        self.spreads[pair_index, slot] = spread
+        self.hits[pair_index, slot] = spread >= self.threshold
+        self.samples[pair_index] += 1
+
+    def scores(self) -> np.ndarray:
+        """Chance estimada de cada par dar uma oportunidade na próxima cotação"""
+        filled = np.minimum(self.samples, self.spreads.shape[1])
+        known = filled >= self.min_samples
+        scores = np.ones(self.n_pairs)
+        if not known.any():
+            return scores
+        spreads = self.spreads[known]
+        mean = np.nanmean(spreads, axis=1)
+        std = np.maximum(np.nanstd(spreads, axis=1), 1e-9)
+        z = (self.threshold - mean) / (std * math.sqrt(2))
+        tail = 0.5 * np.array([math.erfc(v) for v in z])
+        # A cauda cobre pares ainda sem acertos; a taxa observada, spreads longe de normais
+        hit_rate = self.hits[known].sum(axis=1) / filled[known]
+        scores[known] = np.maximum(tail, hit_rate)
+        return scores
+
+    def rates(self) -> np.ndarray:
+        """Cotações por bloco de cada par: piso para todos, o resto do orçamento por chance"""
+        scores = self.scores()
+        total = scores.sum()
+        if total <= 0:
+            # Nenhum par com chance: o orçamento volta a ser dividido igualmente
+            scores, total = np.ones(self.n_pairs), self.n_pairs
+        spare = max(0.0, self.budget - self.floor_rate * self.n_pairs)
+        rates = self.floor_rate + spare * scores / total
+        return np.minimum(rates, 1.0)
+
+    def due(self) -> List[int]:
+        """Pares a cotar neste bloco (no máximo `budget`, os de maior crédito primeiro)"""
+        self.credit = np.minimum(self.credit + self.rates(), 2.0)
+        ready = np.nonzero(self.credit >= 1.0)[0]
+        if len(ready) > self.budget:
+            ready = ready[np.argsort(-self.credit[ready], kind="stable")[:self.budget]]
+        self.credit[ready] -= 1.0
+        return sorted(ready.tolist())
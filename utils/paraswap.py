@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson é opcional: json da stdlib, mais lento
+    from json import loads as json_loads
+
+from utils.logger import arb_logger
+from utils.quote_cache import QuoteCache
+from utils.rate_limiter import RateLimiter, paraswap_limiter, retry_after_seconds
+
+PARASWAP_API_URL = "https://api.paraswap.io/prices"
+DEFAULT_AMOUNT = "100000000"
+MAX_RETRIES = 5
+ENDPOINT = "paraswap_prices"
+
+
+class ParaswapClient:
+    """Cliente assíncrono da API Paraswap sobre uma sessão aiohttp com keep-alive"""
+
+    def __init__(self, base_url: str = PARASWAP_API_URL, chain_id: int = 137,
+                 concurrency: int = 10, timeout: float = 10.0,
+                 limiter: Optional[RateLimiter] = None, cache: Optional[QuoteCache] = None,
+                 decode: Callable[[bytes], Any] = json_loads):
+        self.base_url = base_url
+        self.chain_id = chain_id
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.limiter = limiter or paraswap_limiter
+        self.cache = cache
+        # json_loads devolve a resposta inteira; utils.quotes.decode_quote só os campos usados
+        self.decode = decode
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Cria a sessão (e o pool de conexões) no primeiro uso, dentro do event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.concurrency,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    def build_params(self, src_token: str, dest_token: str, side: str = "SELL",
+                     route: Optional[List[str]] = None, other_exchange_prices: bool = False,
+                     amount: str = DEFAULT_AMOUNT) -> Dict[str, str]:
+        params = {
+            "srcToken": src_token,
+            "destToken": dest_token,
+            "amount": str(amount),
+            "network": str(self.chain_id),
+            "side": side,
+            "otherExchangePrices": str(other_exchange_prices).lower()
+        }
+        if route:
+            params["route"] = "-".join(route)
+        return params
+
+    async def get_prices(self, src_token: str, dest_token: str, side: str = "SELL",
+                         route: Optional[List[str]] = None, other_exchange_prices: bool = False,
+                         amount: str = DEFAULT_AMOUNT) -> Optional[Any]:
+        """Consulta /prices sem bloquear o event loop; retorna a resposta decodificada ou None em caso de falha"""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = QuoteCache.make_key(src_token, dest_token, side, route, amount, other_exchange_prices)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        session = self._get_session()
+        params = self.build_params(src_token, dest_token, side, route, other_exchange_prices, amount)
+
+        for retry_count in range(MAX_RETRIES + 1):
+            # O limiter espaça as chamadas e segura o endpoint durante um 429
+            await self.limiter.acquire(ENDPOINT)
+
+            try:
+                async with self._semaphore:
+                    with arb_logger.stage("quote"):
+                        # Latência só da requisição: a espera pelo semáforo fica de fora
+                        start_time = time.perf_counter()
+                        async with session.get(self.base_url, params=params) as response:
+                            if response.status == 200:
+                                data = self.decode(await response.read())
+                                arb_logger.log_api_latency(ENDPOINT, time.perf_counter() - start_time)
+                                if cache_key is not None and data is not None:
+                                    self.cache.set(cache_key, data)
+                                return data
+                            status = response.status
+                            headers = response.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                arb_logger.logger.error("Erro na requisição", error=str(e))
+                return None
+            except Exception as e:
+                arb_logger.logger.error("Erro inesperado", error=str(e))
+                return None
+
+            arb_logger.logger.error("Erro na requisição", status=status)
+            if status == 429:
+                wait_time = retry_after_seconds(headers)
+                if wait_time is None:
+                    # Sem cabeçalhos: exponential backoff com jitter
+                    wait_time = min(60, 2 ** (retry_count + 1)) + random.uniform(0, 1)
+                arb_logger.logger.info(f"Rate limit: pausando {ENDPOINT} por {wait_time:.2f} segundos")
+                self.limiter.throttle(ENDPOINT, wait_time)
+                continue
+            if status == 404:
+                arb_logger.logger.error("Recurso não encontrado (404)")
+            elif status == 400:
+                arb_logger.logger.error("Requisição inválida (400)")
+            else:
+                arb_logger.logger.error(f"Status code: {status}")
+            return None
+        return None
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,100 @@
+from multiprocessing import shared_memory
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+HEADER = np.dtype([("n_pairs", "<i8"), ("n_dexes", "<i8"), ("n_workers", "<i8"), ("reserved", "<i8")])
+
+
+class PriceBoard:
+    """
+    Quadro de reservas em memória compartilhada, com layout fixo:
+
+        header | done_block[n_workers] | seq[n_pairs] | block[n_pairs] | reserves[n_pairs, n_dexes, 2]
+
+    `reserves` tem o mesmo formato que o SpreadEngine consome ([reserva tokenIn, reserva tokenOut]
+    em float64), então o processo de decisão lê as linhas direto da memória, sem serialização.
+    Cada par tem um único escritor (o worker do seu shard); `seq` é um seqlock por par:
+    ímpar durante a escrita, e o leitor repete as linhas que mudaram no meio da cópia.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, n_pairs: int, n_dexes: int, n_workers: int,
+                 owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self.n_pairs, self.n_dexes, self.n_workers = n_pairs, n_dexes, n_workers
+        offset = HEADER.itemsize
+        self.header = np.ndarray((1,), HEADER, shm.buf, 0)
+        self.done_block = np.ndarray((n_workers,), np.int64, shm.buf, offset)
+        offset += 8 * n_workers
+        self.seq = np.ndarray((n_pairs,), np.uint64, shm.buf, offset)
+        offset += 8 * n_pairs
+        self.block = np.ndarray((n_pairs,), np.int64, shm.buf, offset)
+        offset += 8 * n_pairs
+        self.reserves = np.ndarray((n_pairs, n_dexes, 2), np.float64, shm.buf, offset)
+
+    @staticmethod
+    def size(n_pairs: int, n_dexes: int, n_workers: int) -> int:
+        return HEADER.itemsize + 8 * n_workers + 16 * n_pairs + 16 * n_pairs * n_dexes
+
+    @classmethod
+    def create(cls, n_pairs: int, n_dexes: int, n_workers: int, name: Optional[str] = None) -> "PriceBoard":
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.size(n_pairs, n_dexes, n_workers))
+        board = cls(shm, n_pairs, n_dexes, n_workers, owner=True)
+        board.header[0] = (n_pairs, n_dexes, n_workers, 0)
+        board.done_block[:] = -1
+        board.seq[:] = 0
+        board.block[:] = -1
+        board.reserves[:] = 0.0
+        return board
+
+    @classmethod
+    def attach(cls, name: str) -> "PriceBoard":
+        """Abre um quadro existente (nos workers); as dimensões vêm do header"""
+        shm = shared_memory.SharedMemory(name=name)
+        n_pairs, n_dexes, n_workers, _ = np.ndarray((1,), HEADER, shm.buf, 0)[0]
+        return cls(shm, int(n_pairs), int(n_dexes), int(n_workers))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, pair_index: int, block_number: int, reserves: np.ndarray):
+        """reserves: (n_dexes, 2) já normalizadas no sentido do par"""
+        self.seq[pair_index] += np.uint64(1)
+        self.reserves[pair_index] = reserves
+        self.block[pair_index] = block_number
+        self.seq[pair_index] += np.uint64(1)
+
+    def mark_done(self, worker: int, block_number: int):
+        self.done_block[worker] = block_number
+
+    def changed(self, seen: np.ndarray) -> np.ndarray:
+        """Índices dos pares escritos desde `seen` (o seq de cada par na última leitura)"""
+        return np.nonzero(self.seq != seen)[0]
+
+    def read(self, pair_indexes: Sequence[int], retries: int = 100) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Cópia consistente (reservas, blocos, seq) das linhas pedidas"""
+        rows = np.asarray(pair_indexes, dtype=np.intp)
+        reserves = np.empty((len(rows), self.n_dexes, 2))
+        blocks = np.empty(len(rows), dtype=np.int64)
+        seqs = np.empty(len(rows), dtype=np.uint64)
+        pending = np.arange(len(rows))
+        for _ in range(retries):
+            before = self.seq[rows[pending]].copy()
+            reserves[pending] = self.reserves[rows[pending]]
+            blocks[pending] = self.block[rows[pending]]
+            after = self.seq[rows[pending]]
+            seqs[pending] = before
+            torn = (before != after) | (before % 2 == 1)
+            pending = pending[torn]
+            if not len(pending):
+                break
+        return reserves, blocks, seqs
+
+    def close(self):
+        # As views numpy seguram o buffer: precisam sair antes do close
+        self.header = self.done_block = self.seq = self.block = self.reserves = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from utils.logger import QUOTE_CACHE_HITS, QUOTE_CACHE_MISSES
+
+
+class QuoteCache:
+    """Cache LRU de cotações, invalidado a cada novo bloco ou após o TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 2.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.block_number: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(src_token, dest_token, side, route, amount, other_exchange_prices=False) -> tuple:
+        return (
+            src_token.lower(),
+            dest_token.lower(),
+            side,
+            tuple(t.lower() for t in route) if route else None,
+            str(amount),
+            bool(other_exchange_prices)
+        )
+
+    def advance_block(self, block_number: int) -> bool:
+        """Registra o bloco atual; descarta tudo se ele mudou"""
+        if block_number == self.block_number:
+            return False
+        self.block_number = block_number
+        self._entries.clear()
+        return True
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if self.clock() - stored_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                QUOTE_CACHE_HITS.inc()
+                return value
+            del self._entries[key]
+        self.misses += 1
+        QUOTE_CACHE_MISSES.inc()
+        return None
+
+    def set(self, key: Hashable, value):
+        self._entries[key] = (self.clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,144 @@
+from typing import Optional
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson é opcional: json da stdlib, mais lento
+    from json import loads as json_loads
+
+
+class Quote:
+    """
+    Só os campos de um priceRoute da Paraswap que o pipeline usa, já convertidos.
+    O resto da resposta (otherExchangePrices, rotas completas) não sobrevive à decodificação.
+    """
+    __slots__ = ("src_token", "dest_token", "src_amount", "dest_amount", "src_usd", "dest_usd",
+                 "gas_cost_usd", "buy_exchange", "sell_exchange")
+
+    def __init__(self, src_token: str, dest_token: str, src_amount: int, dest_amount: int, src_usd: float,
+                 dest_usd: float, gas_cost_usd: float, buy_exchange: Optional[str] = None,
+                 sell_exchange: Optional[str] = None):
+        self.src_token = src_token
+        self.dest_token = dest_token
+        self.src_amount = src_amount
+        self.dest_amount = dest_amount
+        self.src_usd = src_usd
+        self.dest_usd = dest_usd
+        self.gas_cost_usd = gas_cost_usd
+        self.buy_exchange = buy_exchange
+        self.sell_exchange = sell_exchange
+
+    @classmethod
+    def from_price_route(cls, route: dict) -> "Quote":
+        buy_exchange = sell_exchange = None
+        best_route = route.get("bestRoute")
+        if best_route:
+            # Primeira perna compra, última vende
+            swaps = best_route[0]["swaps"]
+            buy_exchange = swaps[0]["swapExchanges"][0]["exchange"]
+            sell_exchange = swaps[-1]["swapExchanges"][0]["exchange"]
+        return cls(route.get("srcToken"), route.get("destToken"),
+                   int(route.get("srcAmount") or 0), int(route.get("destAmount") or 0),
+                   float(route.get("srcUSD") or 0), float(route.get("destUSD") or 0),
+                   float(route.get("gasCostUSD") or 0), buy_exchange, sell_exchange)
+
+    @property
+    def price_difference_percent(self) -> float:
+        """Diferença % entre o valor de saída e o de entrada, em USD"""
+        if self.src_usd == 0:
+            return 0.0
+        return (self.dest_usd - self.src_usd) / self.src_usd * 100
+
+    @property
+    def profit_after_costs(self) -> float:
+        """Spread medido pelo detect_arbitrage: diferença % menos o gas"""
+        return self.price_difference_percent - self.gas_cost_usd
+
+    def to_response(self) -> dict:
+        """Resposta mínima no formato da Paraswap (gravação e consumidores de dicts)"""
+        best_route = []
+        if self.buy_exchange is not None:
+            best_route = [{"percent": 100, "swaps": [
+                {"swapExchanges": [{"exchange": self.buy_exchange}]},
+                {"swapExchanges": [{"exchange": self.sell_exchange}]},
+            ]}]
+        return {"priceRoute": {
+            "srcToken": self.src_token, "destToken": self.dest_token,
+            "srcAmount": str(self.src_amount), "destAmount": str(self.dest_amount),
+            "srcUSD": repr(self.src_usd), "destUSD": repr(self.dest_usd),
+            "gasCostUSD": repr(self.gas_cost_usd), "bestRoute": best_route,
+        }}
+
+    def __eq__(self, other):
+        if not isinstance(other, Quote):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Quote({self.src_token} -> {self.dest_token}, {self.src_amount} -> {self.dest_amount})"
+
+
+def decode_quote(body: bytes) -> Optional[Quote]:
+    """Corpo de /prices -> Quote; None se a resposta não traz priceRoute"""
+    data = json_loads(body)
+    route = data.get("priceRoute") if isinstance(data, dict) else None
+    if not route:
+        return None
+    return Quote.from_price_route(route)
+
+
+def as_quote(data) -> Optional[Quote]:
+    """Aceita Quote (cliente com decode_quote) ou a resposta completa em dict"""
+    if data is None or isinstance(data, Quote):
+        return data
+    route = data.get("priceRoute")
+    return Quote.from_price_route(route) if route else None
+
+
+def as_response(data) -> dict:
+    """Resposta em dict para gravar: a original, ou a mínima reconstruída de um Quote"""
+    return data.to_response() if isinstance(data, Quote) else data
+
+
+class Opportunity:
+    """
+    Oportunidade detectada numa cotação. Aceita também o acesso por chave do antigo dict
+    (opportunity["tokenIn"]) usado por detectores do replay e pelo receipt_watcher.
+    """
+    __slots__ = ("token_in", "token_out", "gas_usd", "src_amount", "dest_amount", "price_difference_percent",
+                 "profit_after_costs", "buy_exchange", "sell_exchange", "profit_usd")
+
+    KEYS = {
+        "tokenIn": "token_in", "tokenOut": "token_out", "gasUSD": "gas_usd", "srcAmount": "src_amount",
+        "destAmount": "dest_amount", "priceDifferencePercent": "price_difference_percent",
+        "profitAfterCosts": "profit_after_costs", "profitUSD": "profit_usd",
+    }
+
+    def __init__(self, token_in: str, token_out: str, gas_usd: float, src_amount: int, dest_amount: int,
+                 price_difference_percent: float, profit_after_costs: float, buy_exchange: Optional[str] = None,
+                 sell_exchange: Optional[str] = None, profit_usd: Optional[float] = None):
+        self.token_in = token_in
+        self.token_out = token_out
+        self.gas_usd = gas_usd
+        self.src_amount = src_amount
+        self.dest_amount = dest_amount
+        self.price_difference_percent = price_difference_percent
+        self.profit_after_costs = profit_after_costs
+        self.buy_exchange = buy_exchange
+        self.sell_exchange = sell_exchange
+        self.profit_usd = profit_usd
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        return getattr(self, self.KEYS[key]) if key in self.KEYS else default
+
+    def __repr__(self):
+        return (f"Opportunity({self.token_in} -> {self.token_out}, "
+                f"{self.price_difference_percent:.4f}%, {self.buy_exchange}/{self.sell_exchange})")
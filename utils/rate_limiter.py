@@ -0,0 +1,134 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from utils.config import Lazy, get_config
+from utils.logger import RATE_LIMIT_THROTTLED, RATE_LIMIT_TOKENS
+
+# Valores de X-RateLimit-Reset acima disso são timestamps Unix, não segundos restantes
+_EPOCH_THRESHOLD = 10 ** 9
+
+
+class TokenBucket:
+    """Token bucket no formato GCRA: cada reserva recebe um horário de saída espaçado de 1/rate"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.interval = 1.0 / rate
+        self._tat = 0.0  # theoretical arrival time
+        self.throttled_until = 0.0
+        self.throttled_seconds = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Reserva um token e retorna quantos segundos aguardar antes de usá-lo"""
+        tolerance = (self.burst - 1) * self.interval
+        tat = max(self._tat, now, self.throttled_until)
+        start = max(now, tat - tolerance, self.throttled_until)
+        self._tat = tat + self.interval
+        return start - now
+
+    def release(self):
+        """Devolve a última reserva não usada (espera cancelada)"""
+        self._tat -= self.interval
+
+    def tokens(self, now: float) -> float:
+        if self.throttled_until > now:
+            return 0.0
+        backlog = max(0.0, self._tat - now)
+        return max(0.0, min(float(self.burst), self.burst - backlog / self.interval))
+
+    def throttle(self, now: float, seconds: float):
+        until = now + seconds
+        if until > self.throttled_until:
+            self.throttled_seconds += until - max(now, self.throttled_until)
+            self.throttled_until = until
+
+
+class RateLimiter:
+    """Limitador compartilhado por endpoint, sem bloquear o event loop"""
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        if endpoint not in self.buckets:
+            self.buckets[endpoint] = TokenBucket(self.rate, self.burst)
+        return self.buckets[endpoint]
+
+    async def acquire(self, endpoint: str):
+        """Aguarda a vez da requisição; respeita pausas impostas pelo servidor"""
+        bucket = self.bucket(endpoint)
+        while True:
+            wait = bucket.reserve(self.clock())
+            RATE_LIMIT_TOKENS.labels(endpoint=endpoint).set(bucket.tokens(self.clock()))
+            if wait > 0:
+                try:
+                    await asyncio.sleep(wait)
+                except asyncio.CancelledError:
+                    # Scan cancelado pelo próximo bloco: sem devolver o slot, a fila cresce a cada bloco
+                    bucket.release()
+                    raise
+            # Um 429 pode ter chegado enquanto esperávamos: nesse caso reagenda
+            if bucket.throttled_until <= self.clock():
+                return
+
+    def throttle(self, endpoint: str, seconds: float):
+        """Pausa apenas o endpoint afetado pela janela informada pelo servidor"""
+        bucket = self.bucket(endpoint)
+        before = bucket.throttled_seconds
+        bucket.throttle(self.clock(), seconds)
+        RATE_LIMIT_THROTTLED.labels(endpoint=endpoint).inc(bucket.throttled_seconds - before)
+        RATE_LIMIT_TOKENS.labels(endpoint=endpoint).set(0)
+
+    def metrics(self) -> Dict[str, dict]:
+        now = self.clock()
+        return {
+            endpoint: {
+                "tokens": bucket.tokens(now),
+                "throttled_for": max(0.0, bucket.throttled_until - now),
+                "throttled_seconds_total": bucket.throttled_seconds,
+            }
+            for endpoint, bucket in self.buckets.items()
+        }
+
+
+def retry_after_seconds(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Extrai a janela de espera de Retry-After / X-RateLimit-Reset (None se ausentes)"""
+    now = time.time() if now is None else now
+    waits = []
+
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            waits.append(float(retry_after))
+        except ValueError:
+            try:
+                waits.append(parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            value = float(reset)
+            waits.append(value - now if value > _EPOCH_THRESHOLD else value)
+        except ValueError:
+            pass
+
+    if not waits:
+        return None
+    return max(0.0, max(waits))
+
+
+def _paraswap_limiter() -> RateLimiter:
+    config = get_config()
+    return RateLimiter(rate=config.paraswap_rate_limit, burst=config.paraswap_rate_burst)
+
+
+# Limitador global das chamadas à Paraswap, criado da config compartilhada no primeiro uso
+paraswap_limiter = Lazy(_paraswap_limiter)
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from utils.logger import PENDING_TXS, arb_logger
+
+_INT_FIELDS = ("blockNumber", "cumulativeGasUsed", "effectiveGasPrice", "gasUsed", "status",
+               "transactionIndex", "type")
+_LOG_INT_FIELDS = ("blockNumber", "logIndex", "transactionIndex")
+
+
+def _to_int(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def format_receipt(raw: dict) -> AttributeDict:
+    """Converte o recibo cru do JSON-RPC (hex) no formato usado pelo web3 (receipt.status etc.)"""
+    receipt = dict(raw)
+    for field in _INT_FIELDS:
+        if field in receipt and receipt[field] is not None:
+            receipt[field] = _to_int(receipt[field])
+    for field in ("transactionHash", "blockHash"):
+        if receipt.get(field) is not None:
+            receipt[field] = HexBytes(receipt[field])
+    logs = []
+    for log in receipt.get("logs", []):
+        log = dict(log)
+        for field in _LOG_INT_FIELDS:
+            if field in log and log[field] is not None:
+                log[field] = _to_int(log[field])
+        log["topics"] = [HexBytes(t) for t in log.get("topics", [])]
+        log["data"] = HexBytes(log.get("data", "0x"))
+        for field in ("transactionHash", "blockHash"):
+            if log.get(field) is not None:
+                log[field] = HexBytes(log[field])
+        logs.append(AttributeDict(log))
+    receipt["logs"] = logs
+    return AttributeDict(receipt)
+
+
+class PendingTx:
+    __slots__ = ("tx_hash", "context", "sent_at", "sent_block")
+
+    def __init__(self, tx_hash: str, context: dict, sent_block: Optional[int]):
+        self.tx_hash = tx_hash
+        self.context = context
+        self.sent_at = time.monotonic()
+        self.sent_block = sent_block
+
+
+class ReceiptWatcher:
+    """
+    Acompanha transações enviadas sem bloquear o loop: a cada bloco, consulta os recibos
+    de todos os hashes pendentes em um único lote JSON-RPC e chama on_receipt.
+    """
+
+    def __init__(self, w3, on_receipt: Callable[[PendingTx, AttributeDict], Awaitable],
+                 on_timeout: Optional[Callable[[PendingTx], Awaitable]] = None,
+                 timeout_blocks: int = 50):
+        self.w3 = w3
+        self.on_receipt = on_receipt
+        self.on_timeout = on_timeout
+        self.timeout_blocks = timeout_blocks
+        self.pending: Dict[str, PendingTx] = {}
+        self.block_number: Optional[int] = None
+        self._polling = False
+
+    def track(self, tx_hash, **context) -> PendingTx:
+        tx_hash = HexBytes(tx_hash).hex()
+        if not tx_hash.startswith("0x"):
+            tx_hash = "0x" + tx_hash
+        pending = PendingTx(tx_hash, context, self.block_number)
+        self.pending[tx_hash] = pending
+        PENDING_TXS.set(len(self.pending))
+        return pending
+
+    def _fetch_receipts(self, hashes: List[str]) -> Dict[str, Optional[AttributeDict]]:
+        """Um lote eth_getTransactionReceipt; recai em chamadas individuais se o provider não suporta lote"""
+        requests = [("eth_getTransactionReceipt", [h]) for h in hashes]
+        make_batch = getattr(self.w3.provider, "make_batch_request", None)
+        if make_batch is not None:
+            responses = make_batch(requests)
+        else:
+            responses = [self.w3.provider.make_request(method, params) for method, params in requests]
+
+        receipts = {}
+        for tx_hash, response in zip(hashes, responses):
+            if response.get("error"):
+                arb_logger.logger.error("Erro ao consultar recibo", tx_hash=tx_hash, error=str(response["error"]))
+            result = response.get("result")
+            receipts[tx_hash] = format_receipt(result) if result else None
+        return receipts
+
+    async def poll(self):
+        """Consulta todos os pendentes de uma vez e dispara os callbacks dos confirmados"""
+        if not self.pending or self._polling:
+            return
+        self._polling = True
+        try:
+            loop = asyncio.get_running_loop()
+            hashes = list(self.pending)
+            receipts = await loop.run_in_executor(None, self._fetch_receipts, hashes)
+            for tx_hash, receipt in receipts.items():
+                if receipt is None:
+                    continue
+                pending = self.pending.pop(tx_hash, None)
+                if pending is None:
+                    continue
+                arb_logger.observe_stage("receipt", time.monotonic() - pending.sent_at)
+                try:
+                    await self.on_receipt(pending, receipt)
+                except Exception as e:
+                    arb_logger.logger.error("Erro ao processar recibo", tx_hash=tx_hash, error=str(e))
+        except Exception as e:
+            arb_logger.logger.error("Erro ao consultar recibos", error=str(e))
+        finally:
+            self._polling = False
+            PENDING_TXS.set(len(self.pending))
+
+    def _expire(self):
+        expired = [p for p in self.pending.values() if self.block_number - p.sent_block > self.timeout_blocks]
+        for pending in expired:
+            del self.pending[pending.tx_hash]
+        PENDING_TXS.set(len(self.pending))
+        return expired
+
+    async def on_block(self, block_number: int):
+        self.block_number = block_number
+        # Enviadas antes do primeiro bloco visto: o prazo conta a partir dele
+        for pending in self.pending.values():
+            if pending.sent_block is None:
+                pending.sent_block = block_number
+        await self.poll()
+        for pending in self._expire():
+            arb_logger.logger.error("Transação sem recibo", tx_hash=pending.tx_hash,
+                                    blocks=block_number - pending.sent_block)
+            if self.on_timeout is not None:
+                await self.on_timeout(pending)
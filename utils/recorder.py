@@ -0,0 +1,188 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections import namedtuple
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from utils.reserves import Reserves, ReserveSnapshot
+
+KIND_QUOTE = 1
+KIND_RESERVES = 2
+
+# Cabeçalho de cada registro no arquivo de dados: bloco, tipo e tamanho do payload comprimido
+HEADER = struct.Struct("<QBI")
+# Índice: uma entrada (bloco, offset) por registro, ordenado por bloco
+INDEX_DTYPE = np.dtype([("block", "<u8"), ("offset", "<u8")])
+
+Record = namedtuple("Record", ["block_number", "kind", "payload"])
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+
+class Recorder:
+    """
+    Grava cotações e snapshots de reservas em um arquivo append-only: cada registro é um
+    JSON comprimido com zlib, e um índice ao lado aponta o offset de cada bloco.
+    """
+
+    def __init__(self, path: str, level: int = 6):
+        self.path = path
+        self.level = level
+        self.block_number = 0
+        self.records = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._data = open(path, "ab")
+        self._index = open(_index_path(path), "ab")
+        self._last_block = self._read_last_block()
+
+    def _read_last_block(self) -> int:
+        size = os.path.getsize(_index_path(self.path))
+        if size < INDEX_DTYPE.itemsize:
+            return 0
+        with open(_index_path(self.path), "rb") as f:
+            f.seek(size - size % INDEX_DTYPE.itemsize - INDEX_DTYPE.itemsize)
+            return int(np.frombuffer(f.read(INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)["block"][0])
+
+    def advance_block(self, block_number: int):
+        """Bloco atribuído aos próximos registros; o bloco anterior vai para o disco"""
+        if block_number != self.block_number:
+            self.flush()
+        self.block_number = block_number
+
+    def _append(self, kind: int, payload: dict, block_number: Optional[int] = None):
+        block_number = self.block_number if block_number is None else block_number
+        # O índice só é útil ordenado: blocos nunca andam para trás no arquivo
+        block_number = max(block_number, self._last_block)
+        body = zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), self.level)
+        offset = self._data.tell()
+        self._data.write(HEADER.pack(block_number, kind, len(body)))
+        self._data.write(body)
+        self._index.write(np.array([(block_number, offset)], dtype=INDEX_DTYPE).tobytes())
+        self._last_block = block_number
+        self.records += 1
+
+    def record_quote(self, params: dict, data: dict, source: str = "scan", block_number: Optional[int] = None):
+        """source: "scan" para cotações da varredura, "ladder" para as do dimensionamento"""
+        self._append(KIND_QUOTE, {"source": source, "params": params, "data": data}, block_number)
+
+    def record_snapshot(self, snapshot: ReserveSnapshot, pair_indexes: Optional[Sequence[int]] = None):
+        """Grava as reservas do bloco (só dos pares informados, se houver)"""
+        wanted = None if pair_indexes is None else set(pair_indexes)
+        reserves = [[pair_index, dex, r.reserve_in, r.reserve_out]
+                    for (pair_index, dex), r in snapshot.reserves.items()
+                    if wanted is None or pair_index in wanted]
+        self._append(KIND_RESERVES, {"reserves": reserves}, snapshot.block_number)
+
+    def flush(self):
+        self._data.flush()
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """Leitura de uma gravação via mmap: só os registros percorridos são descomprimidos"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data_file = open(path, "rb")
+        self._index_file = open(_index_path(path), "rb")
+        self._data = self._mmap(self._data_file)
+        self._raw_index = self._mmap(self._index_file)
+        if self._raw_index is None:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        else:
+            # Entrada parcial no fim (escrita interrompida) é ignorada
+            count = len(self._raw_index) // INDEX_DTYPE.itemsize
+            self.index = np.frombuffer(self._raw_index, dtype=INDEX_DTYPE, count=count)
+
+    @staticmethod
+    def _mmap(f):
+        # Arquivo vazio não pode ser mapeado
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def first_block(self) -> Optional[int]:
+        return int(self.index["block"][0]) if len(self.index) else None
+
+    @property
+    def last_block(self) -> Optional[int]:
+        return int(self.index["block"][-1]) if len(self.index) else None
+
+    def _read(self, offset: int) -> Optional[Record]:
+        end = offset + HEADER.size
+        if self._data is None or end > len(self._data):
+            return None
+        block_number, kind, length = HEADER.unpack_from(self._data, offset)
+        if end + length > len(self._data):
+            # Registro incompleto (processo interrompido durante a escrita)
+            return None
+        payload = json.loads(zlib.decompress(self._data[end:end + length]))
+        return Record(block_number, kind, payload)
+
+    def records(self, from_block: Optional[int] = None, to_block: Optional[int] = None,
+                kinds: Optional[Sequence[int]] = None) -> Iterator[Record]:
+        """Registros em ordem de gravação, localizando o primeiro bloco por busca binária no índice"""
+        blocks = self.index["block"]
+        start = 0 if from_block is None else int(np.searchsorted(blocks, from_block, side="left"))
+        stop = len(blocks) if to_block is None else int(np.searchsorted(blocks, to_block, side="right"))
+        kinds = None if kinds is None else set(kinds)
+        for offset in self.index["offset"][start:stop]:
+            record = self._read(int(offset))
+            if record is None:
+                return
+            if kinds is None or record.kind in kinds:
+                yield record
+
+    def blocks(self, from_block: Optional[int] = None, to_block: Optional[int] = None):
+        """Agrupa os registros por bloco: (bloco, [registros])"""
+        current, batch = None, []
+        for record in self.records(from_block, to_block):
+            if record.block_number != current and batch:
+                yield current, batch
+                batch = []
+            current = record.block_number
+            batch.append(record)
+        if batch:
+            yield current, batch
+
+    def close(self):
+        # O array do índice aponta para o mmap: precisa ser solto antes de fechá-lo
+        self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        for handle in (self._data, self._raw_index, self._data_file, self._index_file):
+            if handle is not None:
+                handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def snapshot_from_record(record: Record) -> ReserveSnapshot:
+    reserves = {(pair_index, dex): Reserves(reserve_in, reserve_out, 0)
+                for pair_index, dex, reserve_in, reserve_out in record.payload["reserves"]}
+    return ReserveSnapshot(record.block_number, reserves)
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.quotes import as_quote
+from utils.recorder import KIND_QUOTE, KIND_RESERVES, Record, Recording, snapshot_from_record
+from utils.reserves import Reserves, ReserveSnapshot
+from utils.trade_sizer import TokenDecimals, TradeSizer, net_profit_usd
+
+ReplayStats = namedtuple("ReplayStats", [
+    "blocks", "quotes", "snapshots", "opportunities", "profit_usd", "elapsed"
+])
+
+
+class ReplayClient:
+    """Responde get_prices com as cotações gravadas no bloco em reprodução"""
+
+    def __init__(self):
+        self._quotes: Dict[Tuple[str, str, str], List[Tuple[int, dict]]] = {}
+
+    def load(self, records: Sequence[Record]):
+        self._quotes = {}
+        for record in records:
+            if record.kind != KIND_QUOTE:
+                continue
+            params = record.payload["params"]
+            key = (params["srcToken"].lower(), params["destToken"].lower(), params.get("side", "SELL"))
+            self._quotes.setdefault(key, []).append((int(params["amount"]), record.payload["data"]))
+
+    async def get_prices(self, src_token: str, dest_token: str, side: str = "SELL", route=None,
+                         other_exchange_prices: bool = False, amount="0") -> Optional[dict]:
+        """Cotação gravada com o mesmo valor ou, na falta dela, a de valor mais próximo"""
+        quotes = self._quotes.get((src_token.lower(), dest_token.lower(), side))
+        if not quotes:
+            return None
+        amount = max(1, int(amount))
+        return min(quotes, key=lambda q: abs(math.log(max(q[0], 1) / amount)))[1]
+
+
+class Replayer:
+    """
+    Reproduz uma gravação pelo pipeline de detecção e dimensionamento sem rede nem espera:
+    cotações "scan" passam por `detect` (e pelo TradeSizer), snapshots pelo SpreadEngine.
+    """
+
+    def __init__(self, recording: Recording, detect: Optional[Callable[[dict], Optional[dict]]] = None,
+                 engine=None, n_pairs: int = 0, flash_fee: float = 0.0, sizing: bool = True,
+                 decimals: Optional[TokenDecimals] = None, steps: int = 6, reference_usd: float = 1000.0):
+        self.recording = recording
+        self.detect = detect
+        self.engine = engine
+        self.n_pairs = n_pairs
+        self.flash_fee = flash_fee
+        self.client = ReplayClient()
+        self.sizer = TradeSizer(self.client, decimals or TokenDecimals(), flash_fee=flash_fee, steps=steps,
+                                reference_usd=reference_usd) if sizing else None
+        self.reserves: Dict[Tuple[int, str], Reserves] = {}
+
+    async def _replay_quote(self, record: Record, on_opportunity):
+        data = record.payload["data"]
+        quote = as_quote(data)
+        if self.sizer is not None and quote is not None:
+            self.sizer.observe(quote)
+        opportunity = self.detect(data) if self.detect is not None else None
+        if not opportunity:
+            return 0, 0.0
+        if self.sizer is not None:
+            sized = await self.sizer.size(opportunity["tokenIn"], opportunity["tokenOut"])
+            if sized is None:
+                return 0, 0.0
+            profit = sized.profit_usd
+        else:
+            profit = net_profit_usd(quote, self.flash_fee)
+        if on_opportunity is not None:
+            on_opportunity(record.block_number, opportunity, profit)
+        return 1, profit
+
+    def _replay_snapshot(self, record: Record, on_opportunity):
+        if self.engine is None:
+            return 0, 0.0
+        # Snapshots trazem só os pares alterados: o estado completo é acumulado aqui
+        changed = snapshot_from_record(record)
+        self.reserves.update(changed.reserves)
+        pair_indexes = sorted({pair_index for pair_index, _ in changed.reserves})
+        reserves = self.engine.reserves_from_snapshot(ReserveSnapshot(record.block_number, self.reserves),
+                                                      self.n_pairs, pair_indexes)
+        opportunities = self.engine.scan(reserves, pair_indexes=pair_indexes)
+        if on_opportunity is not None:
+            for opportunity in opportunities:
+                on_opportunity(record.block_number, opportunity, opportunity.profit_usd)
+        return len(opportunities), sum(o.profit_usd for o in opportunities)
+
+    async def run(self, from_block: Optional[int] = None, to_block: Optional[int] = None,
+                  on_opportunity=None) -> ReplayStats:
+        start = time.perf_counter()
+        blocks = quotes = snapshots = found = 0
+        profit = 0.0
+        for _, records in self.recording.blocks(from_block, to_block):
+            blocks += 1
+            self.client.load(records)
+            for record in records:
+                if record.kind == KIND_QUOTE:
+                    if record.payload.get("source") != "scan":
+                        continue
+                    quotes += 1
+                    count, value = await self._replay_quote(record, on_opportunity)
+                elif record.kind == KIND_RESERVES:
+                    snapshots += 1
+                    count, value = self._replay_snapshot(record, on_opportunity)
+                else:
+                    continue
+                found += count
+                profit += value
+        return ReplayStats(blocks, quotes, snapshots, found, profit, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest de uma gravação do monitor")
+    parser.add_argument("path", help="Arquivo gravado com RECORD_PATH")
+    parser.add_argument("--from-block", type=int)
+    parser.add_argument("--to-block", type=int)
+    parser.add_argument("--min-profit", type=float, help="MIN_PROFIT_THRESHOLD a testar")
+    parser.add_argument("--no-sizing", action="store_true", help="Avalia só no tamanho cotado")
+    parser.add_argument("--detector", default="monitor:detect_arbitrage",
+                        help="Função de detecção (módulo:função)")
+    args = parser.parse_args(argv)
+
+    if args.min_profit is not None:
+        # Lido pelo monitor na importação
+        os.environ["MIN_PROFIT_THRESHOLD"] = str(args.min_profit)
+    module_name, function_name = args.detector.split(":")
+    module = importlib.import_module(module_name)
+    detect = getattr(module, function_name)
+
+    from utils.config import get_config
+    from utils.spread_engine import SpreadEngine
+    # Mesma config do monitor (lida após o override de MIN_PROFIT_THRESHOLD acima)
+    config = get_config()
+    flash_fee = config.flash_loan_fee
+    engine = SpreadEngine([name for name, _ in config.dexes], flash_fee=flash_fee)
+
+    with Recording(args.path) as recording:
+        replayer = Replayer(recording, detect, engine, n_pairs=len(getattr(module, "PAIRS", [])),
+                            flash_fee=flash_fee, sizing=not args.no_sizing)
+        stats = asyncio.run(replayer.run(args.from_block, args.to_block))
+    print(json.dumps(stats._asdict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from eth_abi import decode
+from web3 import Web3
+
+from utils.logger import arb_logger
+from utils.reserves import ReserveReader, Reserves, ReserveSnapshot
+
+# event Sync(uint112 reserve0, uint112 reserve1) dos pares UniswapV2
+SYNC_TOPIC = bytes(Web3.keccak(text="Sync(uint112,uint112)"))
+
+
+class ReserveState:
+    """Reservas mantidas em memória: bootstrap via Multicall e depois só eventos Sync"""
+
+    def __init__(self, reader: ReserveReader, chunk_size: int = 2000):
+        self.reader = reader
+        self.w3 = reader.w3
+        self.chunk_size = chunk_size
+        self.block_number: Optional[int] = None
+        self.reserves: Dict[Tuple[int, str], Reserves] = {}
+        self.dirty: Set[int] = set()
+        # Um mesmo pool pode atender mais de um par monitorado (ex.: A/B e B/A)
+        self._keys_by_pool: Dict[str, List[Tuple[int, str]]] = {}
+        self._last_event: Dict[str, Tuple[int, int]] = {}
+        # poll roda numa thread do executor que o cancelamento do scan não interrompe:
+        # serializa polls sobrepostos para não aplicar o mesmo intervalo duas vezes
+        self._lock = threading.Lock()
+
+    def bootstrap(self, block_identifier="latest"):
+        """Lê todas as reservas uma única vez e marca todos os pares para avaliação"""
+        snapshot = self.reader.fetch(block_identifier)
+        self.block_number = snapshot.block_number
+        self.reserves = dict(snapshot.reserves)
+        self._keys_by_pool = {}
+        for key, address in self.reader.pair_addresses.items():
+            self._keys_by_pool.setdefault(address.lower(), []).append(key)
+        self.dirty = {pair_index for pair_index, _ in self.reserves}
+
+    def ingest_logs(self, logs) -> Set[int]:
+        """Aplica eventos Sync na ordem da chain e retorna os pares alterados"""
+        changed = set()
+        for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+            topics = log["topics"]
+            if not topics or bytes(topics[0]) != SYNC_TOPIC:
+                continue
+            address = log["address"].lower()
+            keys = self._keys_by_pool.get(address)
+            if not keys:
+                continue
+            position = (log["blockNumber"], log["logIndex"])
+            if position <= self._last_event.get(address, (-1, -1)):
+                continue
+            self._last_event[address] = position
+
+            reserve0, reserve1 = decode(["uint112", "uint112"], bytes(log["data"]))
+            for key in keys:
+                if self.reader.is_reversed(key):
+                    self.reserves[key] = Reserves(reserve1, reserve0, 0)
+                else:
+                    self.reserves[key] = Reserves(reserve0, reserve1, 0)
+                changed.add(key[0])
+        self.dirty |= changed
+        return changed
+
+    def _get_logs(self, from_block: int, to_block: int) -> list:
+        """eth_getLogs em blocos de até chunk_size; reduz o intervalo se o nó recusar"""
+        logs = []
+        addresses = list(self.reader.pair_addresses.values())
+        start = from_block
+        chunk = self.chunk_size
+        while start <= to_block:
+            end = min(to_block, start + chunk - 1)
+            try:
+                logs.extend(self.w3.eth.get_logs({
+                    "fromBlock": start,
+                    "toBlock": end,
+                    "address": addresses,
+                    "topics": ["0x" + SYNC_TOPIC.hex()]
+                }))
+            except Exception as e:
+                if chunk == 1:
+                    raise
+                chunk = max(1, chunk // 2)
+                arb_logger.logger.info("Reduzindo intervalo do eth_getLogs", chunk=chunk, error=str(e))
+                continue
+            start = end + 1
+        return logs
+
+    def poll(self, to_block: Optional[int] = None) -> Set[int]:
+        """Avança até to_block (ou o bloco atual) e retorna os pares com reservas alteradas"""
+        with self._lock:
+            return self._poll(to_block)
+
+    def _poll(self, to_block: Optional[int]) -> Set[int]:
+        if self.block_number is None:
+            self.bootstrap()
+            return set(self.dirty)
+        if to_block is None:
+            to_block = self.w3.eth.block_number
+        if to_block <= self.block_number:
+            return set()
+        changed = self.ingest_logs(self._get_logs(self.block_number + 1, to_block))
+        self.block_number = to_block
+        return changed
+
+    def snapshot(self) -> ReserveSnapshot:
+        with self._lock:
+            return ReserveSnapshot(self.block_number, self.reserves)
+
+    def take_dirty(self) -> List[int]:
+        with self._lock:
+            dirty = sorted(self.dirty)
+            self.dirty = set()
+        return dirty
+
+    def detect_opportunities(self, engine, **kwargs):
+        """
+        Reavalia apenas os pares cujas reservas mudaram desde a última chamada.
+        gas_cost/token_values, se informados, cobrem todos os pares e são recortados aqui.
+        """
+        dirty = self.take_dirty()
+        if not dirty:
+            return []
+        for name in ("gas_cost", "token_values"):
+            if kwargs.get(name) is not None:
+                kwargs[name] = np.asarray(kwargs[name])[dirty]
+        reserves = engine.reserves_from_snapshot(self.snapshot(), len(self.reader.pairs), dirty)
+        return engine.scan(reserves, pair_indexes=dirty, **kwargs)
@@ -0,0 +1,141 @@
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+# Multicall3 tem o mesmo endereço em todas as redes EVM, incluindo a Polygon
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+DEFAULT_FEE_BPS = 30  # 0,3% em forks UniswapV2 (QuickSwap, SushiSwap)
+
+
+def _selector(signature: str) -> bytes:
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+TRY_BLOCK_AND_AGGREGATE = _selector("tryBlockAndAggregate(bool,(address,bytes)[])")
+GET_RESERVES = _selector("getReserves()")
+TOKEN0 = _selector("token0()")
+FACTORY = _selector("factory()")
+GET_PAIR = _selector("getPair(address,address)")
+
+# Reservas orientadas no sentido do par monitorado (srcToken -> destToken)
+Reserves = namedtuple("Reserves", ["reserve_in", "reserve_out", "timestamp"])
+ReserveSnapshot = namedtuple("ReserveSnapshot", ["block_number", "reserves"])
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = DEFAULT_FEE_BPS) -> int:
+    """Mesma fórmula de UniswapV2Library.getAmountOut, em inteiros"""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * (10000 - fee_bps)
+    return (amount_in_with_fee * reserve_out) // (reserve_in * 10000 + amount_in_with_fee)
+
+
+def encode_multicall(calls: Sequence[Tuple[str, bytes]]) -> bytes:
+    """Codifica tryBlockAndAggregate(false, calls): falhas individuais não revertem o lote"""
+    payload = [(Web3.to_checksum_address(target), data) for target, data in calls]
+    return TRY_BLOCK_AND_AGGREGATE + encode(["bool", "(address,bytes)[]"], [False, payload])
+
+
+def decode_multicall(raw: bytes) -> Tuple[int, List[Optional[bytes]]]:
+    """Retorna (bloco, [returnData ou None para chamadas que falharam])"""
+    block_number, _, results = decode(["uint256", "bytes32", "(bool,bytes)[]"], bytes(raw))
+    return block_number, [data if success and data else None for success, data in results]
+
+
+class ReserveReader:
+    """Lê getReserves de todos os pares (par, dex) monitorados em um único eth_call por bloco"""
+
+    def __init__(self, w3, pairs: Sequence[dict], dexes: Sequence[Tuple[str, str]],
+                 multicall_address: str = MULTICALL3_ADDRESS,
+                 fees_bps: Optional[Dict[str, int]] = None,
+                 pair_addresses: Optional[Dict[Tuple[int, str], str]] = None):
+        """
+        pairs: lista de {"srcToken", "destToken"} (mesmo formato de monitor.PAIRS)
+        dexes: [(nome, router)] na ordem do mapping `dexes` do ArbitrageBot
+        pair_addresses: endereços de pool conhecidos, dispensando a consulta à factory
+        """
+        self.w3 = w3
+        self.pairs = list(pairs)
+        self.dexes = list(dexes)
+        self.multicall_address = multicall_address
+        self.fees_bps = fees_bps or {}
+        self.pair_addresses: Dict[Tuple[int, str], str] = dict(pair_addresses or {})
+        self._reversed: Dict[Tuple[int, str], bool] = {}
+        self._resolved = False
+
+    def _multicall(self, calls: Sequence[Tuple[str, bytes]], block_identifier="latest"):
+        raw = self.w3.eth.call({"to": self.multicall_address, "data": encode_multicall(calls)},
+                               block_identifier)
+        return decode_multicall(raw)
+
+    def resolve_pairs(self):
+        """Descobre (uma vez) o endereço e a orientação token0/token1 de cada pool"""
+        missing = [(i, name) for i in range(len(self.pairs)) for name, _ in self.dexes
+                   if (i, name) not in self.pair_addresses]
+        if missing:
+            routers = dict(self.dexes)
+            names = sorted({name for _, name in missing})
+            _, factories = self._multicall([(routers[name], FACTORY) for name in names])
+            factory_of = {
+                name: Web3.to_checksum_address(decode(["address"], data)[0])
+                for name, data in zip(names, factories) if data
+            }
+            lookups = [(key, factory_of[key[1]]) for key in missing if key[1] in factory_of]
+            _, results = self._multicall([
+                (factory, GET_PAIR + encode(["address", "address"], [
+                    Web3.to_checksum_address(self.pairs[i]["srcToken"]),
+                    Web3.to_checksum_address(self.pairs[i]["destToken"])
+                ]))
+                for (i, _), factory in lookups
+            ])
+            for (key, _), data in zip(lookups, results):
+                if data:
+                    address = decode(["address"], data)[0]
+                    if int(address, 16) != 0:
+                        self.pair_addresses[key] = Web3.to_checksum_address(address)
+
+        unresolved = [key for key in self.pair_addresses if key not in self._reversed]
+        if unresolved:
+            _, results = self._multicall([(self.pair_addresses[key], TOKEN0) for key in unresolved])
+            for key, data in zip(unresolved, results):
+                if data:
+                    token0 = decode(["address"], data)[0]
+                    self._reversed[key] = token0.lower() != self.pairs[key[0]]["srcToken"].lower()
+        self._resolved = True
+
+    def is_reversed(self, key: Tuple[int, str]) -> bool:
+        """True se o token0 do pool é o destToken do par"""
+        return self._reversed.get(key, False)
+
+    def fetch(self, block_identifier="latest") -> ReserveSnapshot:
+        """Lê as reservas de todo o universo monitorado num único eth_call"""
+        if not self._resolved:
+            self.resolve_pairs()
+
+        keys = [key for key in self.pair_addresses if key in self._reversed]
+        block_number, results = self._multicall(
+            [(self.pair_addresses[key], GET_RESERVES) for key in keys], block_identifier
+        )
+        reserves = {}
+        for key, data in zip(keys, results):
+            if not data:
+                continue
+            reserve0, reserve1, timestamp = decode(["uint112", "uint112", "uint32"], data)
+            if self._reversed[key]:
+                reserve0, reserve1 = reserve1, reserve0
+            reserves[key] = Reserves(reserve0, reserve1, timestamp)
+        return ReserveSnapshot(block_number, reserves)
+
+    def quote(self, snapshot: ReserveSnapshot, pair_index: int, dex: str, amount_in: int,
+              reverse: bool = False) -> int:
+        """Saída constant-product calculada localmente a partir do snapshot"""
+        reserves = snapshot.reserves.get((pair_index, dex))
+        if reserves is None:
+            return 0
+        reserve_in, reserve_out = reserves.reserve_in, reserves.reserve_out
+        if reverse:
+            reserve_in, reserve_out = reserve_out, reserve_in
+        return get_amount_out(amount_in, reserve_in, reserve_out, self.fees_bps.get(dex, DEFAULT_FEE_BPS))
@@ -0,0 +1,261 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from eth_utils import to_bytes
+from web3 import Web3
+from web3._utils.encoding import FriendlyJsonSerde, Web3JsonEncoder
+from web3.providers import HTTPProvider, JSONBaseProvider
+
+from utils.logger import RPC_ERRORS, RPC_HEDGED, RPC_LATENCY, arb_logger
+
+# Erros JSON-RPC que indicam problema do nó (rate limit, sobrecarga), não da chamada
+RETRYABLE_CODES = {-32005, -32098, -32099, 429}
+# Envios não são duplicados por hedge (só vão ao próximo nó se o atual falhar)
+NO_HEDGE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+# Filtros existem só no nó que os criou: ficam presos a ele
+FILTER_METHODS = {"eth_newFilter", "eth_newBlockFilter", "eth_newPendingTransactionFilter",
+                  "eth_getFilterChanges", "eth_getFilterLogs", "eth_uninstallFilter"}
+
+
+class RpcEndpointError(Exception):
+    pass
+
+
+def endpoint_label(uri: str) -> str:
+    """Só o host: URLs de RPC costumam carregar a API key no caminho"""
+    return urlparse(uri).netloc or uri
+
+
+def _pooled_session(pool_size: int) -> requests.Session:
+    # Conexões keep-alive reaproveitadas entre as threads que usam o endpoint
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class BatchHTTPProvider(HTTPProvider):
+    """HTTPProvider cujos lotes numeram as chamadas 0..n-1: o RpcPool casa cada resposta pelo id"""
+
+    def encode_batch_rpc_request(self, requests) -> bytes:
+        serde = FriendlyJsonSerde()
+        return b"[" + b", ".join(
+            to_bytes(text=serde.json_encode({"jsonrpc": "2.0", "method": method, "params": params or [], "id": i},
+                                            Web3JsonEncoder))
+            for i, (method, params) in enumerate(requests)
+        ) + b"]"
+
+
+def match_batch(requests: Sequence, responses: list) -> List[Optional[dict]]:
+    """Respostas na ordem dos pedidos, pelo id (0..n-1); None onde o nó não respondeu"""
+    by_id = {response.get("id"): response for response in responses if isinstance(response, dict)}
+    return [by_id.get(i) for i in range(len(requests))]
+
+
+class Endpoint:
+    __slots__ = ("uri", "label", "provider", "latency", "failures", "cooldown_until")
+
+    def __init__(self, uri: str, provider):
+        self.uri = uri
+        self.label = endpoint_label(uri)
+        self.provider = provider
+        # Média móvel exponencial da latência; 0 = ainda não medido (é experimentado primeiro)
+        self.latency = 0.0
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+
+class RpcPool(JSONBaseProvider):
+    """
+    Provider web3 sobre vários endpoints: cada chamada vai ao nó com menor latência recente,
+    nós que falham ficam em quarentena, e chamadas lentas são duplicadas (hedge) no próximo nó.
+    Chamadas concorrentes de várias threads dentro de `batch_window` viram um único lote JSON-RPC.
+    """
+
+    def __init__(self, endpoints: Sequence[Union[str, Tuple[str, Any]]], timeout: float = 10.0,
+                 hedge_after: Optional[float] = 1.0, batch_window: float = 0.002, cooldown: float = 30.0,
+                 alpha: float = 0.3, pool_size: int = 20, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        if not endpoints:
+            raise ValueError("Nenhum endpoint RPC configurado")
+        self.endpoints = []
+        self._sessions: List[requests.Session] = []
+        for endpoint in endpoints:
+            # Aceita URIs ou pares (uri, provider) já construídos
+            if isinstance(endpoint, str):
+                session = _pooled_session(pool_size)
+                self._sessions.append(session)
+                provider = BatchHTTPProvider(endpoint, request_kwargs={"timeout": timeout}, session=session)
+                self.endpoints.append(Endpoint(endpoint, provider))
+            else:
+                self.endpoints.append(Endpoint(*endpoint))
+        self.hedge_after = hedge_after
+        self.batch_window = batch_window
+        # Quem espera o lote de outra thread desiste depois da janela mais um timeout por nó
+        self.wait_timeout = batch_window + timeout * len(self.endpoints)
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._queue: List[Tuple[str, Any, Future]] = []
+        self._filter_endpoint: Optional[Endpoint] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(2, len(self.endpoints) * 2),
+                                            thread_name_prefix="rpc-hedge")
+
+    def __str__(self):
+        return f"RpcPool({', '.join(e.label for e in self.endpoints)})"
+
+    def ranked(self) -> List[Endpoint]:
+        """Saudáveis por latência; os em quarentena ficam no fim, como último recurso"""
+        now = self.clock()
+        return sorted(self.endpoints, key=lambda e: (e.cooldown_until > now, e.latency))
+
+    def _record(self, endpoint: Endpoint, elapsed: float):
+        RPC_LATENCY.labels(endpoint=endpoint.label).observe(elapsed)
+        with self._lock:
+            endpoint.latency = elapsed if endpoint.latency == 0 else (
+                self.alpha * elapsed + (1 - self.alpha) * endpoint.latency)
+            endpoint.failures = 0
+            endpoint.cooldown_until = 0.0
+
+    def _fail(self, endpoint: Endpoint, error: Exception):
+        RPC_ERRORS.labels(endpoint=endpoint.label).inc()
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.cooldown_until = self.clock() + self.cooldown
+        arb_logger.logger.info("Endpoint RPC com falha", endpoint=endpoint.label, error=str(error))
+
+    @staticmethod
+    def _check(response):
+        responses = response if isinstance(response, list) else [response]
+        for item in responses:
+            error = item.get("error") if isinstance(item, dict) else None
+            if isinstance(error, dict) and error.get("code") in RETRYABLE_CODES:
+                raise RpcEndpointError(error.get("message", str(error)))
+        if not isinstance(response, (list, dict)):
+            raise RpcEndpointError(f"Resposta inválida: {response!r}")
+
+    def _attempt(self, endpoint: Endpoint, call: Callable[[Any], Any]):
+        start = time.perf_counter()
+        try:
+            response = call(endpoint.provider)
+            self._check(response)
+        except Exception as e:
+            self._fail(endpoint, e)
+            raise
+        self._record(endpoint, time.perf_counter() - start)
+        return response
+
+    def _dispatch(self, call: Callable[[Any], Any], hedge: bool = True, expect_list: bool = False):
+        """Tenta os endpoints em ordem; com hedge, dispara o próximo se o atual passar de hedge_after"""
+        remaining = self.ranked()
+        if expect_list:
+            # Um lote que volta como um único objeto de erro é falha do nó
+            def call(provider, _call=call):
+                response = _call(provider)
+                if not isinstance(response, list):
+                    raise RpcEndpointError(str(response.get("error", response)))
+                return response
+
+        last_error: Optional[Exception] = None
+        if not hedge or self.hedge_after is None or len(remaining) < 2:
+            for endpoint in remaining:
+                try:
+                    return self._attempt(endpoint, call)
+                except Exception as e:
+                    last_error = e
+            raise last_error
+
+        futures = {self._executor.submit(self._attempt, remaining.pop(0), call)}
+        while futures:
+            done, _ = wait(futures, timeout=self.hedge_after if remaining else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # Nó lento: a mesma chamada segue em paralelo no próximo; vale a primeira resposta
+                RPC_HEDGED.inc()
+                futures.add(self._executor.submit(self._attempt, remaining.pop(0), call))
+                continue
+            for future in done:
+                futures.discard(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    if remaining:
+                        futures.add(self._executor.submit(self._attempt, remaining.pop(0), call))
+        raise last_error
+
+    def _flush(self):
+        """Envia como um lote tudo que chegou durante a janela"""
+        with self._lock:
+            items, self._queue = self._queue, []
+        if len(items) == 1:
+            method, params, future = items[0]
+            try:
+                future.set_result(self._dispatch(lambda p: p.make_request(method, params)))
+            except Exception as e:
+                future.set_exception(e)
+            return
+        batch = [(method, params) for method, params, _ in items]
+        try:
+            responses = self._dispatch(lambda p: p.make_batch_request(batch), expect_list=True)
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        # Um nó pode omitir respostas do lote: quem ficou sem a sua recebe erro em vez de esperar
+        for (method, _, future), response in zip(items, match_batch(batch, responses)):
+            if response is None:
+                future.set_exception(RpcEndpointError(f"Lote sem resposta para {method}"))
+            else:
+                future.set_result(response)
+
+    def _filter_request(self, method, params):
+        if self._filter_endpoint is None or method.startswith("eth_new"):
+            self._filter_endpoint = self.ranked()[0]
+        return self._attempt(self._filter_endpoint, lambda p: p.make_request(method, params))
+
+    def make_request(self, method, params):
+        if method in FILTER_METHODS:
+            return self._filter_request(method, params)
+        if method in NO_HEDGE_METHODS:
+            return self._dispatch(lambda p: p.make_request(method, params), hedge=False)
+        if self.batch_window <= 0:
+            return self._dispatch(lambda p: p.make_request(method, params))
+
+        future: Future = Future()
+        with self._lock:
+            self._queue.append((method, params, future))
+            leader = len(self._queue) == 1
+        if leader:
+            # A primeira chamada da janela espera as demais e envia o lote por todas
+            time.sleep(self.batch_window)
+            self._flush()
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            raise RpcEndpointError(f"Sem resposta para {method} em {self.wait_timeout:.1f}s") from None
+
+    def make_batch_request(self, requests):
+        """Respostas na ordem de `requests`; chamadas que o nó omitiu voltam como objeto de erro"""
+        responses = self._dispatch(lambda p: p.make_batch_request(requests), expect_list=True)
+        return [response if response is not None else
+                {"jsonrpc": "2.0", "id": i, "error": {"code": -32603, "message": "sem resposta no lote"}}
+                for i, response in enumerate(match_batch(requests, responses))]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for session in self._sessions:
+            session.close()
+
+
+def make_web3(endpoints: Sequence[str], **kwargs) -> Web3:
+    """Web3 sobre um RpcPool; parâmetros extras vão para o pool"""
+    return Web3(RpcPool(endpoints, **kwargs))
@@ -0,0 +1,132 @@
+import asyncio
+import multiprocessing as mp
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.logger import arb_logger
+from utils.price_board import PriceBoard
+
+
+def shard_indexes(n_pairs: int, n_workers: int) -> List[List[int]]:
+    """Round-robin: pares vizinhos na config (em geral dos mesmos tokens) vão para workers diferentes"""
+    return [list(range(worker, n_pairs, n_workers)) for worker in range(n_workers)]
+
+
+def reserve_state_factory(endpoints: Sequence[str], dexes: Sequence[Tuple[str, str]], multicall_address: str,
+                          pairs: List[dict]):
+    """Estado padrão de um shard: ReserveState próprio, com conexões RPC do próprio processo"""
+    from utils.reserve_state import ReserveState
+    from utils.reserves import ReserveReader
+    from utils.rpc_pool import make_web3
+    return ReserveState(ReserveReader(make_web3(endpoints), pairs, dexes, multicall_address))
+
+
+def _latest(blocks) -> Optional[int]:
+    """Próximo bloco a processar; blocos acumulados na fila são pulados (só o mais novo importa)"""
+    block_number = blocks.get()
+    while block_number is not None and not blocks.empty():
+        block_number = blocks.get()
+    return block_number
+
+
+def _worker_main(board_name: str, worker: int, pair_indexes: List[int], pairs: List[dict],
+                 dex_names: List[str], state_factory: Callable, blocks):
+    """
+    Loop de um worker: a cada bloco recebido, atualiza as reservas do seu shard e publica
+    no quadro só os pares que mudaram. Nunca assina nem envia transações.
+    """
+    board = PriceBoard.attach(board_name)
+    row = np.zeros((len(dex_names), 2))
+    try:
+        state = state_factory(pairs)
+        while True:
+            block_number = _latest(blocks)
+            if block_number is None:
+                break
+            try:
+                changed = state.poll(block_number)
+            except Exception as e:
+                arb_logger.logger.error("Erro ao atualizar reservas do shard", worker=worker, error=str(e))
+                changed = ()
+            for local in changed:
+                for col, name in enumerate(dex_names):
+                    entry = state.reserves.get((local, name))
+                    row[col] = (entry.reserve_in, entry.reserve_out) if entry is not None else (0.0, 0.0)
+                board.write(pair_indexes[local], block_number, row)
+            board.mark_done(worker, block_number)
+    finally:
+        board.close()
+
+
+class ShardPool:
+    """
+    Varredura on-chain em vários processos: cada worker lê as reservas de um shard dos pares
+    e escreve no PriceBoard; este processo (o de decisão) só lê o quadro, detecta e envia,
+    então nonce e assinatura continuam num único lugar.
+    """
+
+    def __init__(self, pairs: Sequence[dict], dex_names: Sequence[str], state_factory: Callable,
+                 workers: int = 2, timeout: float = 5.0, poll_interval: float = 0.001):
+        self.pairs = list(pairs)
+        self.dex_names = list(dex_names)
+        self.state_factory = state_factory
+        self.workers = max(1, min(workers, len(self.pairs)))
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.board: Optional[PriceBoard] = None
+        self._processes: list = []
+        self._queues: list = []
+        self._seen: Optional[np.ndarray] = None
+
+    def start(self):
+        # spawn: o processo de decisão já tem threads (logs, RPC) que um fork copiaria pela metade
+        ctx = mp.get_context("spawn")
+        self.board = PriceBoard.create(len(self.pairs), len(self.dex_names), self.workers)
+        self._seen = self.board.seq.copy()
+        for worker, indexes in enumerate(shard_indexes(len(self.pairs), self.workers)):
+            blocks = ctx.SimpleQueue()
+            process = ctx.Process(
+                target=_worker_main, name=f"shard-{worker}", daemon=True,
+                args=(self.board.name, worker, indexes, [self.pairs[i] for i in indexes], self.dex_names,
+                      self.state_factory, blocks)
+            )
+            process.start()
+            self._queues.append(blocks)
+            self._processes.append(process)
+        arb_logger.logger.info("Shards iniciados", workers=self.workers, pairs=len(self.pairs))
+        return self
+
+    async def advance(self, block_number: int) -> np.ndarray:
+        """Pede o bloco a todos os workers, espera (até timeout) e retorna os pares alterados"""
+        for blocks in self._queues:
+            blocks.put(block_number)
+        deadline = time.monotonic() + self.timeout
+        while (self.board.done_block < block_number).any():
+            if time.monotonic() > deadline:
+                lagging = np.nonzero(self.board.done_block < block_number)[0].tolist()
+                dead = [w for w in lagging if not self._processes[w].is_alive()]
+                arb_logger.logger.error("Shards atrasados", block=block_number, lagging=lagging, dead=dead)
+                break
+            await asyncio.sleep(self.poll_interval)
+        # O que chegar atrasado aparece no próximo bloco: a detecção é por seq, não por número de bloco
+        return self.board.changed(self._seen)
+
+    def read(self, pair_indexes: Sequence[int]) -> np.ndarray:
+        """Reservas (n, n_dexes, 2) dos pares pedidos, no formato do SpreadEngine"""
+        reserves, _, seqs = self.board.read(pair_indexes)
+        self._seen[np.asarray(pair_indexes, dtype=np.intp)] = seqs
+        return reserves
+
+    def close(self, timeout: float = 5.0):
+        for blocks in self._queues:
+            blocks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes, self._queues = [], []
+        if self.board is not None:
+            self.board.close()
+            self.board = None
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import namedtuple
+from typing import List, Sequence, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from utils.logger import SIMULATION_LATENCY, arb_logger
+
+EXECUTE_ARBITRAGE = bytes(Web3.keccak(text="executeArbitrage((address,address,uint256,uint8,uint8))")[:4])
+
+# Trade candidato no formato de ArbitrageBot.ArbitrageParams, com contexto livre para o chamador
+Candidate = namedtuple("Candidate", ["token_in", "token_out", "amount", "buy_dex", "sell_dex", "context"])
+SimulationResult = namedtuple("SimulationResult", ["candidate", "data", "amount_out", "profit", "latency", "error"])
+
+
+def encode_execute_arbitrage(token_in: str, token_out: str, amount: int, buy_dex: int, sell_dex: int) -> bytes:
+    """Calldata de executeArbitrage(ArbitrageParams)"""
+    params = (Web3.to_checksum_address(token_in), Web3.to_checksum_address(token_out),
+              int(amount), int(buy_dex), int(sell_dex))
+    return EXECUTE_ARBITRAGE + encode(["(address,address,uint256,uint8,uint8)"], [params])
+
+
+def _revert_reason(error) -> str:
+    if isinstance(error, dict):
+        return str(error.get("message", error))
+    return str(error)
+
+
+class TradeSimulator:
+    """
+    Executa todos os candidatos de um bloco como eth_call num único lote JSON-RPC,
+    descarta os que reverteriam e ordena os vencedores pelo amountOut simulado.
+    """
+
+    def __init__(self, w3, contract_address: str, sender: str):
+        self.w3 = w3
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.sender = Web3.to_checksum_address(sender)
+
+    def _call_batch(self, requests: List[Tuple[str, list]]) -> Tuple[list, List[float]]:
+        """Retorna (respostas, latência de cada candidato)"""
+        make_batch = getattr(self.w3.provider, "make_batch_request", None)
+        if make_batch is not None:
+            start = time.perf_counter()
+            responses = make_batch(requests)
+            # Todos os candidatos compartilham a mesma ida e volta ao nó
+            return responses, [time.perf_counter() - start] * len(requests)
+
+        responses, latencies = [], []
+        for method, params in requests:
+            start = time.perf_counter()
+            try:
+                responses.append(self.w3.provider.make_request(method, params))
+            except Exception as e:
+                responses.append({"error": {"message": str(e)}})
+            latencies.append(time.perf_counter() - start)
+        return responses, latencies
+
+    def simulate(self, candidates: Sequence[Candidate],
+                 block_identifier="latest") -> Tuple[List[SimulationResult], List[SimulationResult]]:
+        """Retorna (vencedores ordenados por lucro simulado, perdedores)"""
+        if not candidates:
+            return [], []
+        if isinstance(block_identifier, int):
+            # JSON-RPC cru espera o número do bloco em hex
+            block_identifier = hex(block_identifier)
+        payloads = [encode_execute_arbitrage(c.token_in, c.token_out, c.amount, c.buy_dex, c.sell_dex)
+                    for c in candidates]
+        requests = [
+            ("eth_call", [{"from": self.sender, "to": self.contract_address, "data": "0x" + data.hex()},
+                          block_identifier])
+            for data in payloads
+        ]
+        responses, latencies = self._call_batch(requests)
+
+        winners, losers = [], []
+        for candidate, data, response, latency in zip(candidates, payloads, responses, latencies):
+            SIMULATION_LATENCY.observe(latency)
+            error = response.get("error")
+            amount_out = 0
+            if error is None:
+                try:
+                    amount_out = decode(["uint256"], Web3.to_bytes(hexstr=response["result"]))[0]
+                except Exception as e:
+                    error = f"Retorno inválido: {e}"
+            profit = amount_out - int(candidate.amount)
+            result = SimulationResult(candidate, data, amount_out, profit, latency,
+                                      _revert_reason(error) if error is not None else None)
+            if error is None and profit > 0:
+                winners.append(result)
+            else:
+                losers.append(result)
+
+        winners.sort(key=lambda r: r.profit, reverse=True)
+        for result in losers:
+            arb_logger.logger.info("simulation_rejected", token_in=result.candidate.token_in,
+                                   token_out=result.candidate.token_out, reason=result.error,
+                                   latency=result.latency)
+        return winners, losers
+
+    async def simulate_async(self, candidates: Sequence[Candidate], block_identifier="latest"):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.simulate, candidates, block_identifier)
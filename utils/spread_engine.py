@@ -0,0 +1,117 @@
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.reserves import DEFAULT_FEE_BPS, ReserveSnapshot
+
+# buy_dex/sell_dex são os índices do mapping `dexes` do ArbitrageBot
+Opportunity = namedtuple("Opportunity", [
+    "pair_index", "buy_dex", "sell_dex", "amount_in", "amount_out", "profit", "profit_percent", "profit_usd"
+])
+
+
+def round_trip_coefficients(reserves: np.ndarray, fees: np.ndarray):
+    """
+    Compõe compra na DEX A (tokenIn -> tokenOut) e venda na DEX B (tokenOut -> tokenIn)
+    numa única curva out(d) = A*d / (B + C*d), para todos os pares e combinações A x B.
+
+    reserves: (n_pares, n_dexes, 2) com [reserva tokenIn, reserva tokenOut]
+    fees: (n_dexes,) em fração (0.003 = 0,3%)
+    Retorna A, B, C com shape (n_pares, n_dexes_compra, n_dexes_venda).
+    """
+    gamma = 1.0 - fees
+    x_a = reserves[:, :, None, 0]  # tokenIn na DEX de compra
+    y_a = reserves[:, :, None, 1]  # tokenOut na DEX de compra
+    x_b = reserves[:, None, :, 0]  # tokenIn na DEX de venda
+    y_b = reserves[:, None, :, 1]  # tokenOut na DEX de venda
+    g_a = gamma[None, :, None]
+    g_b = gamma[None, None, :]
+
+    a = g_a * g_b * y_a * x_b
+    b = x_a * y_b
+    c = g_a * (y_b + g_b * y_a)
+    return a, b, c
+
+
+def optimal_round_trips(reserves: np.ndarray, fees: np.ndarray, flash_fee: float = 0.0,
+                        gas_cost: Optional[np.ndarray] = None,
+                        token_values: Optional[np.ndarray] = None,
+                        min_profit_usd: float = 0.0, top: Optional[int] = None) -> List[Opportunity]:
+    """
+    Calcula, vetorizado, o tamanho ótimo e o lucro líquido de todas as idas e voltas
+    entre DEXs e devolve as oportunidades ordenadas por lucro em USD.
+
+    gas_cost: (n_pares,) custo de gas em unidades de tokenIn
+    token_values: (n_pares,) valor em USD de uma unidade de tokenIn (1 se omitido)
+    """
+    reserves = np.asarray(reserves, dtype=np.float64)
+    fees = np.asarray(fees, dtype=np.float64)
+    n_pairs, n_dexes = reserves.shape[:2]
+    gas_cost = np.zeros(n_pairs) if gas_cost is None else np.asarray(gas_cost, dtype=np.float64)
+    token_values = np.ones(n_pairs) if token_values is None else np.asarray(token_values, dtype=np.float64)
+    k = 1.0 + flash_fee
+
+    a, b, c = round_trip_coefficients(reserves, fees)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # out'(d) = A*B / (B + C*d)^2 = k  =>  d* = (sqrt(A*B/k) - B) / C
+        amount_in = (np.sqrt(a * b / k) - b) / c
+        valid = (b > 0) & (c > 0) & (a > k * b) & np.isfinite(amount_in)
+        amount_in = np.where(valid, amount_in, 0.0)
+        amount_out = np.where(valid, a * amount_in / (b + c * amount_in), 0.0)
+
+    profit = amount_out - k * amount_in - gas_cost[:, None, None]
+    profit_usd = profit * token_values[:, None, None]
+    same_dex = np.eye(n_dexes, dtype=bool)[None, :, :]
+    candidates = valid & ~same_dex & (profit_usd > min_profit_usd)
+
+    pair_idx, buy_idx, sell_idx = np.nonzero(candidates)
+    order = np.argsort(-profit_usd[pair_idx, buy_idx, sell_idx], kind="stable")
+    if top is not None:
+        order = order[:top]
+
+    opportunities = []
+    for i in order:
+        p, bi, si = pair_idx[i], buy_idx[i], sell_idx[i]
+        d = amount_in[p, bi, si]
+        opportunities.append(Opportunity(
+            int(p), int(bi), int(si), int(d), int(amount_out[p, bi, si]),
+            float(profit[p, bi, si]), float(profit[p, bi, si] / d * 100),
+            float(profit_usd[p, bi, si])
+        ))
+    return opportunities
+
+
+class SpreadEngine:
+    """Engine de spreads entre DEXs na ordem de DEXs usada pelo contrato"""
+
+    def __init__(self, dex_names: Sequence[str], fees_bps: Optional[Dict[str, int]] = None,
+                 flash_fee: float = 0.0):
+        self.dex_names = list(dex_names)
+        fees_bps = fees_bps or {}
+        self.fees = np.array([fees_bps.get(name, DEFAULT_FEE_BPS) / 10000 for name in self.dex_names])
+        self.flash_fee = flash_fee
+
+    def reserves_from_snapshot(self, snapshot: ReserveSnapshot, n_pairs: int,
+                               pair_indexes: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Monta o array (n_pares, n_dexes, 2); pools ausentes ficam com reservas zeradas"""
+        pair_indexes = range(n_pairs) if pair_indexes is None else pair_indexes
+        reserves = np.zeros((len(pair_indexes), len(self.dex_names), 2))
+        for row, pair_index in enumerate(pair_indexes):
+            for col, name in enumerate(self.dex_names):
+                entry = snapshot.reserves.get((pair_index, name))
+                if entry is not None:
+                    reserves[row, col, 0] = entry.reserve_in
+                    reserves[row, col, 1] = entry.reserve_out
+        return reserves
+
+    def scan(self, reserves: np.ndarray, gas_cost: Optional[np.ndarray] = None,
+             token_values: Optional[np.ndarray] = None, min_profit_usd: float = 0.0,
+             top: Optional[int] = None,
+             pair_indexes: Optional[Sequence[int]] = None) -> List[Opportunity]:
+        """pair_indexes traduz as linhas de `reserves` de volta para os índices originais dos pares"""
+        opportunities = optimal_round_trips(reserves, self.fees, self.flash_fee, gas_cost,
+                                            token_values, min_profit_usd, top)
+        if pair_indexes is not None:
+            opportunities = [o._replace(pair_index=pair_indexes[o.pair_index]) for o in opportunities]
+        return opportunities
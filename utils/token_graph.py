@@ -0,0 +1,116 @@
+import math
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.reserves import DEFAULT_FEE_BPS
+
+# path: tokens do ciclo (o primeiro se repete no fim); dexes: DEX usada em cada salto
+Cycle = namedtuple("Cycle", ["path", "dexes", "rate", "profit_percent"])
+
+
+class TokenGraph:
+    """
+    Grafo de tokens com arestas -log(taxa) por DEX. Um ciclo de peso negativo é uma
+    sequência de swaps que devolve mais do que entrou.
+    """
+
+    def __init__(self, tokens: Iterable[str], max_hops: int = 3, min_profit: float = 0.0):
+        self.tokens = sorted({t.lower() for t in tokens})
+        self.max_hops = max_hops
+        self.min_profit = min_profit
+        # (src, dst) -> {dex: taxa}
+        self.rates: Dict[Tuple[str, str], Dict[str, float]] = {}
+        # Melhor aresta por direção: (src, dst) -> (peso, dex)
+        self.best: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self.adjacency: Dict[str, Set[str]] = {t: set() for t in self.tokens}
+        self.dirty: Set[str] = set()
+
+    def set_rate(self, src: str, dst: str, dex: str, rate: float):
+        """Atualiza a taxa de uma aresta; só marca o grafo como alterado se a melhor aresta mudou"""
+        src, dst = src.lower(), dst.lower()
+        self.adjacency.setdefault(src, set())
+        self.adjacency.setdefault(dst, set())
+        by_dex = self.rates.setdefault((src, dst), {})
+        if rate > 0:
+            by_dex[dex] = rate
+        else:
+            by_dex.pop(dex, None)
+
+        previous = self.best.get((src, dst))
+        if by_dex:
+            best_dex = max(by_dex, key=by_dex.get)
+            current = (-math.log(by_dex[best_dex]), best_dex)
+            self.best[(src, dst)] = current
+            self.adjacency[src].add(dst)
+        else:
+            current = None
+            self.best.pop((src, dst), None)
+            self.adjacency[src].discard(dst)
+
+        if current != previous:
+            self.dirty.update((src, dst))
+
+    def set_reserves(self, token_a: str, token_b: str, dex: str, reserve_a: int, reserve_b: int,
+                     fee_bps: int = DEFAULT_FEE_BPS):
+        """Arestas nos dois sentidos a partir do preço marginal de um pool constant-product"""
+        gamma = 1 - fee_bps / 10000
+        if reserve_a > 0 and reserve_b > 0:
+            self.set_rate(token_a, token_b, dex, gamma * reserve_b / reserve_a)
+            self.set_rate(token_b, token_a, dex, gamma * reserve_a / reserve_b)
+        else:
+            self.set_rate(token_a, token_b, dex, 0)
+            self.set_rate(token_b, token_a, dex, 0)
+
+    def _cycles_from(self, source: str) -> List[Cycle]:
+        """Bellman-Ford limitado a max_hops a partir de source, relaxando só a fronteira (SPFA)"""
+        # Margem para erro de ponto flutuante em ciclos com taxa exatamente 1
+        threshold = -math.log1p(self.min_profit) - 1e-12
+        # dist[v] = (peso, caminho, dexes) do melhor caminho source -> v com k saltos
+        frontier = {source: (0.0, (source,), ())}
+        cycles = []
+        for _ in range(self.max_hops):
+            next_frontier: Dict[str, Tuple[float, tuple, tuple]] = {}
+            for node, (weight, path, dexes) in frontier.items():
+                for dst in self.adjacency.get(node, ()):
+                    edge_weight, dex = self.best[(node, dst)]
+                    total = weight + edge_weight
+                    if dst == source:
+                        if len(path) >= 2 and total < threshold:
+                            cycles.append(self._make_cycle(path + (source,), dexes + (dex,), total))
+                        continue
+                    if dst in path:
+                        continue
+                    known = next_frontier.get(dst)
+                    if known is None or total < known[0]:
+                        next_frontier[dst] = (total, path + (dst,), dexes + (dex,))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return cycles
+
+    @staticmethod
+    def _make_cycle(path, dexes, weight) -> Cycle:
+        rate = math.exp(-weight)
+        return Cycle(path, dexes, rate, (rate - 1) * 100)
+
+    @staticmethod
+    def _canonical(cycle: Cycle) -> tuple:
+        """Mesmo ciclo começando em tokens diferentes conta uma vez só"""
+        nodes = cycle.path[:-1]
+        start = nodes.index(min(nodes))
+        return nodes[start:] + nodes[:start], cycle.dexes[start:] + cycle.dexes[:start]
+
+    def find_cycles(self, sources: Optional[Iterable[str]] = None) -> List[Cycle]:
+        """
+        Busca ciclos lucrativos passando pelos tokens alterados desde a última busca
+        (ou pelos `sources` informados) e os retorna ordenados por lucro.
+        """
+        if sources is None:
+            sources, self.dirty = self.dirty, set()
+        found = {}
+        for source in sources:
+            for cycle in self._cycles_from(source.lower()):
+                key = self._canonical(cycle)
+                if key not in found or cycle.rate > found[key].rate:
+                    found[key] = cycle
+        return sorted(found.values(), key=lambda c: c.rate, reverse=True)
@@ -0,0 +1,187 @@
+import asyncio
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.logger import arb_logger
+from utils.quotes import Quote, as_quote, as_response
+
+DECIMALS = "0x313ce567"  # decimals()
+
+# Tokens monitorados na Polygon; os demais são lidos dos contratos no início (prefetch) ou no primeiro uso
+KNOWN_DECIMALS = {
+    "0xc2132d05d31c914a87c6611c10748aeb04b58e8f": 6,   # USDT
+    "0x2791bca1f2de4661ed88a30c99a7a9449aa84174": 6,   # USDC
+    "0x1bfd67037b42cf73acf2047067bd4f2c47d9bfd6": 8,   # WBTC
+    "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270": 18,  # WMATIC
+    "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619": 18,  # WETH
+    "0xd6df932a45c0f255f85145f286ea0b292b21c90b": 18,  # AAVE
+    "0x8f3cf7ad23cd3cadbd9735aff958023239c6a063": 18,  # DAI
+    "0x831753dd7087cac61ab5644b308642cc1c33dc13": 18,  # QUICK
+    "0xbbba073c31bf03b8d0d9b09a2e8a65f810b4348e": 18,  # SUSHI
+}
+
+# amount_in/amount_out em unidades base; quote é o Quote da Paraswap no tamanho escolhido
+SizedTrade = namedtuple("SizedTrade", ["amount_in", "amount_out", "profit_usd", "quote", "fitted_amount"])
+
+
+class TokenDecimals:
+    """decimals() por token, lido uma vez do contrato ERC20 e mantido em memória"""
+
+    def __init__(self, w3=None, known: Optional[Dict[str, int]] = None, default: int = 18,
+                 multicall_address: Optional[str] = None):
+        self.w3 = w3
+        self.default = default
+        self.multicall_address = multicall_address
+        self._decimals = {k.lower(): v for k, v in (KNOWN_DECIMALS if known is None else known).items()}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def prefetch(self, tokens: Iterable[str]):
+        """decimals() de todos os tokens ainda desconhecidos em um único eth_call ao Multicall3"""
+        missing = sorted({token.lower() for token in tokens} - set(self._decimals))
+        if not missing or self.w3 is None:
+            return
+        from utils.reserves import MULTICALL3_ADDRESS, decode_multicall, encode_multicall
+        selector = bytes.fromhex(DECIMALS[2:])
+        raw = self.w3.eth.call({"to": self.multicall_address or MULTICALL3_ADDRESS,
+                                "data": encode_multicall([(token, selector) for token in missing])})
+        _, results = decode_multicall(raw)
+        for token, data in zip(missing, results):
+            self._decimals[token] = int.from_bytes(data[-32:], "big") if data else self.default
+
+    def get(self, token: str) -> int:
+        token = token.lower()
+        if token not in self._decimals:
+            decimals = self.default
+            if self.w3 is not None:
+                try:
+                    raw = self.w3.eth.call({"to": self.w3.to_checksum_address(token), "data": DECIMALS})
+                    decimals = int.from_bytes(bytes(raw)[-32:], "big")
+                except Exception as e:
+                    arb_logger.logger.error("Erro ao ler decimals", token=token, error=str(e))
+            self._decimals[token] = decimals
+        return self._decimals[token]
+
+    async def get_async(self, token: str) -> int:
+        """Como get, mas a leitura ao nó (token fora do cache) roda num executor, fora do loop"""
+        token = token.lower()
+        if token in self._decimals:
+            return self._decimals[token]
+        future = self._pending.get(token)
+        if future is None:
+            # Pedidos simultâneos do mesmo token compartilham uma única leitura
+            future = asyncio.get_running_loop().run_in_executor(None, self.get, token)
+            self._pending[token] = future
+            future.add_done_callback(lambda _: self._pending.pop(token, None))
+        return await future
+
+
+def net_profit_usd(quote: Quote, flash_fee: float = 0.0) -> float:
+    """Lucro líquido em USD de uma cotação: saída - entrada - taxa do flash loan - gas"""
+    return quote.dest_usd - quote.src_usd * (1 + flash_fee) - quote.gas_cost_usd
+
+
+def fit_output_curve(amounts: Sequence[float], outputs: Sequence[float]) -> Optional[Tuple[float, float]]:
+    """
+    Ajusta out(d) = d / (B + C*d) aos pontos da escada (forma de uma rota constant-product):
+    d/out = B + C*d é linear em d. Retorna (B, C) ou None se o ajuste não faz sentido.
+    """
+    d = np.asarray(amounts, dtype=np.float64)
+    out = np.asarray(outputs, dtype=np.float64)
+    mask = (d > 0) & (out > 0)
+    if mask.sum() < 3:
+        return None
+    d, out = d[mask], out[mask]
+    c, b = np.polyfit(d, d / out, 1)
+    if not (np.isfinite(b) and np.isfinite(c)) or b <= 0:
+        return None
+    return float(b), float(c)
+
+
+def optimal_amount(b: float, c: float, in_value: float, out_value: float, flash_fee: float = 0.0) -> Optional[float]:
+    """
+    Maximiza out_value*out(d) - in_value*(1+flash_fee)*d para out(d) = d/(B + C*d):
+    out'(d) = B/(B + C*d)^2 = k  =>  d* = (sqrt(B/k) - B) / C, com k = in_value*(1+fee)/out_value.
+    """
+    if c <= 0 or in_value <= 0 or out_value <= 0:
+        return None
+    k = in_value * (1 + flash_fee) / out_value
+    d = (np.sqrt(b / k) - b) / c
+    return float(d) if d > 0 else None
+
+
+class TradeSizer:
+    """
+    Dimensiona o trade de uma oportunidade: cota uma escada geométrica de tamanhos em paralelo,
+    ajusta a curva de saída e escolhe o tamanho com maior lucro líquido após gas e flash loan.
+    """
+
+    def __init__(self, client, decimals: TokenDecimals, flash_fee: float = 0.0, steps: int = 6,
+                 factor: float = 2.0, reference_usd: float = 1000.0, recorder=None):
+        self.client = client
+        self.recorder = recorder
+        self.decimals = decimals
+        self.flash_fee = flash_fee
+        self.steps = steps
+        self.factor = factor
+        self.reference_usd = reference_usd
+        # USD por unidade base, aprendido das próprias cotações
+        self.prices: Dict[str, float] = {}
+
+    def observe(self, quote: Quote):
+        if quote.src_amount > 0 and quote.src_usd > 0:
+            self.prices[quote.src_token.lower()] = quote.src_usd / quote.src_amount
+        if quote.dest_amount > 0 and quote.dest_usd > 0:
+            self.prices[quote.dest_token.lower()] = quote.dest_usd / quote.dest_amount
+
+    async def reference_amount(self, token: str) -> int:
+        """~reference_usd do token se o preço é conhecido; senão uma unidade inteira"""
+        price = self.prices.get(token.lower())
+        if price:
+            return max(1, int(self.reference_usd / price))
+        return 10 ** await self.decimals.get_async(token)
+
+    async def ladder(self, token: str) -> List[int]:
+        """Escada geométrica centrada no valor de referência"""
+        reference = await self.reference_amount(token)
+        first = -(self.steps // 2)
+        return sorted({max(1, int(reference * self.factor ** i)) for i in range(first, first + self.steps)})
+
+    async def _quote(self, src: str, dest: str, amount: int, **kwargs) -> Optional[Quote]:
+        data = await self.client.get_prices(src, dest, side="SELL", amount=str(amount), **kwargs)
+        quote = as_quote(data)
+        if quote is None:
+            return None
+        if self.recorder is not None:
+            self.recorder.record_quote({"srcToken": src, "destToken": dest, "side": "SELL", "amount": str(amount),
+                                        **kwargs}, as_response(data), source="ladder")
+        self.observe(quote)
+        return quote
+
+    async def size(self, src: str, dest: str, **kwargs) -> Optional[SizedTrade]:
+        """Melhor tamanho para src -> dest, ou None se nenhum tamanho dá lucro líquido"""
+        amounts = await self.ladder(src)
+        quotes = [q for q in await asyncio.gather(*(self._quote(src, dest, a, **kwargs) for a in amounts))
+                  if q is not None]
+        if not quotes:
+            return None
+
+        fitted = None
+        curve = fit_output_curve([q.src_amount for q in quotes], [q.dest_amount for q in quotes])
+        src_price, dest_price = self.prices.get(src.lower()), self.prices.get(dest.lower())
+        if curve is not None and src_price and dest_price:
+            fitted = optimal_amount(*curve, src_price, dest_price, self.flash_fee)
+        if fitted is not None:
+            # Não extrapola além da escada cotada
+            fitted = int(min(max(fitted, amounts[0]), amounts[-1]))
+            if all(abs(fitted - a) > a * 0.01 for a in amounts):
+                quote = await self._quote(src, dest, fitted, **kwargs)
+                if quote is not None:
+                    quotes.append(quote)
+
+        best = max(quotes, key=lambda q: net_profit_usd(q, self.flash_fee))
+        profit = net_profit_usd(best, self.flash_fee)
+        if profit <= 0:
+            return None
+        return SizedTrade(best.src_amount, best.dest_amount, profit, best, fitted)
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from utils.logger import INFLIGHT_SUPPRESSED, INFLIGHT_TRADES, arb_logger
+
+DEFAULT_GAS_LIMIT = 2000000
+
+
+def raw_transaction(signed) -> bytes:
+    """Transação assinada serializada; eth-account >= 0.13 renomeou rawTransaction para raw_transaction"""
+    raw = getattr(signed, "raw_transaction", None)
+    return raw if raw is not None else signed.rawTransaction
+
+
+class NonceManager:
+    """Controla o próximo nonce localmente; só volta ao nó no sync inicial e após erros"""
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self.pending: Set[int] = set()
+        self._next: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Relê o nonce do nó, incluindo transações ainda no mempool"""
+        nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+        with self._lock:
+            self._next = nonce
+            self.pending = {n for n in self.pending if n >= nonce}
+
+    def next_nonce(self) -> int:
+        """Reserva o próximo nonce sem RPC (exceto no primeiro uso)"""
+        if self._next is None:
+            self.sync()
+        with self._lock:
+            nonce = self._next
+            self._next += 1
+            self.pending.add(nonce)
+            return nonce
+
+    def confirm(self, nonce: int):
+        with self._lock:
+            self.pending.discard(nonce)
+
+    def resync(self, error: Optional[Exception] = None):
+        """Chamado quando um envio falha (nonce too low, replacement underpriced, ...)"""
+        arb_logger.logger.info("Ressincronizando nonce", error=str(error) if error else None)
+        with self._lock:
+            self._next = None
+        self.sync()
+
+
+class FeeOracle:
+    """Taxas de gas (EIP-1559 ou legacy) recalculadas uma vez por bloco, fora do caminho de envio"""
+
+    def __init__(self, w3, multiplier: float = 1.1, max_age: Optional[float] = None):
+        self.w3 = w3
+        self.multiplier = multiplier
+        self.max_age = max_age
+        self.block_number: Optional[int] = None
+        self.updated_at = 0.0
+        self._fees: Optional[Dict[str, int]] = None
+        self._refreshing: Optional[asyncio.Future] = None
+
+    def refresh(self, block_number: Optional[int] = None) -> Dict[str, int]:
+        block = self.w3.eth.get_block("latest" if block_number is None else block_number)
+        base_fee = block.get("baseFeePerGas")
+        if base_fee is not None:
+            priority_fee = int(self.w3.eth.max_priority_fee * self.multiplier)
+            fees = {
+                "maxPriorityFeePerGas": priority_fee,
+                # Margem para o base fee subir por alguns blocos antes da inclusão
+                "maxFeePerGas": int(base_fee * 2 + priority_fee),
+            }
+        else:
+            fees = {"gasPrice": int(self.w3.eth.gas_price * self.multiplier)}
+        self._fees = fees
+        self.block_number = block["number"]
+        self.updated_at = time.monotonic()
+        return fees
+
+    async def refresh_async(self, block_number: Optional[int] = None):
+        """Atualiza em background; blocos repetidos ou refresh em andamento são ignorados"""
+        if block_number is not None and block_number == self.block_number:
+            return
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        loop = asyncio.get_running_loop()
+        self._refreshing = loop.run_in_executor(None, self.refresh, block_number)
+        try:
+            await self._refreshing
+        except Exception as e:
+            arb_logger.logger.error("Erro ao atualizar taxas de gas", error=str(e))
+
+    def fees(self) -> Dict[str, int]:
+        """Taxas em cache; só consulta o nó se nunca houve refresh (ou se passaram de max_age)"""
+        if self._fees is None or (self.max_age is not None
+                                  and time.monotonic() - self.updated_at > self.max_age):
+            return self.refresh()
+        return dict(self._fees)
+
+
+class GasLimits:
+    """Limite de gas por rota aprendido do gasUsed dos recibos, dispensando estimate_gas"""
+
+    def __init__(self, default: int = DEFAULT_GAS_LIMIT, margin: float = 1.2):
+        self.default = default
+        self.margin = margin
+        self._limits: Dict[Hashable, int] = {}
+
+    def get(self, route: Hashable) -> int:
+        return self._limits.get(route, self.default)
+
+    def observe(self, route: Hashable, gas_used: int):
+        self._limits[route] = int(gas_used * self.margin)
+
+
+_MISSING = object()
+
+
+class InFlightRegistry:
+    """
+    Trades enviados e ainda sem recibo, por rota (tokenIn, tokenOut, DEX de compra, DEX de venda).
+    Bloqueia a mesma rota enquanto a primeira transação está pendente e limita quantos trades
+    simultâneos tocam cada token e cada DEX. A entrada sai no recibo ou no timeout do ReceiptWatcher;
+    `ttl_blocks` é só uma rede de segurança e deve passar desse timeout (Config.inflight_ttl_blocks).
+    """
+
+    def __init__(self, ttl_blocks: int = 52, max_per_token: int = 2, max_per_dex: int = 4):
+        self.ttl_blocks = ttl_blocks
+        self.max_per_token = max_per_token
+        self.max_per_dex = max_per_dex
+        self.block_number: Optional[int] = None
+        self.entries: Dict[Tuple, Optional[int]] = {}  # rota -> bloco do envio
+        self._tokens: Counter = Counter()
+        self._dexes: Counter = Counter()
+
+    @staticmethod
+    def _exposure(route: Tuple):
+        token_in, token_out, buy_dex, sell_dex = route
+        return {token_in, token_out}, {buy_dex, sell_dex}
+
+    def acquire(self, route: Tuple) -> bool:
+        """Registra a rota; False (e a contagem por motivo) se ela deve ser suprimida"""
+        if route in self.entries:
+            reason = "duplicate"
+        else:
+            tokens, dexes = self._exposure(route)
+            if any(self._tokens[t] >= self.max_per_token for t in tokens):
+                reason = "token_cap"
+            elif any(self._dexes[d] >= self.max_per_dex for d in dexes):
+                reason = "dex_cap"
+            else:
+                self.entries[route] = self.block_number
+                self._tokens.update(tokens)
+                self._dexes.update(dexes)
+                INFLIGHT_TRADES.set(len(self.entries))
+                return True
+        INFLIGHT_SUPPRESSED.labels(reason=reason).inc()
+        return False
+
+    def release(self, route: Tuple):
+        if self.entries.pop(route, _MISSING) is _MISSING:
+            return
+        tokens, dexes = self._exposure(route)
+        self._tokens.subtract(tokens)
+        self._dexes.subtract(dexes)
+        INFLIGHT_TRADES.set(len(self.entries))
+
+    def advance_block(self, block_number: int):
+        """Expira rotas pendentes há mais de ttl_blocks (recibo perdido ou transação descartada)"""
+        self.block_number = block_number
+        expired = []
+        for route, sent in self.entries.items():
+            if sent is None:
+                # Enviada antes do primeiro bloco visto: conta a partir deste
+                self.entries[route] = block_number
+            elif block_number - sent >= self.ttl_blocks:
+                expired.append(route)
+        for route in expired:
+            arb_logger.logger.info("Rota em voo expirada", route=list(route), blocks=self.ttl_blocks)
+            self.release(route)